@@ -0,0 +1,196 @@
+"""
+Headless recap API for league bots (GroupMe, Discord, ...).
+
+Serves the same cached stat summaries and LLM recaps as the Streamlit app
+without the script rerun, widget tree and websocket overhead:
+
+    GET /v1/<provider>/<league_id>/summary      -> {"summary": "..."}
+    GET /v1/<provider>/<league_id>/recap        -> {"recap": "..."} or server-sent events
+        ?persona=Dwight%20Schrute&trash_talk=5     (Accept: text/event-stream to stream)
+    GET /healthz, GET /readyz (startup warm-up finished), GET /metrics
+
+ESPN credentials are passed as X-ESPN-S2 / X-ESPN-SWID headers. Yahoo uses the
+server-side auth directory in COMMISH_YAHOO_AUTH_DIR.
+
+Run standalone with `python api.py --port 8080`, or set COMMISH_API_PORT to
+serve it from inside the Streamlit process so it shares the app's caches.
+"""
+import argparse
+import itertools
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from streamlit.logger import get_logger
+from utils import fair_scheduler, metrics, openai_client, provider_http, resilience, structured_logging, summary_generator, warmup
+from utils.resilience import ProviderUnavailable
+
+LOGGER = get_logger(__name__)
+
+PROVIDERS = ("sleeper", "espn", "yahoo")
+
+
+class BadRequest(Exception):
+    """A request the client has to fix (unknown provider, bad parameters): answered with 400."""
+
+
+class RecapRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "CommishAPI/1.0"
+
+    def log_message(self, format, *args):
+        LOGGER.debug("%s - %s", self.address_string(), format % args)
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _client_id(self):
+        """The fair-scheduling tenant: the caller's X-Client-Id, or its address."""
+        return self.headers.get("X-Client-Id") or self.client_address[0]
+
+    def _summary(self, provider, league_id):
+        return summary_generator.get_league_summary(
+            provider,
+            league_id,
+            espn_s2=self.headers.get("X-ESPN-S2"),
+            swid=self.headers.get("X-ESPN-SWID"),
+            auth_dir=os.environ.get("COMMISH_YAHOO_AUTH_DIR"),
+            client_id=self._client_id(),
+        )
+
+    def _stream_recap(self, chunks):
+        """Writes recap chunks as server-sent events, then closes the connection."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        try:
+            for chunk in chunks:
+                if chunk:
+                    self.wfile.write(f"data: {json.dumps({'text': chunk})}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            raise
+        except Exception as e:
+            # The status line is already sent; report the failure inside the stream
+            LOGGER.exception(e)
+            self.wfile.write(f"event: error\ndata: {json.dumps({'error': 'Recap generation failed'})}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            return
+        self.wfile.write(b"event: done\ndata: {}\n\n")
+        self.wfile.flush()
+
+    def _recap(self, provider, league_id, query):
+        client = openai_client.get_client()
+        if client is None:
+            return self._send_json(503, {"error": "LLM recaps are not configured on this server"})
+        persona = query.get("persona", ["Dwight Schrute"])[0].strip()
+        trash_talk = query.get("trash_talk", ["5"])[0]
+        if not persona:
+            raise BadRequest("persona must not be empty")
+        if not trash_talk.isdigit() or not 1 <= int(trash_talk) <= 10:
+            raise BadRequest("trash_talk must be a whole number from 1 to 10")
+        if not summary_generator.moderate_text(client, persona):
+            return self._send_json(400, {"error": "Persona was rejected by moderation"})
+        summary = self._summary(provider, league_id)
+        chunks = summary_generator.cached_recap_stream(client, provider, league_id, summary, persona, trash_talk, self._client_id())
+        if "text/event-stream" in self.headers.get("Accept", ""):
+            # The first chunk waits for an LLM slot; pull it before the headers go out so a
+            # queue timeout still gets a plain 503
+            first = next(chunks, None)
+            return self._stream_recap(itertools.chain([first], chunks))
+        return self._send_json(200, {"recap": "".join(c for c in chunks if c)})
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        parts = [part for part in parsed.path.split("/") if part]
+        query = parse_qs(parsed.query)
+        route = "other"
+        start = time.perf_counter()
+        try:
+            if parts == ["healthz"]:
+                route = "healthz"
+                return self._send_json(200, {"status": "ok"})
+            if parts == ["readyz"]:
+                route = "readyz"
+                return self._send_json(200 if warmup.is_ready() else 503, {"ready": warmup.is_ready(), "steps": warmup.status()})
+            if parts == ["metrics"]:
+                route = "metrics"
+                return self._send_json(200, {
+                    "metrics": metrics.snapshot(),
+                    "providers": resilience.state(),
+                    "http": provider_http.stats(),
+                    "scheduler": fair_scheduler.stats(),
+                })
+            if len(parts) == 4 and parts[0] == "v1" and parts[3] in ("summary", "recap"):
+                if parts[1] not in PROVIDERS:
+                    raise BadRequest(f"Unknown provider '{parts[1]}'; expected one of {', '.join(PROVIDERS)}")
+                provider, league_id, route = parts[1], parts[2], parts[3]
+                if route == "summary":
+                    return self._send_json(200, {"provider": provider, "league_id": league_id, "summary": self._summary(provider, league_id)})
+                return self._recap(provider, league_id, query)
+            return self._send_json(404, {"error": "Not found"})
+        except ProviderUnavailable as e:
+            # A stale summary stands in for a fresh one, but it is no recap
+            if e.stale and route == "summary":
+                stale = e.stale[0] if isinstance(e.stale, tuple) else e.stale
+                return self._send_json(200, {"provider": provider, "league_id": league_id, "summary": stale, "stale": True})
+            return self._send_json(503, {"error": str(e)}, headers={"Retry-After": str(int(e.retry_after or 30))})
+        except PermissionError as e:
+            return self._send_json(401, {"error": str(e)})
+        except summary_generator.SummaryUnavailable as e:
+            return self._send_json(404, {"error": str(e)})
+        except BadRequest as e:
+            return self._send_json(400, {"error": str(e)})
+        except (BrokenPipeError, ConnectionResetError) as e:
+            # The client went away mid-response; there is no one left to answer
+            LOGGER.debug(f"Client disconnected from {self.path}: {e}")
+            self.close_connection = True
+            return
+        except Exception as e:
+            LOGGER.exception(e)
+            return self._send_json(500, {"error": "Internal error"})
+        finally:
+            metrics.increment("api.requests", route=route)
+            metrics.observe("api.request_seconds", time.perf_counter() - start, route=route)
+
+
+def create_server(host="0.0.0.0", port=8080):
+    server = ThreadingHTTPServer((host, port), RecapRequestHandler)
+    server.daemon_threads = True
+    return server
+
+
+def start_in_background(host="0.0.0.0", port=8080):
+    """Serves the API from a daemon thread of the current process. Returns the server."""
+    server = create_server(host, port)
+    threading.Thread(target=server.serve_forever, name="recap-api", daemon=True).start()
+    LOGGER.info(f"Recap API listening on {host}:{port}")
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless Commish.ai recap API")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("COMMISH_API_PORT", 8080)))
+    args = parser.parse_args()
+    structured_logging.install()
+    warmup.start()
+    server = create_server(args.host, args.port)
+    LOGGER.info(f"Recap API listening on {args.host}:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
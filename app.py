@@ -2,9 +2,12 @@ import streamlit as st
 # from openai import OpenAI
 # from openai import OpenAI
 from streamlit.logger import get_logger
-from utils import summary_generator
+from utils import summary_generator, precompute, lazy_imports, openai_client, structured_logging, warmup
 from utils.helper import check_availability
+from utils.resilience import ProviderUnavailable
+import asyncio
 import traceback
+import uuid
 import requests
 import json
 import tempfile
@@ -33,7 +36,34 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+@st.cache_resource
+def start_precompute_scheduler():
+    """Starts the post-finalization precompute thread once per server process."""
+    return precompute.start_scheduler()
+
+@st.cache_resource
+def start_recap_api():
+    """Serves the headless recap API from this process (sharing its caches) when COMMISH_API_PORT is set."""
+    port = os.environ.get("COMMISH_API_PORT")
+    if not port:
+        return None
+    import api
+    return api.start_in_background(port=int(port))
+
+@st.cache_resource
+def start_import_warmup():
+    """Imports the provider SDKs in the background once the first page has rendered."""
+    if os.environ.get("COMMISH_IMPORT_WARMUP", "1") == "0":
+        return None
+    return lazy_imports.warm_up_in_background(["stats", "espn", "openai", "yahoo"])
+
 def main():
+    # Log I/O happens on a background thread; each rerun also routes loggers created since the last one
+    structured_logging.install()
+    # Preload the player index, connection pools and week calendar without blocking this render
+    warmup.start()
+    start_precompute_scheduler()
+    start_recap_api()
     st.write("""
     ## Instructions:
 
@@ -66,6 +96,8 @@ def main():
         league_type = st.selectbox("Select League Type", ["Select", "ESPN", "Yahoo", "Sleeper"], key='league_type')
 
     if league_type != "Select":
+        # Get the chosen provider's SDK loading while the form is filled in
+        lazy_imports.warm_up_in_background([league_type.lower(), "stats"])
         with st.sidebar.form(key='my_form'):
             if league_type == "ESPN":
                 st.text_input("LeagueID", key='LeagueID')
@@ -79,6 +111,8 @@ def main():
             
             st.text_input("Character Description", key='Character Description', placeholder="Dwight Schrute", help= "Describe a persona for the AI to adopt. E.g. 'Dwight Schrute' or 'A very drunk Captain Jack Sparrow'")
             st.slider("Trash Talk Level", 1, 10, key='Trash Talk Level', value=5, help="Scale of 1 to 10, where 1 is friendly banter and 10 is more extreme trash talk")
+            st.text_area("More Personas (optional)", key='Extra Personas', placeholder="A very drunk Captain Jack Sparrow | 8",
+                         help=f"Write the same week up as other personas too: one per line, optionally followed by '| trash talk level'. Up to {summary_generator.MAX_PERSONAS} personas in total, written side by side.")
             submit_button = st.form_submit_button(label='🤖 Test Data Fetching (No AI)')
 
     
@@ -102,6 +136,8 @@ def main():
                         return  # Stop execution if any required field is empty
                 
                 league_id = st.session_state.get('LeagueID', 'Not provided')
+                # Each browser session is one tenant of the fair scheduler
+                client_id = st.session_state.setdefault('client_id', uuid.uuid4().hex)
                 character_description = st.session_state.get('Character Description', 'Not provided')
                 trash_talk_level = st.session_state.get('Trash Talk Level', 'Not provided')
                 swid = st.session_state.get('SWID', 'Not provided')
@@ -122,21 +158,53 @@ def main():
                     return
                 elif league_type == "Sleeper":
                     auth_directory = "auth"
-                    summary = summary_generator.generate_sleeper_summary(
-                        league_id
-                    )
-                    LOGGER.debug(summary)
-                    LOGGER.info(f"Generated Sleeper Summary: \n{summary}")
+                    summary = summary_generator.get_league_summary("sleeper", league_id, client_id=client_id)
+                    structured_logging.log_payload(LOGGER, "Generated Sleeper summary", summary, provider="sleeper", league_id=league_id)
 
                 st.markdown("### Stat Summary (Raw Data)")
                 st.markdown(summary)
 
+                async_client = openai_client.get_async_client()
+                if async_client is not None:
+                    # One stat pass, then every persona's recap streams at the same time
+                    personas = summary_generator.parse_personas(character_description, trash_talk_level, st.session_state.get('Extra Personas', ''))
+                    client = openai_client.get_client()
+                    for persona, _ in personas:
+                        if not summary_generator.moderate_text(client, persona):
+                            st.error(f"The persona '{persona}' can't be used. Please try a different one.")
+                            return
+                    progress.text(f'Writing {len(personas)} recap(s)...')
+                    progress.progress(60)
+                    placeholders = []
+                    for column, (persona, level) in zip(st.columns(len(personas)), personas):
+                        column.markdown(f"#### {persona}\n*Trash talk {level}/10*")
+                        placeholders.append(column.empty())
+                    asyncio.run(summary_generator.stream_persona_recaps(
+                        async_client, summary, personas, lambda index, text: placeholders[index].markdown(text),
+                        provider=league_type.lower(), league_id=league_id, client_id=client_id,
+                    ))
+                    progress.text('Done!')
+                    progress.progress(100)
+                    return
+
                 progress.text('Data fetching complete! AI generation skipped for testing.')
                 progress.progress(100)
                 
                 st.success("✅ Data fetching test completed! Check the summary above to see if player points are now working.")
                 st.info("If you see actual player points (not 0.0), the fix worked! You can then add back the OpenAI integration.")
                 
+            except summary_generator.SummaryUnavailable as e:
+                st.warning(str(e))
+            except ProviderUnavailable as e:
+                # Provider is throttling or down: fail fast, and never invite a resubmit storm
+                LOGGER.warning(f"{league_type} unavailable: {e}")
+                if e.stale:
+                    stale_summary = e.stale[0] if isinstance(e.stale, tuple) else e.stale
+                    st.warning(f"{league_type} is having trouble right now, so this is the most recent recap we have for your league.")
+                    st.markdown("### Stat Summary (Raw Data)")
+                    st.markdown(stale_summary)
+                else:
+                    st.warning(f"{league_type} is having trouble right now. Please try again in about {int(e.retry_after or 30)} seconds.")
             except Exception as e:
                 st.error(f"An error occurred: {str(e)}")
                 LOGGER.exception(e)
@@ -144,3 +212,4 @@ def main():
 
 if __name__ == "__main__":
     main()
+    start_import_warmup()
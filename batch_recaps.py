@@ -0,0 +1,237 @@
+"""
+Batch recap generation for many leagues at once.
+
+    python batch_recaps.py leagues.csv --out recaps/ [--workers 8] [--llm-concurrency 4] [--no-llm]
+        [--llm-mode stream|batch|batch-stub]
+
+The input CSV has the columns provider, league_id, espn_s2, swid, auth_dir,
+persona, trash_talk (credential columns may be empty where not needed).
+Fetching and stat computation run in a process pool; LLM calls run in a
+bounded async pool as soon as each league's summary is ready. With
+`--llm-mode batch` every recap prompt goes into one OpenAI Batch API job
+instead, which is polled until done (slower to arrive, cheaper, and outside
+the interactive rate limits); `batch-stub` runs the same path against a local
+stand-in for the batch endpoints. Recaps are also written to the recap cache,
+so the app serves them without another LLM call. One markdown
+recap is written per row, plus run_report.json. Completed rows are recorded
+in checkpoint.jsonl, so re-running the same command resumes where it stopped.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from utils import batch_llm, openai_client, recap_cache, resilience, summary_generator
+
+CHECKPOINT_FILE = "checkpoint.jsonl"
+REPORT_FILE = "run_report.json"
+LLM_MODES = ("stream", "batch", "batch-stub")
+
+
+def read_rows(path):
+    with open(path, newline="") as f:
+        rows = []
+        for row in csv.DictReader(f):
+            row = {k.strip(): (v or "").strip() for k, v in row.items() if k}
+            row["provider"] = row.get("provider", "").lower()
+            row["persona"] = row.get("persona") or "Dwight Schrute"
+            row["trash_talk"] = row.get("trash_talk") or "5"
+            rows.append(row)
+        return rows
+
+
+def row_key(row):
+    return f"{row['provider']}:{row['league_id']}:{row['persona']}:{row['trash_talk']}"
+
+
+def league_key(row):
+    """Rows for the same league (and credentials) share one fetch and stat pass."""
+    return (row["provider"], row["league_id"], row.get("espn_s2", ""), row.get("swid", ""), row.get("auth_dir", ""))
+
+
+def output_path(out_dir, row):
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", row["persona"]).strip("-").lower() or "recap"
+    level = re.sub(r"[^A-Za-z0-9]+", "-", row["trash_talk"]).strip("-") or "0"
+    return os.path.join(out_dir, f"{row['provider']}_{row['league_id']}_{slug}_tt{level}.md")
+
+
+def load_checkpoint(out_dir):
+    path = os.path.join(out_dir, CHECKPOINT_FILE)
+    done = set()
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    done.add(json.loads(line)["key"])
+    return done
+
+
+def _init_worker(workers):
+    # Each process gets an equal share of the provider rate limits so the pool
+    # as a whole stays within them.
+    for provider, limits in list(resilience.PROVIDER_LIMITS.items()):
+        resilience.configure(provider, rate=limits["rate"] / workers, burst=max(1, limits["burst"] // workers))
+
+
+def summarize_league(key):
+    """Worker entry point: fetches a league and computes its stat summary and headline hash."""
+    provider, league_id, espn_s2, swid, auth_dir = key
+    start = time.perf_counter()
+    summary = summary_generator.get_league_summary(provider, league_id, espn_s2=espn_s2, swid=swid, auth_dir=auth_dir)
+    return summary, recap_cache.current_headlines(provider, league_id), time.perf_counter() - start
+
+
+async def _generate_recap(async_client, semaphore, summary, row):
+    async with semaphore:
+        start = time.perf_counter()
+        parts = []
+        async for chunk in summary_generator.generate_gpt4_summary_streaming_async(async_client, summary, row["persona"], row["trash_talk"]):
+            parts.append(chunk)
+        return "".join(parts), time.perf_counter() - start
+
+
+def _llm_client(llm_mode):
+    if llm_mode == "batch-stub":
+        return batch_llm.LocalBatchClient()
+    client = openai_client.get_client() if llm_mode == "batch" else openai_client.get_async_client()
+    if client is None:
+        raise SystemExit("OPENAI_COMMISH_API_KEY is not set; use --no-llm to write stat summaries only")
+    return client
+
+
+async def run(rows, out_dir, workers, llm_concurrency, use_llm, llm_mode="stream", poll_interval=batch_llm.POLL_INTERVAL_SECONDS):
+    os.makedirs(out_dir, exist_ok=True)
+    done = load_checkpoint(out_dir)
+    pending = [row for row in rows if row_key(row) not in done]
+    client = _llm_client(llm_mode) if use_llm else None
+    batched = use_llm and llm_mode != "stream"
+
+    report = {"rows": len(rows), "skipped_from_checkpoint": len(rows) - len(pending), "succeeded": 0, "failed": 0,
+              "fetch_seconds": 0.0, "llm_seconds": 0.0, "llm_mode": llm_mode if use_llm else None,
+              "recaps_from_cache": 0, "failures": []}
+    tokens = {"prompt": 0, "completion": 0}
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(llm_concurrency)
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(workers,)) as pool, \
+            open(os.path.join(out_dir, CHECKPOINT_FILE), "a") as checkpoint:
+        summaries = {}
+        for row in pending:
+            key = league_key(row)
+            if key not in summaries:
+                summaries[key] = loop.run_in_executor(pool, summarize_league, key)
+
+        batch_requests = []
+
+        def fail(row, error):
+            report["failed"] += 1
+            report["failures"].append({"key": row_key(row), "error": str(error)})
+
+        def finish(row, summary, recap):
+            try:
+                path = output_path(out_dir, row)
+                with open(path, "w") as f:
+                    if recap:
+                        f.write(f"# Weekly Recap ({row['persona']})\n\n{recap}\n\n")
+                    f.write(f"## Stat Summary\n\n{summary}\n")
+            except Exception as e:
+                fail(row, e)
+                return
+            report["succeeded"] += 1
+            checkpoint.write(json.dumps({"key": row_key(row), "path": path}) + "\n")
+            checkpoint.flush()
+
+        async def process(row):
+            try:
+                summary, headlines, fetch_seconds = await summaries[league_key(row)]
+                report["fetch_seconds"] += fetch_seconds
+                recap = ""
+                if use_llm:
+                    cached = recap_cache.get_recap(row["provider"], row["league_id"], row["persona"], row["trash_talk"], headlines)
+                    if cached is not None:
+                        report["recaps_from_cache"] += 1
+                        recap = cached
+                    elif batched:
+                        # Written once the batch job is done
+                        batch_requests.append({"row": row, "provider": row["provider"], "league_id": row["league_id"],
+                                               "headlines": headlines or "", "persona": row["persona"],
+                                               "trash_talk": row["trash_talk"], "summary": summary})
+                        return
+                    else:
+                        recap, llm_seconds = await _generate_recap(client, semaphore, summary, row)
+                        report["llm_seconds"] += llm_seconds
+                        if recap.startswith("Error details:"):
+                            fail(row, recap)
+                            return
+                        recap_cache.store_recap(row["provider"], row["league_id"], row["persona"], row["trash_talk"],
+                                                recap, headlines, persist=True)
+                        messages = summary_generator.build_recap_messages(summary, row["persona"], row["trash_talk"])
+                        tokens["prompt"] += batch_llm.estimate_tokens("".join(m["content"] for m in messages))
+                        tokens["completion"] += batch_llm.estimate_tokens(recap)
+            except Exception as e:
+                fail(row, e)
+                return
+            finish(row, summary, recap)
+
+        await asyncio.gather(*(process(row) for row in pending))
+
+        if batch_requests:
+            llm_start = time.perf_counter()
+            results, report["batch"] = await asyncio.to_thread(
+                batch_llm.run_batch, client, batch_requests, out_dir, poll_interval
+            )
+            report["llm_seconds"] += time.perf_counter() - llm_start
+            for request in batch_requests:
+                result = results.get(batch_llm.custom_id(request), {"error": "no batch result"})
+                if "error" in result:
+                    fail(request["row"], result["error"])
+                else:
+                    finish(request["row"], request["summary"], result["recap"])
+
+    elapsed = time.perf_counter() - start
+    report["elapsed_seconds"] = round(elapsed, 2)
+    report["leagues"] = len(summaries)
+    report["recaps_per_second"] = round(report["succeeded"] / elapsed, 3) if elapsed else 0.0
+    report["workers"] = workers
+    report["llm_concurrency"] = llm_concurrency
+    if use_llm and llm_mode == "stream":
+        # Streaming calls report no usage, so these are estimates from the text lengths
+        recaps = report["succeeded"] - report["recaps_from_cache"]
+        stream_cost = batch_llm.cost(tokens["prompt"], tokens["completion"])
+        report["stream"] = {
+            "recaps": recaps,
+            "recaps_per_llm_second": round(recaps / report["llm_seconds"], 3) if report["llm_seconds"] else 0.0,
+            "estimated_prompt_tokens": tokens["prompt"],
+            "estimated_completion_tokens": tokens["completion"],
+            "estimated_cost_per_recap_usd": round(stream_cost / recaps, 6) if recaps and stream_cost is not None else None,
+        }
+    with open(os.path.join(out_dir, REPORT_FILE), "w") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate recaps for many leagues in parallel")
+    parser.add_argument("input", help="CSV of provider, league_id, espn_s2, swid, auth_dir, persona, trash_talk")
+    parser.add_argument("--out", default="recaps", help="Output directory for recaps, checkpoint and report")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="Fetch/stat worker processes")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="Concurrent LLM calls")
+    parser.add_argument("--no-llm", action="store_true", help="Only write stat summaries")
+    parser.add_argument("--llm-mode", choices=LLM_MODES, default="stream",
+                        help="stream: interactive calls; batch: one Batch API job; batch-stub: batch path against a local stub")
+    parser.add_argument("--poll-seconds", type=float, default=batch_llm.POLL_INTERVAL_SECONDS, help="Batch job polling interval")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(read_rows(args.input), args.out, args.workers, args.llm_concurrency, not args.no_llm,
+                             args.llm_mode, args.poll_seconds))
+    print(json.dumps({k: v for k, v in report.items() if k != "failures"}, indent=2))
+    if report["failed"]:
+        print(f"{report['failed']} row(s) failed; see {os.path.join(args.out, REPORT_FILE)}. Re-run to retry them.")
+
+
+if __name__ == "__main__":
+    main()
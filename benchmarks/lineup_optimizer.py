@@ -0,0 +1,113 @@
+# lineup_optimizer.py
+"""
+Times the optimal-lineup solver on synthetic large-roster leagues (superflex + IDP,
+deep benches) over a full season:
+
+    python benchmarks/lineup_optimizer.py --teams 32 --roster-size 40 --weeks 18
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+# Allow running as `python benchmarks/lineup_optimizer.py` from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import lineup_optimizer
+
+ROSTER_POSITIONS = [
+    "QB", "RB", "RB", "WR", "WR", "WR", "TE", "FLEX", "FLEX", "SUPER_FLEX", "K", "DEF",
+    "DL", "DL", "LB", "LB", "DB", "DB", "IDP_FLEX", "IDP_FLEX",
+]
+POSITION_WEIGHTS = {"QB": 3, "RB": 6, "WR": 7, "TE": 3, "K": 1, "DEF": 1, "DL": 3, "LB": 3, "DB": 3}
+
+
+def make_league(rng, teams, roster_size, weeks):
+    positions = list(POSITION_WEIGHTS)
+    weights = list(POSITION_WEIGHTS.values())
+    rosters = [
+        [(f"{team}-{slot}", rng.choices(positions, weights)[0]) for slot in range(roster_size)]
+        for team in range(teams)
+    ]
+    season = []
+    for _ in range(weeks):
+        matchups = []
+        for roster_id, roster in enumerate(rosters, start=1):
+            points = {player_id: round(max(rng.gauss(9, 7), -2), 2) for player_id, _ in roster}
+            matchups.append({
+                "roster_id": roster_id,
+                "players": [player_id for player_id, _ in roster],
+                "players_points": points,
+                "points": round(sum(list(points.values())[:len(ROSTER_POSITIONS)]), 2),
+            })
+        season.append(matchups)
+    positions_of = {player_id: [position] for roster in rosters for player_id, position in roster}
+    return season, positions_of
+
+
+def brute_force(players, slot_counts):
+    """Exhaustive optimum for small cases (slots may stay empty), used to check the solver."""
+    slots = [slot for slot, count in slot_counts.items() for _ in range(count)]
+
+    def best_from(slot_index, used):
+        if slot_index == len(slots):
+            return 0.0
+        best = best_from(slot_index + 1, used)
+        for index, (_, points, eligible) in enumerate(players):
+            if index not in used and slots[slot_index] in eligible:
+                best = max(best, points + best_from(slot_index + 1, used | {index}))
+        return best
+
+    return round(best_from(0, frozenset()), 2)
+
+
+def verify(rng, cases=300):
+    slot_counts = {"QB": 1, "RB": 1, "WR": 1, "FLEX": 1, "SUPER_FLEX": 1}
+    for _ in range(cases):
+        players = []
+        for index in range(7):
+            position = rng.choice(["QB", "RB", "WR", "TE"])
+            eligible = lineup_optimizer._sleeper_eligible([position], slot_counts)
+            players.append((index, round(rng.uniform(-2, 30), 2), eligible))
+        expected = brute_force(players, slot_counts)
+        actual = lineup_optimizer.optimal_lineup(players, slot_counts)["points"]
+        assert abs(expected - actual) < 1e-6, (players, expected, actual)
+    print(f"verified against brute force on {cases} random rosters")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Optimal-lineup solver benchmark")
+    parser.add_argument("--teams", type=int, default=32)
+    parser.add_argument("--roster-size", type=int, default=40)
+    parser.add_argument("--weeks", type=int, default=18)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    verify(rng)
+    season, positions_of = make_league(rng, args.teams, args.roster_size, args.weeks)
+    teams = {roster_id: f"Team {roster_id}" for roster_id in range(1, args.teams + 1)}
+
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        weekly_reports = [
+            lineup_optimizer.sleeper_lineup_reports(matchups, ROSTER_POSITIONS, teams, {r: r for r in teams}, positions_of.get)
+            for matchups in season
+        ]
+        lineup_optimizer.season_totals(weekly_reports)
+        timings.append(time.perf_counter() - start)
+
+    team_weeks = args.teams * args.weeks
+    best = min(timings)
+    print(
+        f"{args.teams} teams x {args.roster_size} players x {args.weeks} weeks "
+        f"({len(ROSTER_POSITIONS)} starting slots): best {best * 1000:.1f} ms per season, "
+        f"{best / team_weeks * 1e6:.1f} us per team-week"
+    )
+
+
+if __name__ == "__main__":
+    main()
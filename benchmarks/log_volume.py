@@ -0,0 +1,117 @@
+# log_volume.py
+"""
+Log volume and caller-side logging cost per recap request, with the old logging
+(summary and week-selection dict logged in full, synchronously, at debug level) and
+the current one (sampled, size-capped payloads through the queue handler):
+
+    python benchmarks/log_volume.py --requests 500 --summary-kb 6 --write-delay-us 200
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+# Allow running as `python benchmarks/log_volume.py` from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import pipeline, structured_logging
+
+
+class SlowStream:
+    """Counts what is written and sleeps per write, like a busy terminal or log shipper."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.writes = 0
+        self.bytes = 0
+
+    def write(self, text):
+        self.writes += 1
+        self.bytes += len(text)
+        if self.delay:
+            time.sleep(self.delay)
+
+    def flush(self):
+        pass
+
+
+def make_payloads(rng, summary_kb):
+    lines = []
+    while sum(len(line) for line in lines) < summary_kb * 1024:
+        lines.append(f"**Top Player:** Player {rng.randint(1, 999)} with **{rng.uniform(0, 50):.2f}** points (Team: Team {rng.randint(1, 12)}).")
+    week_selection = {"current_week": 9, "completed_week": 8, "available_weeks": list(range(1, 9)), "provider": "sleeper"}
+    return "\n".join(lines), week_selection
+
+
+def legacy_request(logger, league_id, summary, week_selection):
+    logger.info(f"Week Selection Debug: {week_selection}")
+    logger.info("Current NFL week: 9, Using completed week: 8 for data")
+    pipeline.run_sections([("noop", lambda: None)], stage="sleeper.stats")
+    logger.info("Sleeper Summary Generated for Week 8 with real data")
+    logger.debug(summary)
+    logger.info(f"Generated Sleeper Summary: \n{summary}")
+
+
+def current_request(logger, league_id, summary, week_selection):
+    with structured_logging.log_context(provider="sleeper", league_id=league_id, week=8):
+        structured_logging.log_payload(logger, "Week selection", week_selection)
+        logger.info("Current NFL week: 9, using completed week 8")
+        pipeline.run_sections([("noop", lambda: None)], stage="sleeper.stats")
+        logger.info("Sleeper Summary Generated for Week 8 with real data")
+    structured_logging.log_payload(logger, "Generated Sleeper summary", summary, provider="sleeper", league_id=league_id)
+
+
+def run(request, requests, summary, week_selection, stream, level):
+    loggers = [logging.getLogger("bench.request"), logging.getLogger(pipeline.__name__)]
+    sink = logging.StreamHandler(stream)
+    for logger in loggers:
+        if not logger.handlers:
+            logger.addHandler(sink)
+        logger.setLevel(level)
+        logger.propagate = False
+    if request is current_request:
+        structured_logging.install()
+    timings = []
+    for i in range(requests):
+        start = time.perf_counter()
+        request(loggers[0], str(1000 + i), summary, week_selection)
+        timings.append(time.perf_counter() - start)
+    drain_start = time.perf_counter()
+    structured_logging.flush()
+    return sorted(timings), time.perf_counter() - drain_start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-request logging volume and latency benchmark")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--summary-kb", type=float, default=6)
+    parser.add_argument("--write-delay-us", type=float, default=200, help="Simulated cost of one write to the log sink")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    random.seed(args.seed)  # payload sampling
+    summary, week_selection = make_payloads(rng, args.summary_kb)
+
+    # The legacy setup had the logger at debug level; the current config is info, and
+    # payloads are sampled debug records on top of that. Every run shares one sink, as
+    # the queue listener keeps the handlers it was given once installed.
+    stream = SlowStream(args.write_delay_us / 1e6)
+    for label, request, level in (("legacy (sync, debug)", legacy_request, logging.DEBUG),
+                                  ("current (queue, info)", current_request, logging.INFO),
+                                  ("current (queue, debug)", current_request, logging.DEBUG)):
+        writes, written = stream.writes, stream.bytes
+        timings, drain = run(request, args.requests, summary, week_selection, stream, level)
+        p50 = timings[len(timings) // 2]
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+        print(
+            f"{label:24s} {(stream.writes - writes) / args.requests:5.2f} records/request "
+            f"{(stream.bytes - written) / args.requests / 1024:7.2f} KB/request  "
+            f"caller p50 {p50 * 1e6:7.1f} us, p99 {p99 * 1e6:7.1f} us  (queue drained in {drain * 1000:.1f} ms)"
+        )
+
+
+if __name__ == "__main__":
+    main()
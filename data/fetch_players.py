@@ -1,13 +1,20 @@
 # fetch_players.py
-from sleeper_wrapper import Players
-import json
+import os
+import sys
+
+# Allow running as `python data/fetch_players.py` from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import provider_http
+
+PLAYERS_URL = "https://api.sleeper.app/v1/players/nfl"
 
 def save_players_data():
-    players = Players()
-    all_players = players.get_all_players()
-    
-    with open('players_data.json', 'w') as f:
-        json.dump(all_players, f)
+    # Conditional, compressed download: the multi-megabyte dump is only
+    # transferred again when Sleeper reports it changed.
+    changed = provider_http.download_to_file("sleeper", PLAYERS_URL, 'players_data.json')
+    print("players_data.json updated" if changed else "players_data.json unchanged")
+    print(provider_http.stats()["sleeper"])
 
 if __name__ == "__main__":
     save_players_data()
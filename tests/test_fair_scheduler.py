@@ -0,0 +1,64 @@
+import threading
+import time
+
+import pytest
+
+from utils import fair_scheduler
+from utils.resilience import ProviderUnavailable
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    """A private pool, so the tests don't share slots with the real ones."""
+    def make(slots=1, client_quota=1, league_quota=1):
+        monkeypatch.setitem(fair_scheduler.POOLS, "test", {"slots": slots, "client_quota": client_quota, "league_quota": league_quota})
+        monkeypatch.setitem(fair_scheduler._RUNNING, "test", {"total": 0, "clients": {}, "leagues": {}})
+        monkeypatch.setitem(fair_scheduler._VIRTUAL_TIME, "test", 0.0)
+        return "test"
+    return make
+
+
+def waiting():
+    with fair_scheduler._LOCK:
+        return len(fair_scheduler._WAITING)
+
+
+def test_client_and_league_quotas(pool):
+    name = pool(slots=4, client_quota=2, league_quota=1)
+    held = [fair_scheduler.acquire(name, "quota-client", f"league-{i}") for i in range(2)]
+    with pytest.raises(ProviderUnavailable):
+        fair_scheduler.acquire(name, "quota-client", "league-3", timeout=0.05)
+    # Another client still gets a slot, but not for a league already at its quota
+    other = fair_scheduler.acquire(name, "quota-other", "league-3")
+    with pytest.raises(ProviderUnavailable):
+        fair_scheduler.acquire(name, "quota-third", "league-0", timeout=0.05)
+    fair_scheduler.release(held[0])
+    held.append(fair_scheduler.acquire(name, "quota-third", "league-0", timeout=1))
+    for ticket in held[1:] + [other]:
+        fair_scheduler.release(ticket)
+    assert fair_scheduler.stats()["pools"]["test"]["running"] == 0
+
+
+def test_warm_requests_first_then_fair_between_clients(pool):
+    name = pool()
+    holder = fair_scheduler.acquire(name, "order-holder", "held")
+    order = []
+
+    def request(label, client, warm=False):
+        ticket = fair_scheduler.acquire(name, client, label, warm=warm, timeout=5)
+        order.append(label)
+        fair_scheduler.release(ticket)
+
+    threads = []
+    for label, client, warm in (("a1", "order-a", False), ("a2", "order-a", False), ("b1", "order-b", False), ("w", "order-w", True)):
+        before = waiting()
+        threads.append(threading.Thread(target=request, args=(label, client, warm)))
+        threads[-1].start()
+        while waiting() == before:
+            time.sleep(0.001)
+
+    fair_scheduler.release(holder)
+    for thread in threads:
+        thread.join(5)
+    # The likely cache hit jumps the queue; client a's second request waits behind client b's first
+    assert order == ["w", "a1", "b1", "a2"]
@@ -0,0 +1,32 @@
+import json
+
+from utils import league_history, week_model
+
+
+def test_backfill_seasons_folds_and_saves_every_season(tmp_path):
+    scores = {
+        2022: {1: [[("a", "Alpha", 100.0), ("b", "Beta", 90.0)]], 2: [[("a", "Alpha", 80.0), ("b", "Beta", 120.0)]]},
+        2023: {1: [[("a", "Alpha", 150.0), ("b", "Beta", 60.0)]]},
+    }
+    seen = []
+
+    def fetch_weeks(season, season_id, known):
+        seen.append((season, season_id))
+        return {week: week_model.from_pairs(pairs) for week, pairs in scores[season].items() if not known(week)}
+
+    seasons = [(2022, "league-2022"), (2023, "league-2023")]
+    folded = league_history.backfill_seasons("sleeper", "backfill-test", seasons, fetch_weeks, current_season=2023, root=str(tmp_path))
+
+    assert folded == 3
+    assert sorted(seen) == seasons
+    records = league_history.get_records("sleeper", "backfill-test", root=str(tmp_path))
+    assert records.state["seasons"] == {"2022": "league-2022", "2023": "league-2023"}
+    # The current season stays open for later weeks; past seasons are done
+    assert records.state["seasons_done"] == [2022]
+    assert records.state["high_score"]["points"] == 150.0
+    with open(league_history.records_path("sleeper", "backfill-test", str(tmp_path))) as f:
+        assert json.load(f)["seasons"] == {"2022": "league-2022", "2023": "league-2023"}
+
+    # A rerun only revisits the current season and folds nothing new
+    assert league_history.backfill_seasons("sleeper", "backfill-test", seasons, fetch_weeks, current_season=2023, root=str(tmp_path)) == 0
+    assert seen[-1] == (2023, "league-2023")
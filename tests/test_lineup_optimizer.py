@@ -0,0 +1,48 @@
+import itertools
+import random
+
+from utils import lineup_optimizer
+
+
+def brute_force(players, slot_counts):
+    # Every way of putting each player in one of their slots or on the bench
+    best = 0.0
+    for choice in itertools.product(*[[None] + [slot for slot in eligible if slot in slot_counts] for _, _, eligible in players]):
+        if all(choice.count(slot) <= count for slot, count in slot_counts.items()):
+            best = max(best, sum(points for (_, points, _), slot in zip(players, choice) if slot is not None))
+    return round(best, 2)
+
+
+def test_flex_slot_takes_the_best_remaining_player():
+    players = [("qb", 20.0, ["QB"]), ("rb1", 15.0, ["RB", "FLEX"]), ("rb2", 12.0, ["RB", "FLEX"]), ("wr", 10.0, ["WR", "FLEX"])]
+    best = lineup_optimizer.optimal_lineup(players, {"QB": 1, "RB": 1, "WR": 1, "FLEX": 1})
+    assert best["points"] == 57.0
+    assert sorted(player_id for _, player_id, _ in best["lineup"]) == ["qb", "rb1", "rb2", "wr"]
+
+
+def test_augmenting_path_moves_a_placed_player():
+    # Taken best-first, the RB fills SUPER_FLEX and has to move to RB to make room for the QB
+    players = [("rb", 30.0, ["SUPER_FLEX", "RB"]), ("qb", 25.0, ["SUPER_FLEX"])]
+    assert lineup_optimizer.optimal_lineup(players, {"SUPER_FLEX": 1, "RB": 1})["points"] == 55.0
+
+
+def test_optimal_lineup_matches_brute_force():
+    rng = random.Random(7)
+    slot_names = ["QB", "RB", "WR", "FLEX", "SUPER_FLEX"]
+    for _ in range(200):
+        slot_counts = {slot: rng.randint(0, 2) for slot in slot_names}
+        players = [
+            (f"p{i}", round(rng.uniform(-2, 30), 1), rng.sample(slot_names, rng.randint(1, 3)))
+            for i in range(rng.randint(0, 6))
+        ]
+        assert lineup_optimizer.optimal_lineup(players, slot_counts)["points"] == brute_force(players, slot_counts)
+
+
+def test_lineup_report_and_season_totals():
+    players = [("a", 20.0, ["QB"]), ("b", 18.0, ["QB"])]
+    report = lineup_optimizer.lineup_report("Alpha", players, {"QB": 1}, actual_points=18.0)
+    assert (report["optimal"], report["left_on_bench"]) == (20.0, 2.0)
+    other = lineup_optimizer.lineup_report("Beta", players, {"QB": 1}, actual_points=20.0)
+    assert lineup_optimizer.most_points_left([other, report]) == [report]
+    totals = lineup_optimizer.season_totals([[report, other], [report]])
+    assert totals["Alpha"] == {"actual": 36.0, "optimal": 40.0, "left_on_bench": 4.0}
@@ -0,0 +1,43 @@
+from utils import recap_cache
+
+
+def test_reusable_sections_only_after_a_correction():
+    recap_cache.store_sections("espn", "reuse-test", 3, {"weekly": "w", "most_active": "m", "season_top_scorer": "s"})
+    # A plain cache expiry recomputes everything
+    assert recap_cache.reusable_sections("espn", "reuse-test", 3) == {}
+    recap_cache.mark_stale("espn", "reuse-test", 3, ("weekly", "season_top_scorer"))
+    assert recap_cache.reusable_sections("espn", "reuse-test", 3) == {"most_active": "m"}
+    # A rebuild clears the stale marks
+    recap_cache.store_sections("espn", "reuse-test", 3, {"weekly": "w2"})
+    assert recap_cache.reusable_sections("espn", "reuse-test", 3) == {}
+    assert recap_cache.reusable_sections("espn", "reuse-test", 4) == {}
+
+
+def test_recaps_are_reused_while_the_headlines_are_unchanged(tmp_path):
+    root = str(tmp_path)
+    results = {"top_team": ("Alpha", 140.0), "top_player": ("Player", 40.0), "blowout": None, "closest": None}
+    recap_cache.store_sections("sleeper", "headline-test", 9, results)
+    first = recap_cache.store_headlines("sleeper", "headline-test", 9, results)
+    assert recap_cache.current_headlines("sleeper", "headline-test") == first
+    assert recap_cache.get_recap("sleeper", "headline-test", "Dwight", 5, root=root) is None
+    assert recap_cache.store_recap("sleeper", "headline-test", "Dwight", 5, "recap text", root=root)
+    assert recap_cache.get_recap("sleeper", "headline-test", "Dwight", 5, root=root) == "recap text"
+    assert recap_cache.get_recap("sleeper", "headline-test", "Michael", 5, root=root) is None
+
+    # A correction that leaves the headline facts alone keeps the recap
+    recap_cache.store_sections("sleeper", "headline-test", 9, dict(results, weekly="changed"))
+    assert recap_cache.store_headlines("sleeper", "headline-test", 9, dict(results, weekly="changed")) == first
+    assert recap_cache.get_recap("sleeper", "headline-test", "Dwight", 5, root=root) == "recap text"
+
+    # A changed headline fact needs a new recap
+    changed = dict(results, top_team=("Beta", 141.0))
+    recap_cache.store_sections("sleeper", "headline-test", 9, changed)
+    assert recap_cache.store_headlines("sleeper", "headline-test", 9, changed) != first
+    assert recap_cache.get_recap("sleeper", "headline-test", "Dwight", 5, root=root) is None
+
+
+def test_persisted_recaps_are_read_back_from_disk(tmp_path):
+    root = str(tmp_path)
+    assert recap_cache.store_recap("yahoo", "disk-test", "Dwight", 5, "from batch", headlines="abc", persist=True, root=root)
+    recap_cache._RECAPS.clear()
+    assert recap_cache.get_recap("yahoo", "disk-test", "Dwight", 5, headlines="abc", root=root) == "from batch"
@@ -0,0 +1,107 @@
+import pytest
+import requests
+
+from utils import resilience
+from utils.resilience import CircuitBreaker, ProviderUnavailable
+
+
+def test_breaker_opens_then_half_opens_for_one_trial(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: clock[0])
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, trial_timeout=60)
+
+    assert breaker.record_failure() is False
+    assert breaker.record_failure() is True
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow() == (False, 30)
+
+    clock[0] += 30
+    assert breaker.allow() == (True, 0.0)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # Only the one trial is let through
+    assert breaker.allow()[0] is False
+
+    # A failed trial re-opens the circuit right away
+    assert breaker.record_failure() is True
+    assert breaker.state == CircuitBreaker.OPEN
+    clock[0] += 30
+    assert breaker.allow()[0] is True
+    breaker.record_success()
+    assert (breaker.state, breaker.failures) == (CircuitBreaker.CLOSED, 0)
+
+
+def test_hung_trial_is_replaced(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: clock[0])
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, trial_timeout=60)
+    breaker.record_failure()
+    clock[0] += 30
+    assert breaker.allow()[0] is True
+    clock[0] += 59
+    assert breaker.allow()[0] is False
+    clock[0] += 1
+    assert breaker.allow()[0] is True
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    """A provider with its own breaker and bucket, so tests don't trip the real ones."""
+    monkeypatch.setitem(resilience.PROVIDER_LIMITS, "test", {"host": "test.invalid", "rate": 1000.0, "burst": 10})
+    monkeypatch.setitem(resilience._BREAKERS, "test", CircuitBreaker(failure_threshold=2))
+    monkeypatch.setitem(resilience._BUCKETS, "test.invalid", resilience.TokenBucket(1000.0, 10))
+    monkeypatch.setattr(resilience, "backoff_delay", lambda attempt: 0.0)
+    return "test"
+
+
+def test_call_retries_transient_errors_and_opens_the_circuit(provider):
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        raise requests.exceptions.ConnectionError("reset")
+
+    with pytest.raises(ProviderUnavailable):
+        resilience.call(provider, flaky)
+    # Two failures open the circuit; the third attempt is short-circuited
+    assert len(calls) == 2
+    assert resilience._BREAKERS[provider].state == CircuitBreaker.OPEN
+
+
+def test_bad_requests_are_not_retried_and_keep_the_circuit_closed(provider):
+    calls = []
+
+    def rejected():
+        calls.append(1)
+        raise PermissionError("bad credentials")
+
+    with pytest.raises(PermissionError):
+        resilience.call(provider, rejected)
+    assert len(calls) == 1
+    assert resilience._BREAKERS[provider].state == CircuitBreaker.CLOSED
+
+
+def test_trial_without_a_token_reopens_the_circuit(provider, monkeypatch):
+    breaker = resilience._BREAKERS[provider]
+    breaker.state, breaker.opened_at = CircuitBreaker.OPEN, 0.0
+    tokens = [False]
+    monkeypatch.setattr(resilience._BUCKETS["test.invalid"], "acquire", lambda timeout=None: tokens.pop() if tokens else True)
+    with pytest.raises(ProviderUnavailable, match="budget exhausted"):
+        resilience.call(provider, lambda: "ok")
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # The next call is the trial, and its success closes the circuit
+    assert resilience.call(provider, lambda: "ok") == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_interrupted_trial_reopens_the_circuit(provider):
+    breaker = resilience._BREAKERS[provider]
+    breaker.state, breaker.opened_at = CircuitBreaker.OPEN, 0.0
+
+    def interrupted():
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        resilience.call(provider, interrupted)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert resilience.call(provider, lambda: "ok") == "ok"
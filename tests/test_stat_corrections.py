@@ -0,0 +1,52 @@
+from utils import recap_cache, stat_corrections
+
+
+def week(home_points, away_points=90.0):
+    return [[("a", "Alpha", home_points), ("b", "Beta", away_points)], [("c", "Gamma", 70.0), ("d", "Delta", 60.0)]]
+
+
+def test_changed_matchups_compares_hashes_per_matchup():
+    old = stat_corrections.matchup_hashes(week(100.0))
+    assert stat_corrections.changed_matchups(old, stat_corrections.matchup_hashes(week(100.0))) == []
+    assert stat_corrections.changed_matchups(old, stat_corrections.matchup_hashes(week(101.5))) == ["a|b"]
+    # Renaming a team is not a correction
+    renamed = [[("a", "Alpha FC", 100.0), ("b", "Beta", 90.0)], [("c", "Gamma", 70.0), ("d", "Delta", 60.0)]]
+    assert stat_corrections.changed_matchups(old, stat_corrections.matchup_hashes(renamed)) == []
+
+
+def test_check_bumps_the_revision_and_marks_sections_stale(monkeypatch):
+    corrected = []
+    monkeypatch.setattr(stat_corrections, "apply_correction", lambda *args: corrected.append(args[3]))
+    scores = {7: week(100.0), 6: week(80.0)}
+    recap_cache.store_sections("sleeper", "corrections-test", 7, {"weekly": "w", "most_active": "m", "power_rankings": "p"})
+
+    assert stat_corrections.check("sleeper", "corrections-test", 2025, 7, scores.get) == 0
+    assert stat_corrections.check("sleeper", "corrections-test", 2025, 7, scores.get, force=True) == 0
+    assert corrected == []
+
+    scores[7] = week(104.0)
+    assert stat_corrections.check("sleeper", "corrections-test", 2025, 7, scores.get, force=True) == 1
+    assert corrected == [7]
+    # Only sections a correction can't reach are reused
+    assert recap_cache.reusable_sections("sleeper", "corrections-test", 7) == {"most_active": "m"}
+
+    # A correction to the week before still moves the recap week's revision
+    scores[6] = week(85.0)
+    assert stat_corrections.check("sleeper", "corrections-test", 2025, 7, scores.get, force=True) == 2
+    assert corrected == [7, 6]
+
+
+def test_failed_fetch_does_not_stamp_the_check():
+    calls = []
+
+    def failing(checked_week):
+        calls.append(checked_week)
+        raise ConnectionError("provider down")
+
+    assert stat_corrections.check("sleeper", "failed-check-test", 2025, 5, failing) == 0
+    assert calls == [5, 4]
+    # Not within CHECK_INTERVAL_SECONDS of a real check, so the next request fetches again
+    assert stat_corrections.check("sleeper", "failed-check-test", 2025, 5, lambda checked_week: week(100.0)) == 0
+    calls.clear()
+    assert stat_corrections.check("sleeper", "failed-check-test", 2025, 5, failing) == 0
+    assert calls == []
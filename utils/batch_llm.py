@@ -0,0 +1,247 @@
+import io
+import json
+import os
+import time
+from types import SimpleNamespace
+from streamlit.logger import get_logger
+from utils import metrics, recap_cache, summary_generator
+
+LOGGER = get_logger(__name__)
+
+# Offline recap generation through the OpenAI Batch API: every recap prompt of a run
+# goes into one JSONL job file, the job is submitted once and polled until it is done,
+# and the results land in the recap cache (on disk, so the app picks them up). Batch
+# requests don't count against the interactive rate limits and are billed at a
+# discount, in exchange for results arriving within the completion window instead
+# of streaming back at once.
+BATCH_ENDPOINT = "/v1/chat/completions"
+COMPLETION_WINDOW = "24h"
+POLL_INTERVAL_SECONDS = float(os.environ.get("COMMISH_BATCH_POLL_SECONDS", 30))
+MAX_WAIT_SECONDS = 24 * 3600
+JOB_FILE = "batch_job.jsonl"
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+# USD per million tokens for interactive calls; batch calls cost BATCH_DISCOUNT of that
+PRICES = {"gpt-4o-mini": {"input": 0.15, "output": 0.60}}
+BATCH_DISCOUNT = 0.5
+
+
+def cost(prompt_tokens, completion_tokens, model=summary_generator.RECAP_MODEL, batch=False):
+    """USD cost of a number of tokens, or None for a model without a known price."""
+    price = PRICES.get(model)
+    if price is None:
+        return None
+    usd = (prompt_tokens * price["input"] + completion_tokens * price["output"]) / 1e6
+    return usd * BATCH_DISCOUNT if batch else usd
+
+
+def _usd(value):
+    return None if value is None else round(value, 6)
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token) where the API reports no usage."""
+    return max(1, len(text or "") // 4)
+
+
+def job_line(request_id, summary, persona, trash_talk):
+    """One JSONL request line: the same prompt the interactive recap call sends."""
+    return {
+        "custom_id": request_id,
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": {
+            "model": summary_generator.RECAP_MODEL,
+            "messages": summary_generator.build_recap_messages(summary, persona, trash_talk),
+            "max_tokens": summary_generator.RECAP_MAX_TOKENS,
+        },
+    }
+
+
+def custom_id(request):
+    """Job line id of a recap request; requests for the same recap share one."""
+    return "recap-" + recap_cache.content_hash(
+        [request["provider"], str(request["league_id"]), request["headlines"], request["persona"], request["trash_talk"]]
+    )
+
+
+def write_job(requests, path):
+    """
+    Writes a job file.
+
+    Args:
+    - requests (list): dicts with "provider", "league_id", "headlines", "persona", "trash_talk" and "summary".
+
+    Returns:
+    - dict: {custom_id: request}.
+    """
+    by_id = {}
+    with open(path, "w") as f:
+        for request in requests:
+            request_id = custom_id(request)
+            if request_id in by_id:
+                continue
+            by_id[request_id] = request
+            f.write(json.dumps(job_line(request_id, request["summary"], request["persona"], request["trash_talk"])) + "\n")
+    return by_id
+
+
+def submit(client, path, metadata=None):
+    """Uploads a job file and starts a batch. Returns the batch object."""
+    with open(path, "rb") as f:
+        uploaded = client.files.create(file=f, purpose="batch")
+    return client.batches.create(
+        input_file_id=uploaded.id, endpoint=BATCH_ENDPOINT, completion_window=COMPLETION_WINDOW, metadata=metadata or {}
+    )
+
+
+def wait(client, batch_id, poll_interval=POLL_INTERVAL_SECONDS, max_wait=MAX_WAIT_SECONDS):
+    """
+    Polls a batch until it reaches a terminal status.
+
+    Raises:
+    - TimeoutError: If it is still running after `max_wait` seconds.
+    """
+    deadline = time.monotonic() + max_wait
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        if batch.status in TERMINAL_STATUSES:
+            return batch
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"Batch {batch_id} still {batch.status} after {max_wait:.0f}s")
+        LOGGER.info(f"Batch {batch_id} is {batch.status}; checking again in {poll_interval:.0f}s")
+        time.sleep(poll_interval)
+
+
+def read_results(client, batch):
+    """
+    Parses a finished batch's output (and error) files.
+
+    Returns:
+    - dict: {custom_id: {"recap", "prompt_tokens", "completion_tokens"} or {"error"}}.
+    """
+    results = {}
+    for file_id in (getattr(batch, "output_file_id", None), getattr(batch, "error_file_id", None)):
+        if not file_id:
+            continue
+        for line in client.files.content(file_id).text.splitlines():
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            response = entry.get("response") or {}
+            body = response.get("body") or {}
+            if entry.get("error") or response.get("status_code") != 200:
+                results[entry["custom_id"]] = {"error": str(entry.get("error") or body.get("error") or response.get("status_code"))}
+                continue
+            usage = body.get("usage") or {}
+            results[entry["custom_id"]] = {
+                "recap": body["choices"][0]["message"]["content"],
+                "prompt_tokens": usage.get("prompt_tokens", 0),
+                "completion_tokens": usage.get("completion_tokens", 0),
+            }
+    return results
+
+
+def run_batch(client, requests, work_dir, poll_interval=POLL_INTERVAL_SECONDS, max_wait=MAX_WAIT_SECONDS):
+    """
+    Generates recaps for many leagues and personas as one batch job and stores every
+    successful one in the recap cache (persisted, so other processes reuse it).
+
+    Returns:
+    - Tuple(dict, dict): {custom_id: result} as from read_results (requests without a
+      result get an "error"), and a report with throughput, tokens and cost per recap
+      next to what the same tokens cost through the interactive path.
+    """
+    start = time.perf_counter()
+    os.makedirs(work_dir, exist_ok=True)
+    path = os.path.join(work_dir, JOB_FILE)
+    by_id = write_job(requests, path)
+    batch = submit(client, path, metadata={"source": "commish.batch_recaps"})
+    LOGGER.info(f"Submitted batch {batch.id} with {len(by_id)} recap request(s)")
+    batch = wait(client, batch.id, poll_interval, max_wait)
+    results = read_results(client, batch) if batch.status == "completed" else {}
+
+    succeeded, prompt_tokens, completion_tokens = 0, 0, 0
+    for request_id, request in by_id.items():
+        result = results.setdefault(request_id, {"error": f"batch {batch.status}"})
+        if "error" in result:
+            continue
+        succeeded += 1
+        prompt_tokens += result["prompt_tokens"]
+        completion_tokens += result["completion_tokens"]
+        recap_cache.store_recap(
+            request["provider"], request["league_id"], request["persona"], request["trash_talk"],
+            result["recap"], request["headlines"], persist=True,
+        )
+    elapsed = time.perf_counter() - start
+    metrics.increment("batch_llm.recaps", succeeded)
+    metrics.increment("batch_llm.failures", len(by_id) - succeeded)
+
+    batch_cost = cost(prompt_tokens, completion_tokens, batch=True)
+    interactive_cost = cost(prompt_tokens, completion_tokens)
+    report = {
+        "batch_id": batch.id,
+        "status": batch.status,
+        "requests": len(by_id),
+        "succeeded": succeeded,
+        "seconds": round(elapsed, 2),
+        "recaps_per_second": round(succeeded / elapsed, 3) if elapsed else 0.0,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "cost_usd": _usd(batch_cost),
+        "cost_per_recap_usd": _usd(batch_cost / succeeded) if succeeded and batch_cost is not None else None,
+        "interactive_cost_per_recap_usd": _usd(interactive_cost / succeeded) if succeeded and interactive_cost is not None else None,
+    }
+    LOGGER.info(f"Batch {batch.id} {batch.status}: {succeeded}/{len(by_id)} recap(s) in {elapsed:.1f}s")
+    return results, report
+
+
+class LocalBatchClient:
+    """
+    In-memory stand-in for the files and batches endpoints, for trying the batch path
+    without an API key. Each job advances one status per poll and then "completes",
+    answering every request with `complete(body)` (a canned recap by default).
+    """
+
+    STATUSES = ("validating", "in_progress", "finalizing", "completed")
+
+    def __init__(self, complete=None):
+        self._files = {}
+        self._batches = {}
+        self._complete = complete or self._canned
+        self.files = SimpleNamespace(create=self._create_file, content=self._file_content)
+        self.batches = SimpleNamespace(create=self._create_batch, retrieve=self._retrieve_batch)
+
+    @staticmethod
+    def _canned(body):
+        prompt = body["messages"][-1]["content"]
+        return f"(Local batch stub) Recap written from a {len(prompt)}-character prompt."
+
+    def _create_file(self, file, purpose):
+        file_id = f"file-{len(self._files) + 1}"
+        self._files[file_id] = file.read().decode("utf-8") if hasattr(file, "read") else file
+        return SimpleNamespace(id=file_id, purpose=purpose)
+
+    def _file_content(self, file_id):
+        return SimpleNamespace(text=self._files[file_id], content=self._files[file_id].encode("utf-8"))
+
+    def _create_batch(self, input_file_id, endpoint, completion_window, metadata=None):
+        batch_id = f"batch-{len(self._batches) + 1}"
+        self._batches[batch_id] = {"input": input_file_id, "step": 0}
+        return SimpleNamespace(id=batch_id, status=self.STATUSES[0], output_file_id=None, error_file_id=None)
+
+    def _retrieve_batch(self, batch_id):
+        state = self._batches[batch_id]
+        state["step"] = min(state["step"] + 1, len(self.STATUSES) - 1)
+        status = self.STATUSES[state["step"]]
+        if status == "completed" and "output" not in state:
+            out = io.StringIO()
+            for line in self._files[state["input"]].splitlines():
+                request = json.loads(line)
+                recap = self._complete(request["body"])
+                prompt = "".join(message["content"] for message in request["body"]["messages"])
+                out.write(json.dumps({"custom_id": request["custom_id"], "response": {"status_code": 200, "body": {
+                    "choices": [{"message": {"role": "assistant", "content": recap}}],
+                    "usage": {"prompt_tokens": estimate_tokens(prompt), "completion_tokens": estimate_tokens(recap)},
+                }}}) + "\n")
+            state["output"] = self._create_file(io.BytesIO(out.getvalue().encode("utf-8")), "batch_output").id
+        return SimpleNamespace(id=batch_id, status=status, output_file_id=state.get("output"), error_file_id=None)
@@ -1,7 +1,23 @@
 import re
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from streamlit.logger import get_logger
+from utils import metrics, resilience
+from utils.leaderboard import TopK
 #import datetime
 
+LOGGER = get_logger(__name__)
+
+# espn_api lists free agents one position (and one page) per request
+FREE_AGENT_POSITIONS = ("QB", "RB", "WR", "TE", "D/ST", "K")
+FREE_AGENT_PAGE_SIZE = 50
+MAX_CACHED_FREE_AGENT_WEEKS = 256
+
+_FREE_AGENT_LOCK = threading.Lock()
+_FREE_AGENTS = OrderedDict()  # (league_id, year, week) -> [(name, position, points)]
+
 def clean_team_name(name):
     # This regex pattern will match any character outside the regular ASCII range
     cleaned_name = re.sub(r'[^\x00-\x7F]+', '', name)
@@ -9,19 +25,6 @@ def clean_team_name(name):
 
 # Step 1: Basic Data Extraction
 
-def extract_teams_standings(league):
-    """
-    Extract all teams and their standings.
-    
-    Args:
-    - league (League): The league object.
-    
-    Returns:
-    - List[Team]: List of teams in order of their standings.
-    """
-    return league.standings()
-
-
 def extract_players_weekly_scores(league, week):
     """
     Extract all players and their weekly scores for a given week.
@@ -33,7 +36,7 @@ def extract_players_weekly_scores(league, week):
     Returns:
     - List[BoxScore]: List of box scores containing player scores for the given week.
     """
-    return league.box_scores(week)
+    return resilience.call("espn", league.box_scores, week)
 
 
 def extract_recent_activities(league, size=25, msg_type=None):
@@ -48,92 +51,29 @@ def extract_recent_activities(league, size=25, msg_type=None):
     Returns:
     - List[Activity]: List of recent league activities.
     """
-    return league.recent_activity(size=size, msg_type=msg_type)
+    return resilience.call("espn", league.recent_activity, size=size, msg_type=msg_type)
 
 
-def extract_match_results(league, week):
-    """
-    Extract match results for a given week.
-    
-    Args:
-    - league (League): The league object.
-    - week (int): The week number.
-    
-    Returns:
-    - List[Matchup]: List of matchups for the given week.
-    """
-    return league.scoreboard(week)
-
 # Step 2: Top/Bottom Stats
 
-def top_three_teams(league):
+def season_leaderboards(league, k=3):
     """
-    Determines the top 3 teams based on standings.
+    Top and bottom season scorers among all rostered players, in one pass using the total_points attribute.
     
     Args:
     - league (League): The league object.
+    - k (int): Entries kept per leaderboard.
     
     Returns:
-    - List[Team]: List of top 3 teams.
+    - dict: "top_players" and "worst_players" lists of Player objects, best first.
     """
-    standings = extract_teams_standings(league)
-    # Return the top 3 teams from the standings
-    return standings[:3]
-
-
-def top_scorer_of_week(league, week):
-    """
-    Determines the top scoring player of a given week.
-    
-    Args:
-    - league (League): The league object.
-    - week (int): The week number.
-    
-    Returns:
-    - Tuple(Player, float): Top scoring player and their score.
-    """
-    box_scores = extract_players_weekly_scores(league, week)
-    
-    max_score = float('-inf')
-    top_player = None
-    
-    for box_score in box_scores:
-        # Checking players from both home and away teams
-        for player in box_score.home_lineup + box_score.away_lineup:
-            if player.points > max_score:
-                max_score = player.points
-                top_player = player
-                
-    return top_player, max_score
-
-def worst_scorer_of_week(league, week):
-    """
-    Determines the worst scoring player of a given week.
-    
-    Args:
-    - league (League): The league object.
-    - week (int): The week number.
-    
-    Returns:
-    - Tuple(Player, float): Worst scoring player and their score.
-    """
-    box_scores = extract_players_weekly_scores(league, week)
-    
-    min_score = float('inf')
-    worst_player = None
-    
-    for box_score in box_scores:
-        # Checking players from both home and away teams
-        for player in box_score.home_lineup + box_score.away_lineup:
-            # Ignore players in the IR slot
-            if player.slot_position == 'IR':
-                continue
-            if player.points < min_score:
-                min_score = player.points
-                worst_player = player
-                
-    return worst_player, min_score
-
+    top = TopK(k, key=lambda player: player.total_points)
+    worst = TopK(k, key=lambda player: player.total_points, largest=False)
+    for team in league.teams:
+        for player in team.roster:
+            top.push(player)
+            worst.push(player)
+    return {"top_players": top.results(), "worst_players": worst.results()}
 
 
 def top_scorer_of_season(league):
@@ -146,44 +86,78 @@ def top_scorer_of_season(league):
     Returns:
     - Tuple(Player, float): Top scoring player and their score for the season.
     """
-    
-    max_score = float('-inf')
-    top_player = None
-    
-    # Iterating over all teams in the league
-    for team in league.teams:
-        # Iterating over each player in the team's roster
-        for player in team.roster:
-            if player.total_points > max_score:
-                max_score = player.total_points
-                top_player = player
-                
-    return top_player, max_score
+    top = season_leaderboards(league, k=1)["top_players"]
+    return (top[0], top[0].total_points) if top else (None, float('-inf'))
+
+def _week_points(player, week):
+    stats = (getattr(player, "stats", None) or {}).get(week) or {}
+    return stats.get("points") or 0
 
 
-def worst_scorer_of_season(league):
+def scan_free_agents(league, week, positions=FREE_AGENT_POSITIONS, size=FREE_AGENT_PAGE_SIZE):
     """
-    Determines the worst scoring player of the season using the total_points attribute.
+    Unrostered players and their points for a week. Positions are fetched concurrently
+    (one request each, all under the ESPN rate limit) and complete scans are cached per
+    league week, so the scan costs about one round-trip once and nothing after that.
     
     Args:
     - league (League): The league object.
+    - week (int): The week number.
+    - positions (tuple): Positions to scan.
+    - size (int): Free agents fetched per position.
     
     Returns:
-    - Tuple(Player, float): Worst scoring player and their score for the season.
-    """
+    - List[Tuple(str, str, float)]: (player name, position, points) per free agent.
+    """
+    key = (str(league.league_id), league.year, week)
+    with _FREE_AGENT_LOCK:
+        if key in _FREE_AGENTS:
+            _FREE_AGENTS.move_to_end(key)
+            metrics.increment("espn.free_agent_cache_hits")
+            return _FREE_AGENTS[key]
+
+    def fetch(position):
+        try:
+            return resilience.call("espn", league.free_agents, week=week, size=size, position=position)
+        except Exception as e:
+            LOGGER.warning(f"Free agent scan for {position} failed (league {league.league_id}, week {week}): {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=len(positions), thread_name_prefix="espn-free-agents") as executor:
+        pages = list(executor.map(fetch, positions))
+
+    seen = set()
+    free_agents = []
+    for position, page in zip(positions, pages):
+        for player in page or []:
+            if player.playerId not in seen:
+                seen.add(player.playerId)
+                free_agents.append((player.name, position, _week_points(player, week)))
+    # Partial scans aren't cached, so a failed position is retried on the next recap
+    if all(page is not None for page in pages):
+        with _FREE_AGENT_LOCK:
+            _FREE_AGENTS[key] = free_agents
+            while len(_FREE_AGENTS) > MAX_CACHED_FREE_AGENT_WEEKS:
+                _FREE_AGENTS.popitem(last=False)
+    return free_agents
+
+
+def forget_free_agents(league_id, year, week):
+    """Drops a cached free agent scan (e.g. after a stat correction)."""
+    with _FREE_AGENT_LOCK:
+        _FREE_AGENTS.pop((str(league_id), int(year), int(week)), None)
+
+
+def waiver_wire_gems(league, week, k=3):
+    """
+    Best-scoring players nobody rosters for a week, best first.
     
-    min_score = float('inf')
-    worst_player = None
-    
-    # Iterating over all teams in the league
-    for team in league.teams:
-        # Iterating over each player in the team's roster
-        for player in team.roster:
-            if player.total_points < min_score:
-                min_score = player.total_points
-                worst_player = player
-                
-    return worst_player, min_score
+    Returns:
+    - List[Tuple(str, str, float)]: (player name, position, points).
+    """
+    return TopK(k, key=lambda free_agent: free_agent[2], where=lambda free_agent: free_agent[2] > 0).extend(
+        scan_free_agents(league, week)
+    ).results()
 
 # Step 3: Team-Specific Stats
 
@@ -240,139 +214,3 @@ def team_with_most_injured_players(league):
     team_with_most_injured = max(injured_counts, key=injured_counts.get)
     
     return team_with_most_injured, injured_counts[team_with_most_injured], [player.name for player in team_with_most_injured.roster if player.injured]
-
-# Step 4: Player Bench/Starting Stats.
-
-def highest_scoring_benched_player(league, current_week):
-    """
-    Identify the benched player who scored the most points for a given week and the team that rosters them.
-    
-    Args:
-    - league (League): The league object.
-    - current_week (int): The week number.
-    
-    Returns:
-    - Tuple: Player object representing the highest scoring benched player and the Team object representing the team that rosters them.
-    """
-    box_scores = league.box_scores(current_week)
-    benched_highest_player = None
-    benched_highest_points = float('-inf')
-
-    for box_score in box_scores:
-        for player in box_score.home_lineup + box_score.away_lineup:
-            if player.slot_position == 'BE' and player.points > benched_highest_points:
-                benched_highest_points = player.points
-                benched_highest_player = (player, box_score.home_team if player in box_score.home_lineup else box_score.away_team)
-
-    return benched_highest_player
-
-def lowest_scoring_starting_player(league, current_week):
-    """
-    Identify the starting player who scored the least points for a given week and the team that rosters them.
-    
-    Args:
-    - league (League): The league object.
-    - current_week (int): The week number.
-    
-    Returns:
-    - Tuple: Player object representing the lowest scoring starting player and the Team object representing the team that rosters them.
-    """
-    box_scores = league.box_scores(current_week)
-    current_week_lowest_player = None
-    current_week_lowest_points = float('inf')
-
-    for box_score in box_scores:
-        for player in box_score.home_lineup + box_score.away_lineup:
-            if player.slot_position != 'BE' and player.points < current_week_lowest_points:
-                current_week_lowest_points = player.points
-                current_week_lowest_player = (player, box_score.home_team if player in box_score.home_lineup else box_score.away_team)
-
-    return current_week_lowest_player
-
-# Step 5: Match Stats
-
-def biggest_blowout_match(league, week):
-    """
-    Identifies the biggest blowout match of the current week.
-    
-    Args:
-    - league (League): The league object.
-    - week (int): The week number.
-    
-    Returns:
-    - BoxScore: Box score of the match with the largest score difference.
-    """
-    box_scores = league.box_scores(week)
-    max_diff = float('-inf')
-    blowout_match = None
-
-    for match in box_scores:
-        diff = abs(match.home_score - match.away_score)
-        if diff > max_diff:
-            max_diff = diff
-            blowout_match = match
-
-    if blowout_match:
-        return blowout_match
-        # return f"Box Score({blowout_match.home_team.team_name} ({blowout_match.home_score}) at {blowout_match.away_team.team_name} ({blowout_match.away_score}))"
-    return None
-
-
-def closest_game_match(league, week):
-    """
-    Identifies the closest game of the current week.
-    
-    Args:
-    - league (League): The league object.
-    - week (int): The week number.
-    
-    Returns:
-    - BoxScore: Box score of the match with the smallest score difference.
-    """
-    box_scores = league.box_scores(week)
-    min_diff = float('inf')
-    closest_match = None
-
-    for match in box_scores:
-        diff = abs(match.home_score - match.away_score)
-        if diff < min_diff:
-            min_diff = diff
-            closest_match = match
-
-    if closest_match:
-        # return f"Box Score({closest_match.home_team.team_name} ({closest_match.home_score}) at {closest_match.away_team.team_name} ({closest_match.away_score}))"
-        return closest_match
-    return None
-
-
-def highest_scoring_team(league: int, week: int) -> str:
-    """
-    Returns a formatted string with the top scoring team's name and their score for a given league.
-    
-    Parameters:
-    - league: An instance of the League class and week number
-    
-    Returns:
-    - str: Formatted string "Team Name (Score)"
-    """
-    # Get the matchups for the specified week
-    matchups = league.scoreboard(week)
-    
-    # Determine the team with the highest score for the week
-    max_score = 0
-    top_team = None
-    for matchup in matchups:
-        if matchup.home_score > max_score:
-            max_score = matchup.home_score
-            top_team = matchup.home_team
-        if matchup.away_score > max_score:
-            max_score = matchup.away_score
-            top_team = matchup.away_team
-    
-    # Return the team name and score in the desired format
-    return f"{top_team.team_name} ({max_score})"
-
-
-
-
-
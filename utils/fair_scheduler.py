@@ -0,0 +1,221 @@
+import asyncio
+import contextlib
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from streamlit.logger import get_logger
+from utils import metrics
+from utils.resilience import ProviderUnavailable
+
+LOGGER = get_logger(__name__)
+
+# Fair sharing of the work everyone's requests compete for: summary builds (provider
+# rate limits) and LLM calls. Each pool has a fixed number of slots, and every client
+# and every league may only hold a few of them at once. Waiting requests are served by
+# weighted fair queuing between clients (a client's virtual finish time grows with the
+# work it has been given, divided by its weight), and requests that are likely cache
+# hits go ahead of cold fetches, which they barely delay. One commissioner submitting
+# league after league then only queues behind their own requests.
+POOLS = {
+    "summary": {"slots": int(os.environ.get("COMMISH_SUMMARY_SLOTS", 16)), "client_quota": 2, "league_quota": 2},
+    "llm": {"slots": int(os.environ.get("COMMISH_LLM_SLOTS", 8)), "client_quota": 4, "league_quota": 4},
+}
+QUEUE_TIMEOUT_SECONDS = float(os.environ.get("COMMISH_QUEUE_TIMEOUT_SECONDS", 30))
+COLD_COST = 1.0
+WARM_COST = 0.1
+# How long a built summary is assumed to still be cached (the shortest summary cache TTL)
+WARM_SECONDS = 3600
+MAX_TRACKED_TENANTS = 1024
+_SAMPLES = 256
+
+_LOCK = threading.Lock()
+_CHANGED = threading.Condition(_LOCK)
+_SEQUENCE = itertools.count()
+_WAITING = []  # Tickets not yet granted, in arrival order
+_RUNNING = {pool: {"total": 0, "clients": {}, "leagues": {}} for pool in POOLS}
+_VIRTUAL_TIME = {pool: 0.0 for pool in POOLS}
+_FINISH = OrderedDict()  # (pool, client) -> virtual finish time of the client's last request
+_WEIGHTS = {}  # client -> weight (default 1)
+_WARM = OrderedDict()  # (provider, league_id) -> monotonic time the summary was last built
+_QUEUE_TIMES = OrderedDict()  # client -> {"count", "total", "max", "samples"}
+
+
+class _Ticket:
+    def __init__(self, pool, client, league, warm):
+        self.pool, self.client, self.league, self.warm = pool, client, league, warm
+        self.sequence = next(_SEQUENCE)
+        self.granted = False
+        cost = (WARM_COST if warm else COLD_COST) / _WEIGHTS.get(client, 1.0)
+        start = max(_VIRTUAL_TIME[pool], _FINISH.get((pool, client), 0.0))
+        self.start, self.finish = start, start + cost
+        _FINISH[(pool, client)] = self.finish
+        _FINISH.move_to_end((pool, client))
+        while len(_FINISH) > MAX_TRACKED_TENANTS * len(POOLS):
+            _FINISH.popitem(last=False)
+
+    def order(self):
+        # Likely cache hits first, then by virtual finish time, then arrival
+        return (not self.warm, self.finish, self.sequence)
+
+
+def set_weight(client, weight):
+    """Gives a client a bigger (or smaller) share of every pool than the default weight of 1."""
+    with _LOCK:
+        _WEIGHTS[client] = float(weight)
+
+
+def _fits(ticket):
+    running, limits = _RUNNING[ticket.pool], POOLS[ticket.pool]
+    return (running["total"] < limits["slots"]
+            and running["clients"].get(ticket.client, 0) < limits["client_quota"]
+            and running["leagues"].get(ticket.league, 0) < limits["league_quota"])
+
+
+def _dispatch():
+    """Grants every waiting ticket that fits, best first. Caller holds _LOCK."""
+    granted = False
+    for ticket in sorted(_WAITING, key=_Ticket.order):
+        if not _fits(ticket):
+            continue
+        running = _RUNNING[ticket.pool]
+        running["total"] += 1
+        running["clients"][ticket.client] = running["clients"].get(ticket.client, 0) + 1
+        running["leagues"][ticket.league] = running["leagues"].get(ticket.league, 0) + 1
+        _VIRTUAL_TIME[ticket.pool] = max(_VIRTUAL_TIME[ticket.pool], ticket.start)
+        ticket.granted = True
+        _WAITING.remove(ticket)
+        granted = True
+    if granted:
+        _CHANGED.notify_all()
+
+
+def release(ticket):
+    """Frees a ticket's slot and hands it to the next waiting request that fits."""
+    with _LOCK:
+        running = _RUNNING[ticket.pool]
+        running["total"] -= 1
+        for counts, key in ((running["clients"], ticket.client), (running["leagues"], ticket.league)):
+            counts[key] -= 1
+            if not counts[key]:
+                del counts[key]
+        _dispatch()
+
+
+def _record_wait(ticket, seconds):
+    metrics.observe("scheduler.queue_seconds", seconds, pool=ticket.pool, path="warm" if ticket.warm else "cold")
+    with _LOCK:
+        stats = _QUEUE_TIMES.get(ticket.client)
+        if stats is None:
+            stats = _QUEUE_TIMES[ticket.client] = {"count": 0, "total": 0.0, "max": 0.0, "samples": deque(maxlen=_SAMPLES)}
+        _QUEUE_TIMES.move_to_end(ticket.client)
+        while len(_QUEUE_TIMES) > MAX_TRACKED_TENANTS:
+            _QUEUE_TIMES.popitem(last=False)
+        stats["count"] += 1
+        stats["total"] += seconds
+        stats["max"] = max(stats["max"], seconds)
+        stats["samples"].append(seconds)
+
+
+def acquire(pool, client, league, warm=False, timeout=QUEUE_TIMEOUT_SECONDS):
+    """
+    Waits for a slot in `pool` for one request of `client` about `league`.
+
+    Args:
+    - warm (bool): The request is likely served from a cache; it goes ahead of cold ones.
+
+    Returns:
+    - _Ticket: Pass it to `release` when the work is done.
+
+    Raises:
+    - ProviderUnavailable: If no slot frees up within `timeout` seconds.
+    """
+    start = time.monotonic()
+    with _LOCK:
+        ticket = _Ticket(pool, client, league, warm)
+        _WAITING.append(ticket)
+        _dispatch()
+        while not ticket.granted:
+            remaining = start + timeout - time.monotonic()
+            if remaining <= 0:
+                _WAITING.remove(ticket)
+                break
+            _CHANGED.wait(remaining)
+    waited = time.monotonic() - start
+    _record_wait(ticket, waited)
+    if not ticket.granted:
+        metrics.increment("scheduler.timeouts", pool=pool)
+        LOGGER.warning(f"No {pool} slot for client {client} (league {league}) after {waited:.1f}s")
+        raise ProviderUnavailable("scheduler", "We're busier than usual right now. Please try again shortly.", retry_after=10)
+    return ticket
+
+
+@contextlib.contextmanager
+def slot(pool, client, league, warm=False, timeout=QUEUE_TIMEOUT_SECONDS):
+    """Holds a slot of `pool` for the duration of the block (see `acquire`)."""
+    ticket = acquire(pool, client, league, warm, timeout)
+    try:
+        yield
+    finally:
+        release(ticket)
+
+
+@contextlib.asynccontextmanager
+async def async_slot(pool, client, league, warm=False, timeout=QUEUE_TIMEOUT_SECONDS):
+    """`slot` for coroutines; the wait happens on a worker thread, not the event loop."""
+    waiting = asyncio.ensure_future(asyncio.to_thread(acquire, pool, client, league, warm, timeout))
+    try:
+        ticket = await asyncio.shield(waiting)
+    except asyncio.CancelledError:
+        # The wait can't be interrupted; give the slot back as soon as it is granted
+        waiting.add_done_callback(lambda done: done.cancelled() or done.exception() or release(done.result()))
+        raise
+    try:
+        yield
+    finally:
+        release(ticket)
+
+
+def note_built(provider, league_id):
+    """Records that a league's summary was just built, so its next requests count as warm."""
+    key = (provider, str(league_id))
+    with _LOCK:
+        _WARM[key] = time.monotonic()
+        _WARM.move_to_end(key)
+        while len(_WARM) > MAX_TRACKED_TENANTS * 4:
+            _WARM.popitem(last=False)
+
+
+def is_warm(provider, league_id):
+    with _LOCK:
+        built = _WARM.get((provider, str(league_id)))
+    return built is not None and time.monotonic() - built < WARM_SECONDS
+
+
+def _percentile(sorted_samples, pct):
+    index = min(len(sorted_samples) - 1, int(round(pct / 100 * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+def stats():
+    """
+    Slots in use and queue lengths per pool, and queue time per client.
+
+    Returns:
+    - dict: {"pools": {pool: {"running", "waiting", "slots"}},
+      "clients": {client: {"count", "mean", "max", "p50", "p95", "p99"}}}.
+    """
+    with _LOCK:
+        pools = {
+            pool: {"running": _RUNNING[pool]["total"], "slots": POOLS[pool]["slots"],
+                   "waiting": sum(1 for ticket in _WAITING if ticket.pool == pool)}
+            for pool in POOLS
+        }
+        queue_times = {client: (s["count"], s["total"], s["max"], sorted(s["samples"])) for client, s in _QUEUE_TIMES.items()}
+    clients = {
+        client: {"count": count, "mean": total / count, "max": max_seconds,
+                 "p50": _percentile(samples, 50), "p95": _percentile(samples, 95), "p99": _percentile(samples, 99)}
+        for client, (count, total, max_seconds, samples) in queue_times.items() if count
+    }
+    return {"pools": pools, "clients": clients}
@@ -1,5 +1,6 @@
 import pytz
-from datetime import datetime, timedelta
+from datetime import datetime
+from utils import season_calendar
 
 def check_availability():
     est = pytz.timezone('US/Eastern')
@@ -16,105 +17,56 @@ def check_availability():
     else:
         return False, now_est.strftime("%A")
 
+def now_est():
+    """Current time as an aware US/Eastern datetime."""
+    return datetime.now(season_calendar.EST)
+
 def get_nfl_season_year(current_date):
     """
     Determines the NFL season year based on the current date.
     """
-    if current_date.month >= 9:  # September or later = current year's season
-        return current_date.year
-    else:  # January through August = previous year's season
-        return current_date.year - 1
+    return season_calendar.season_year_for(current_date)
 
 def get_nfl_week_1_start(season_year):
     """
     Calculates the start of NFL Week 1 for a given season.
     Uses the first Thursday of September as approximation.
     """
-    first_of_sept = datetime(season_year, 9, 1)
-    
-    # Find first Thursday (weekday 3)
-    days_until_thursday = (3 - first_of_sept.weekday()) % 7
-    if days_until_thursday == 0 and first_of_sept.weekday() != 3:
-        days_until_thursday = 7
-    
-    first_thursday = first_of_sept + timedelta(days=days_until_thursday)
-    
-    # Use the preceding Wednesday as the "start" of Week 1 for scoring purposes
-    week_1_start = first_thursday - timedelta(days=1)
-    
-    return week_1_start
+    return season_calendar.week_1_start(season_year)
 
 def generate_nfl_schedule(season_year):
     """
-    Generates the complete NFL schedule for a given season.
+    Generates the complete NFL regular season schedule ({week start: week}) for a given season.
     """
-    week_1_start = get_nfl_week_1_start(season_year)
-    
-    schedule = {}
-    current_date = week_1_start
-    
-    # Regular season: Weeks 1-18
-    for week in range(1, 19):
-        schedule[current_date] = week
-        current_date += timedelta(days=7)
-    
-    return schedule
+    return season_calendar.get_calendar(season_year).schedule()
 
 def get_current_week(current_date):
     """
     Determines what NFL week we're currently in (not necessarily completed).
+    Playoff weeks continue the numbering after the regular season.
     """
-    season_year = get_nfl_season_year(current_date)
-    schedule = generate_nfl_schedule(season_year)
-    
-    sorted_dates = sorted(schedule.keys(), reverse=True)
-    
-    for week_start_date in sorted_dates:
-        if current_date >= week_start_date:
-            return schedule[week_start_date]
-    
-    return 1
+    return season_calendar.calendar_for(current_date).current_week(current_date)
+
+def is_week_finalized(week, current_date):
+    """
+    Whether `week` has finalized scoring (Tuesday 6 AM EST after its games).
+    """
+    return season_calendar.calendar_for(current_date).is_finalized(week, current_date)
 
-def get_last_completed_week(current_date):
+def get_last_completed_week(current_date, provider=None):
     """
     Gets the most recent week that is DEFINITELY completed with finalized scoring.
-    Very conservative approach - only returns a week if we're certain it's done.
+    NFL games run Thursday through Monday night and scores are finalized by
+    Tuesday 6 AM EST, so a week only counts once that Tuesday has passed.
+    Capped at the provider's last fantasy week when `provider` is given.
     """
-    est = pytz.timezone('US/Eastern')
-    current_est = current_date.astimezone(est) if current_date.tzinfo else est.localize(current_date)
-    
-    current_week = get_current_week(current_date)
-    
-    # NFL games typically:
-    # - Thursday Night Football (week starts)
-    # - Sunday games
-    # - Monday Night Football (week ends)
-    # - Scores finalized by Tuesday 6 AM EST
-    
-    # Only consider a week "completed" if we're at least Tuesday 6 AM after it ended
-    # This means we need to be in the following week AND it's Tuesday 6 AM or later
-    
-    # If we're in Week N, then Week N-1 is completed only if:
-    # 1. It's Tuesday 6 AM or later in Week N, OR
-    # 2. It's Wednesday or later in Week N
-    
-    if current_est.weekday() >= 2:  # Wednesday or later
-        # Definitely safe to use previous week
-        return max(1, current_week - 1)
-    elif current_est.weekday() == 1 and current_est.hour >= 6:  # Tuesday 6 AM or later
-        # Should be safe to use previous week
-        return max(1, current_week - 1)
-    else:
-        # Monday or early Tuesday - be extra conservative
-        # Use the week before the previous week to be absolutely sure
-        return max(1, current_week - 2)
+    return max(1, season_calendar.calendar_for(current_date).last_finalized_week(current_date, provider))
 
-def get_available_weeks_for_recap(current_date):
+def get_available_weeks_for_recap(current_date, provider=None):
     """
     Returns a list of weeks that definitely have completed, finalized scoring.
-    Most conservative approach.
     """
-    last_completed = get_last_completed_week(current_date)
+    last_completed = season_calendar.calendar_for(current_date).last_finalized_week(current_date, provider)
     
     if last_completed < 1:
         return []
@@ -122,28 +74,28 @@ def get_available_weeks_for_recap(current_date):
     # Return all weeks from 1 up to the last completed week
     return list(range(1, last_completed + 1))
 
-def get_safest_week_for_recap(current_date):
+def get_safest_week_for_recap(current_date, provider=None):
     """
     Returns the safest week to use for recap generation.
-    Guarantees the week has completed scoring.
+    Guarantees the week has completed scoring (falls back to Week 1 before any week is final).
     """
-    available_weeks = get_available_weeks_for_recap(current_date)
-    
-    if not available_weeks:
-        return 1  # Fallback to Week 1 if nothing is available
-    
-    # Return the most recent completed week
-    return available_weeks[-1]
+    return get_last_completed_week(current_date, provider)
+
+def get_most_recent_completed_week(current_date, provider=None):
+    """
+    Most recent week with finalized scoring, in the provider's week numbering.
+    """
+    return get_safest_week_for_recap(current_date, provider)
 
 # For debugging - shows what week would be selected
-def debug_week_selection(current_date):
+def debug_week_selection(current_date, provider=None):
     """
     Debug function to show week selection logic.
     """
-    current_week = get_current_week(current_date)
-    completed_week = get_last_completed_week(current_date)
-    safest_week = get_safest_week_for_recap(current_date)
-    available_weeks = get_available_weeks_for_recap(current_date)
+    calendar = season_calendar.calendar_for(current_date)
+    current_week = calendar.current_week(current_date)
+    available_weeks = get_available_weeks_for_recap(current_date, provider)
+    safest_week = available_weeks[-1] if available_weeks else 1
     
     est = pytz.timezone('US/Eastern')
     current_est = current_date.astimezone(est) if current_date.tzinfo else est.localize(current_date)
@@ -151,7 +103,8 @@ def debug_week_selection(current_date):
     return {
         'current_date': current_est.strftime('%Y-%m-%d %H:%M %Z'),
         'current_week': current_week,
-        'last_completed_week': completed_week,
+        'current_week_label': calendar.label(current_week),
+        'last_completed_week': safest_week,
         'safest_week_for_recap': safest_week,
         'available_weeks': available_weeks,
         'day_of_week': current_est.strftime('%A'),
@@ -0,0 +1,134 @@
+import argparse
+import importlib
+import json
+import subprocess
+import sys
+import threading
+import time
+from streamlit.logger import get_logger
+
+LOGGER = get_logger(__name__)
+
+# Heavy SDKs, grouped by what needs them. They are imported on first use (or by
+# a background warm-up) instead of when the app starts.
+PROVIDER_MODULES = {
+    "espn": ["espn_api.football"],
+    "yahoo": ["yfpy.query"],
+    "openai": ["openai"],
+    # NumPy and the stat modules built on it; every provider's summary needs them
+    "stats": ["numpy", "utils.week_model", "utils.power_rankings", "utils.playoff_odds"],
+}
+
+# Cold-start budget per module for the import-time report, in milliseconds.
+DEFAULT_BUDGET_MS = 1500
+
+_LOCK = threading.Lock()
+_IMPORT_SECONDS = {}
+
+
+def load(module_name):
+    """Imports `module_name` (once), recording how long the first import took."""
+    module = sys.modules.get(module_name)
+    if module is not None:
+        return module
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    elapsed = time.perf_counter() - start
+    with _LOCK:
+        _IMPORT_SECONDS.setdefault(module_name, elapsed)
+    LOGGER.info(f"Imported {module_name} in {elapsed * 1000:.0f} ms")
+    return module
+
+
+class LazyModule:
+    """Stands in for a module at import time; the first attribute access imports it through `load`."""
+
+    def __init__(self, module_name):
+        self._module_name = module_name
+
+    def __getattr__(self, name):
+        return getattr(load(self._module_name), name)
+
+    def __repr__(self):
+        return f"<lazy module '{self._module_name}'>"
+
+
+def module(module_name):
+    """`week_model = lazy_imports.module("utils.week_model")` instead of a top-level import."""
+    return LazyModule(module_name)
+
+
+def load_provider(provider):
+    """Imports every module a group ("espn", "yahoo", "openai", "stats") needs."""
+    return [load(name) for name in PROVIDER_MODULES.get(provider.lower(), [])]
+
+
+def is_loaded(provider):
+    return all(name in sys.modules for name in PROVIDER_MODULES.get(provider.lower(), []))
+
+
+def warm_up_in_background(providers=None):
+    """Imports the given providers' modules (default: all) on a daemon thread, unless already loaded."""
+    providers = [p for p in (providers or PROVIDER_MODULES) if not is_loaded(p)]
+    if not providers:
+        return None
+
+    def warm():
+        for provider in providers:
+            try:
+                load_provider(provider)
+            except ImportError as e:
+                LOGGER.warning(f"Background import for {provider} failed: {e}")
+
+    thread = threading.Thread(target=warm, name="import-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def import_times():
+    """Returns first-import durations (seconds) of modules loaded through this module."""
+    with _LOCK:
+        return dict(_IMPORT_SECONDS)
+
+
+def measure_cold_import(module_name):
+    """Imports `module_name` in a fresh interpreter and returns the wall time in milliseconds."""
+    code = f"import time; s = time.perf_counter(); import {module_name}; print((time.perf_counter() - s) * 1000)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise ImportError(result.stderr.strip().splitlines()[-1] if result.stderr else module_name)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def cold_start_report(modules, budget_ms=DEFAULT_BUDGET_MS):
+    """
+    Measures the cold import time of each module in its own interpreter.
+
+    Returns:
+    - list: {"module", "ms", "over_budget"} dicts (or "error" for modules that failed to import).
+    """
+    report = []
+    for module_name in modules:
+        try:
+            ms = measure_cold_import(module_name)
+            report.append({"module": module_name, "ms": round(ms, 1), "over_budget": ms > budget_ms})
+        except ImportError as e:
+            report.append({"module": module_name, "error": str(e), "over_budget": False})
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report cold-start import times and fail on regressions")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("modules", nargs="*", help="Modules to measure (default: the app entry points and provider SDKs)")
+    args = parser.parse_args()
+
+    modules = args.modules or ["utils.summary_generator"] + [m for names in PROVIDER_MODULES.values() for m in names]
+    report = cold_start_report(modules, args.budget_ms)
+    print(json.dumps(report, indent=2))
+    if any(entry["over_budget"] for entry in report):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import heapq
+import itertools
+
+
+class TopK:
+    """
+    Streaming top-k selection backed by a bounded heap: O(n log k) time and O(k)
+    memory for n pushed items. On equal keys the item seen first ranks higher,
+    matching the strict `>` / `<` comparisons of a hand-written max/min loop.
+
+    Args:
+    - k (int): How many items to keep.
+    - key (callable): Score of an item.
+    - largest (bool): Keep the highest scores (True) or the lowest (False).
+    - where (callable): Optional filter; items for which it returns False are ignored.
+    """
+
+    def __init__(self, k=1, key=None, largest=True, where=None):
+        self.k = k
+        self.key = key or (lambda item: item)
+        self.largest = largest
+        self.where = where
+        self._heap = []
+        self._counter = itertools.count()
+
+    def push(self, item):
+        if self.where is not None and not self.where(item):
+            return
+        score = self.key(item)
+        # The heap root is always the weakest kept entry
+        entry = (score if self.largest else -score, -next(self._counter), item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def extend(self, items):
+        for item in items:
+            self.push(item)
+        return self
+
+    def results(self):
+        """Kept items, best first."""
+        return [entry[2] for entry in sorted(self._heap, key=lambda e: e[:2], reverse=True)]
+
+    def best(self, default=None):
+        """The single best item, or `default` if nothing was pushed."""
+        if not self._heap:
+            return default
+        return max(self._heap, key=lambda e: e[:2])[2]
+
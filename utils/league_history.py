@@ -0,0 +1,435 @@
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from streamlit.logger import get_logger
+from utils import lazy_imports, metrics, season_calendar, sleeper_helper, week_archive
+
+LOGGER = get_logger(__name__)
+week_model = lazy_imports.module("utils.week_model")
+
+# All-time league records (highest and lowest single-week scores, biggest blowout,
+# closest game, career records and head-to-head series) across every season a league
+# has played. Prior seasons are backfilled once, in the background: ESPN by `year`,
+# Sleeper by following each league's `previous_league_id`. Their weeks go into the week
+# archive, and every week is folded once into a small per-league record table kept on
+# disk, so a recap only folds in its own week.
+HISTORY_WORKERS = 4
+MAX_SEASONS = 15
+MAX_LEAGUES_IN_MEMORY = 256
+SLEEPER_LAST_WEEK = season_calendar.PROVIDER_LAST_WEEK["sleeper"]
+
+_LOCK = threading.Lock()
+_RECORDS = OrderedDict()  # (provider, league_id) -> AllTimeRecords
+_BACKFILLS = set()  # (provider, league_id) backfills started by this process
+_SAVE_LOCK = threading.Lock()
+_EXECUTOR = None
+
+
+def _empty_state():
+    return {
+        "folded": [],          # "season-week" keys already counted
+        "seasons_done": [],    # prior seasons fully backfilled
+        "seasons": {},         # season -> that season's league id (Sleeper has one per season)
+        "high_score": None,
+        "low_score": None,
+        "blowout": None,
+        "closest": None,
+        "teams": {},           # team_id -> career record
+        "head_to_head": {},    # "id_a|id_b" (sorted) -> [wins_a, wins_b, ties]
+    }
+
+
+class AllTimeRecords:
+    """A league's all-time record table, built by folding in one finalized week at a time."""
+
+    def __init__(self, state=None):
+        self.state = {**_empty_state(), **(state or {})}
+        self._folded = set(self.state["folded"])
+        self._lock = threading.Lock()
+
+    def has_week(self, season, week):
+        return f"{int(season)}-{int(week)}" in self._folded
+
+    def fold(self, season, week, pairs):
+        """
+        Adds one finalized week; weeks already folded are ignored.
+
+        Args:
+        - pairs (iterable): [(team_id, team_name, points), ...] per matchup; a single team is a bye.
+
+        Returns:
+        - bool: Whether the week was new.
+        """
+        season, week = int(season), int(week)
+        with self._lock:
+            key = f"{season}-{week}"
+            if key in self._folded:
+                return False
+            state = self.state
+            for pair in pairs:
+                entries = [(str(team_id), name, float(points or 0)) for team_id, name, points in pair]
+                for team_id, name, points in entries:
+                    team = state["teams"].setdefault(
+                        team_id, {"team": name, "season": season, "wins": 0, "losses": 0, "ties": 0, "points_for": 0.0, "games": 0}
+                    )
+                    if season >= team["season"]:
+                        team["team"], team["season"] = name, season
+                    team["points_for"] = round(team["points_for"] + points, 2)
+                    if points <= 0:  # Unplayed (or unscored) weeks don't set score records
+                        continue
+                    score = {"team_id": team_id, "team": name, "points": points, "season": season, "week": week}
+                    if state["high_score"] is None or points > state["high_score"]["points"]:
+                        state["high_score"] = score
+                    if state["low_score"] is None or points < state["low_score"]["points"]:
+                        state["low_score"] = score
+                if len(entries) != 2 or not any(points for _, _, points in entries):
+                    continue
+                self._fold_game(season, week, *sorted(entries, key=lambda entry: -entry[2]))
+            state["folded"].append(key)
+            self._folded.add(key)
+            return True
+
+    def _fold_game(self, season, week, winner, loser):
+        state = self.state
+        margin = round(winner[2] - loser[2], 2)
+        tied = margin == 0
+        for team_id, field in ((winner[0], "ties" if tied else "wins"), (loser[0], "ties" if tied else "losses")):
+            state["teams"][team_id][field] += 1
+            state["teams"][team_id]["games"] += 1
+        game = {
+            "winner": winner[1], "winner_points": winner[2], "loser": loser[1], "loser_points": loser[2],
+            "margin": margin, "season": season, "week": week,
+        }
+        if state["blowout"] is None or margin > state["blowout"]["margin"]:
+            state["blowout"] = game
+        if state["closest"] is None or margin < state["closest"]["margin"]:
+            state["closest"] = game
+        first, second = sorted((winner[0], loser[0]))
+        series = state["head_to_head"].setdefault(f"{first}|{second}", [0, 0, 0])
+        series[2 if tied else 0 if winner[0] == first else 1] += 1
+
+    def head_to_head(self, team_a, team_b):
+        """Career (team_a wins, team_b wins, ties)."""
+        team_a, team_b = str(team_a), str(team_b)
+        first, second = sorted((team_a, team_b))
+        with self._lock:
+            wins_first, wins_second, ties = self.state["head_to_head"].get(f"{first}|{second}", (0, 0, 0))
+        return (wins_first, wins_second, ties) if team_a == first else (wins_second, wins_first, ties)
+
+    def note_season(self, season, season_league_id):
+        with self._lock:
+            self.state["seasons"][str(int(season))] = str(season_league_id)
+
+    def mark_season_done(self, season):
+        with self._lock:
+            if int(season) not in self.state["seasons_done"]:
+                self.state["seasons_done"].append(int(season))
+
+    def snapshot(self):
+        """A copy of the record table, safe to read while weeks are being folded."""
+        return json.loads(self.to_json())
+
+    def to_json(self):
+        with self._lock:
+            return json.dumps(self.state)
+
+
+def records_path(provider, league_id, root=None):
+    return os.path.join(root or week_archive.ARCHIVE_DIR, "records", f"provider={provider}", f"league_id={league_id}", "records.json")
+
+
+def get_records(provider, league_id, root=None):
+    """Returns a league's record table, loading it from disk on first use."""
+    key = (provider, str(league_id))
+    with _LOCK:
+        records = _RECORDS.get(key)
+        if records is None:
+            path = records_path(provider, league_id, root)
+            state = None
+            if os.path.exists(path):
+                try:
+                    with open(path, 'r') as f:
+                        state = json.load(f)
+                except (OSError, ValueError) as e:
+                    LOGGER.warning(f"Could not read all-time records at {path}, starting over: {e}")
+            records = _RECORDS[key] = AllTimeRecords(state)
+        _RECORDS.move_to_end(key)
+        while len(_RECORDS) > MAX_LEAGUES_IN_MEMORY:
+            _RECORDS.popitem(last=False)
+        return records
+
+
+def save_records(provider, league_id, records, root=None):
+    """Atomically writes a league's record table. Never raises."""
+    path = records_path(provider, league_id, root)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp = f"{path}.{uuid.uuid4().hex}.tmp"
+        # One writer at a time, so an older snapshot never replaces a newer one
+        with _SAVE_LOCK:
+            with open(temp, 'w') as f:
+                f.write(records.to_json())
+            os.replace(temp, path)
+        return True
+    except OSError as e:
+        LOGGER.warning(f"Could not save all-time records for {provider} league {league_id}: {e}")
+        return False
+
+
+def record_week(provider, league_id, season, week, pairs, root=None):
+    """Folds a recap's finalized week into the league's records (a no-op if already there). Returns the records."""
+    records = get_records(provider, league_id, root)
+    if records.fold(season, week, pairs):
+        records.note_season(season, league_id)
+        save_records(provider, league_id, records, root)
+    return records
+
+
+def rebuild_records(provider, league_id, root=None):
+    """
+    Rebuilds a league's records from the week archive, e.g. after a stat correction
+    changed a week that was already folded in (maximums can't be un-folded).
+
+    Returns:
+    - bool: Whether the records were rebuilt; False without an archive to rebuild from.
+    """
+    if not week_archive.is_available():
+        LOGGER.info(f"No week archive; all-time records for {provider} league {league_id} keep pre-correction scores")
+        return False
+    old = get_records(provider, league_id, root).snapshot()
+    fresh = AllTimeRecords({"seasons_done": old["seasons_done"], "seasons": old["seasons"]})
+    for season, season_id in old["seasons"].items():
+        for week, pairs in sorted(week_archive.week_pairs(provider, season_id, int(season), None, root).items()):
+            fresh.fold(season, week, pairs)
+    with _LOCK:
+        _RECORDS[(provider, str(league_id))] = fresh
+    save_records(provider, league_id, fresh, root)
+    metrics.increment("history.records_rebuilt", provider=provider)
+    return True
+
+
+# Backfill
+
+def _get_executor():
+    global _EXECUTOR
+    with _LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="history-backfill")
+        return _EXECUTOR
+
+
+def start_backfill(provider, league_id, job, *args):
+    """
+    Runs `job(*args)` on a background thread, once per league and process. Recaps never
+    wait for it; the all-time records they show fill in as seasons are backfilled.
+
+    Returns:
+    - bool: Whether a backfill was started.
+    """
+    key = (provider, str(league_id))
+    with _LOCK:
+        if key in _BACKFILLS:
+            return False
+        _BACKFILLS.add(key)
+
+    def run():
+        try:
+            job(*args)
+        except Exception:
+            LOGGER.exception(f"History backfill failed for {provider} league {league_id}")
+
+    _get_executor().submit(run)
+    return True
+
+
+def backfill_seasons(provider, league_id, seasons, fetch_weeks, current_season=None, root=None):
+    """
+    Backfills seasons into the week archive and the league's records. Seasons are
+    fetched concurrently; every request still goes through the provider's rate limit.
+    Past seasons are only backfilled once; the current season's finalized weeks are
+    caught up on each run, and recaps fold in the weeks after that.
+
+    Args:
+    - seasons (list): (season, season_league_id) pairs; ESPN keeps one league id, Sleeper has one per season.
+    - fetch_weeks (callable): (season, season_league_id, known) -> {week: WeekData} for the season's
+      finalized weeks, leaving out weeks for which `known(week)` is true (already archived or folded).
+
+    Returns:
+    - int: Number of weeks folded into the records.
+    """
+    records = get_records(provider, league_id, root)
+    pending = [(season, season_id) for season, season_id in seasons if int(season) not in records.state["seasons_done"]]
+    if not pending:
+        return 0
+
+    def backfill(season, season_id):
+        archived = week_archive.week_pairs(provider, season_id, season, None, root)
+        known = set(archived)
+        fetched = fetch_weeks(season, season_id, lambda week: week in known or records.has_week(season, week))
+        for week, week_data in fetched.items():
+            week_archive.archive_week(provider, season_id, season, week, week_data, root)
+            archived[week] = week_model.matchup_pairs(week_data)
+        return season, season_id, archived
+
+    folded = 0
+    with ThreadPoolExecutor(max_workers=min(HISTORY_WORKERS, len(pending))) as executor:
+        for season, season_id, weeks in executor.map(lambda entry: backfill(*entry), pending):
+            folded += sum(records.fold(season, week, pairs) for week, pairs in sorted(weeks.items()))
+            records.note_season(season, season_id)
+            if current_season is None or int(season) < int(current_season):
+                records.mark_season_done(season)
+            save_records(provider, league_id, records, root)
+    metrics.increment("history.weeks_backfilled", folded, provider=provider)
+    LOGGER.info(f"Backfilled {len(pending)} season(s), {folded} week(s) of {provider} league {league_id} history")
+    return folded
+
+
+# Provider adapters
+
+def espn_week_pairs(league, week, clean=lambda name: name):
+    """Head-to-head pairs for a week from the schedules and scores espn_api loads with the league."""
+    pairs, seen = [], set()
+    for team in league.teams:
+        if team.team_id in seen or week - 1 >= min(len(team.scores), len(team.schedule)):
+            continue
+        seen.add(team.team_id)
+        entry = (team.team_id, clean(team.team_name), team.scores[week - 1])
+        opponent = team.schedule[week - 1]
+        if opponent is None or opponent.team_id == team.team_id or week - 1 >= len(opponent.scores):
+            pairs.append([entry])
+            continue
+        seen.add(opponent.team_id)
+        pairs.append([entry, (opponent.team_id, clean(opponent.team_name), opponent.scores[week - 1])])
+    return pairs
+
+
+def backfill_espn(league, load_league, through_week, clean=lambda name: name, root=None):
+    """
+    Backfills the seasons before `league.year` listed in the league's `previousSeasons`,
+    plus this season through `through_week`. One League load per season carries every
+    week's scores, so weeks cost no extra requests (and this season's cost none).
+
+    Args:
+    - load_league (callable): year -> espn_api League for that season.
+    """
+    seasons = sorted({int(year) for year in getattr(league, "previousSeasons", None) or [] if int(year) < league.year})
+    seasons = [(season, str(league.league_id)) for season in seasons[-MAX_SEASONS:] + [league.year]]
+
+    def fetch_weeks(season, season_id, known):
+        past = league if season == league.year else load_league(season)
+        weeks = max((len(team.scores) for team in past.teams), default=0)
+        if season == league.year:
+            weeks = min(weeks, through_week)
+        fetched = {}
+        for week in range(1, weeks + 1):
+            pairs = espn_week_pairs(past, week, clean)
+            if not known(week) and any(points for pair in pairs for _, _, points in pair):
+                fetched[week] = week_model.from_pairs(pairs)
+        return fetched
+
+    return backfill_seasons("espn", league.league_id, seasons, fetch_weeks, league.year, root)
+
+
+def sleeper_league_chain(league_id, max_seasons=MAX_SEASONS):
+    """
+    A Sleeper league and its prior seasons, following `previous_league_id` (each season is its own league).
+
+    Returns:
+    - list: (season, league_id, league_info) tuples, newest (this league) first.
+    """
+    seasons = []
+    current = str(league_id)
+    while current and current != "0" and len(seasons) <= max_seasons:
+        info = sleeper_helper.fetch_league(current)
+        if not info:
+            break
+        seasons.append((int(info["season"]), current, info))
+        current = str(info.get("previous_league_id") or "")
+    return seasons
+
+
+def backfill_sleeper(league_id, through_week, name_of=lambda player_id: player_id, root=None):
+    """
+    Backfills every prior season in a Sleeper league's previous_league_id chain, plus this
+    season through `through_week`; each season's weeks are fetched concurrently.
+    """
+    chain = sleeper_league_chain(league_id)
+    if not chain:
+        return 0
+    infos = {season_id: info for _, season_id, info in chain}
+
+    def fetch_weeks(season, season_id, known):
+        settings = infos[season_id].get("settings") or {}
+        last_week = through_week if season_id == str(league_id) else int(settings.get("last_scored_leg") or SLEEPER_LAST_WEEK)
+        weeks = [week for week in range(1, last_week + 1) if not known(week)]
+        if not weeks:
+            return {}
+        user_team_mapping = sleeper_helper.team_names_by_owner(sleeper_helper.fetch_users(season_id))
+        roster_owner_mapping = sleeper_helper.owners_by_roster(sleeper_helper.fetch_rosters(season_id))
+        with ThreadPoolExecutor(max_workers=min(HISTORY_WORKERS, len(weeks))) as executor:
+            matchups_by_week = dict(zip(weeks, executor.map(lambda week: sleeper_helper.fetch_matchups(season_id, week) or [], weeks)))
+        return {
+            week: week_model.from_sleeper(matchups, user_team_mapping, roster_owner_mapping, name_of)
+            for week, matchups in matchups_by_week.items()
+            if any(matchup.get('points') for matchup in matchups)
+        }
+
+    seasons = [(season, season_id) for season, season_id, _ in chain]
+    return backfill_seasons("sleeper", league_id, seasons, fetch_weeks, chain[0][0], root)
+
+
+# Formatting
+
+def _when(entry, season, week):
+    if (entry["season"], entry["week"]) == (int(season), int(week)):
+        return "this week - a new record!"
+    return f"{entry['season']} Week {entry['week']}"
+
+
+def format_records(records, season, week, pairs=()):
+    """
+    Markdown lines for the All-Time Records section.
+
+    Args:
+    - pairs (iterable): This week's head-to-head pairs; each game gets its career series line.
+    """
+    state = records.snapshot()
+    lines = []
+    if state["high_score"]:
+        high = state["high_score"]
+        lines.append(f"**All-Time High Score:** {high['team']} with **{high['points']:.2f}** ({_when(high, season, week)})\n")
+    if state["low_score"]:
+        low = state["low_score"]
+        lines.append(f"**All-Time Low Score:** {low['team']} with **{low['points']:.2f}** ({_when(low, season, week)})\n")
+    if state["blowout"]:
+        game = state["blowout"]
+        lines.append(
+            f"**Biggest Blowout Ever:** {game['winner']} ({game['winner_points']:.1f}) vs {game['loser']} "
+            f"({game['loser_points']:.1f}) by **{game['margin']:.2f}** ({_when(game, season, week)})\n"
+        )
+    teams = [team for team in state["teams"].values() if team["games"]]
+    if teams:
+        best = max(teams, key=lambda team: ((team["wins"] + 0.5 * team["ties"]) / team["games"], team["points_for"]))
+        lines.append(
+            f"**Best All-Time Record:** {best['team']} at {best['wins']}-{best['losses']}"
+            + (f"-{best['ties']}" if best['ties'] else "") + f" over {best['games']} games\n"
+        )
+    series = []
+    for pair in pairs:
+        if len(pair) != 2:
+            continue
+        (a_id, a_name, _), (b_id, b_name, _) = pair
+        a_wins, b_wins, ties = records.head_to_head(a_id, b_id)
+        if a_wins + b_wins + ties == 0:
+            continue
+        if a_wins == b_wins:
+            series.append(f"{a_name} and {b_name} are tied {a_wins}-{b_wins}" + (f"-{ties}" if ties else ""))
+        else:
+            (lead, lead_wins), (trail, trail_wins) = sorted(((a_name, a_wins), (b_name, b_wins)), key=lambda side: -side[1])
+            series.append(f"{lead} leads {trail} {lead_wins}-{trail_wins}" + (f"-{ties}" if ties else ""))
+    if series:
+        lines.append("**Career Head-to-Head:** " + "; ".join(series) + "\n")
+    return lines
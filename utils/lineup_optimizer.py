@@ -0,0 +1,206 @@
+from collections import Counter, defaultdict
+from utils.leaderboard import TopK
+
+# Optimal lineups ("points left on the bench") for any slot layout: QB/RB/WR/TE/K/DEF,
+# FLEX, SUPERFLEX and IDP slots alike. A player's points don't depend on which slot
+# they fill, so the best lineup is a maximum-weight matching of players to slots on a
+# transversal matroid: taking players best-first and keeping each one that fits
+# (possibly after moving already-placed players along an augmenting path) is optimal.
+
+# Roster slots that never score
+NON_STARTING_SLOTS = {"BE", "BN", "IR", "IR+", "NA", "TAXI"}
+
+# Sleeper flex slots and the positions that may fill them; any other slot only takes its own position
+SLEEPER_SLOT_POSITIONS = {
+    "FLEX": {"RB", "WR", "TE"},
+    "SUPER_FLEX": {"QB", "RB", "WR", "TE"},
+    "REC_FLEX": {"WR", "TE"},
+    "WRRB_FLEX": {"RB", "WR"},
+    "IDP_FLEX": {"DL", "LB", "DB"},
+}
+
+
+def starting_slots(slots):
+    """{slot: count} of the scoring slots in a list of roster slot names."""
+    return Counter(slot for slot in slots if slot not in NON_STARTING_SLOTS)
+
+
+def optimal_lineup(players, slot_counts):
+    """
+    Finds the highest-scoring legal lineup.
+
+    Args:
+    - players (iterable): (player_id, points, eligible_slots) tuples.
+    - slot_counts (dict): Number of starters per slot, e.g. {"QB": 1, "RB": 2, "FLEX": 1}.
+
+    Returns:
+    - dict: "points" (optimal total) and "lineup" as (slot, player_id, points) tuples.
+    """
+    open_slots = sum(slot_counts.values())
+    filled = defaultdict(list)  # slot -> indices of the players placed in it
+    placed = []
+    # Slots a failed search visited are full and only lead to full slots; that never changes
+    # because later augmenting paths can't pass through them, so they are skipped from then on
+    dead = set()
+
+    def place(index, eligible, visited):
+        # Augmenting path search over slot types; a slot type that failed once can't help again
+        for slot in eligible:
+            if slot in visited:
+                continue
+            visited.add(slot)
+            if len(filled[slot]) < slot_counts[slot]:
+                filled[slot].append(index)
+                return True
+            for position, other in enumerate(filled[slot]):
+                if place(other, placed[other][2], visited):
+                    filled[slot][position] = index
+                    return True
+        return False
+
+    ranked = sorted(players, key=lambda player: player[1], reverse=True)
+    for player_id, points, eligible in ranked:
+        if open_slots == 0 or points is None or points <= 0:
+            break
+        eligible = [slot for slot in eligible if slot_counts.get(slot) and slot not in dead]
+        if not eligible:
+            continue
+        placed.append((player_id, points, eligible))
+        visited = set(dead)
+        if place(len(placed) - 1, eligible, visited):
+            open_slots -= 1
+        else:
+            dead = visited
+
+    lineup = [(slot, placed[i][0], placed[i][1]) for slot, indices in filled.items() for i in indices]
+    return {"points": round(sum(points for _, _, points in lineup), 2), "lineup": lineup}
+
+
+def lineup_report(team, players, slot_counts, actual_points):
+    """
+    Actual vs optimal points for one team-week.
+
+    Returns:
+    - dict: "team", "actual", "optimal", "left_on_bench" and the optimal "lineup".
+    """
+    best = optimal_lineup(players, slot_counts)
+    actual = round(actual_points, 2)
+    return {
+        "team": team,
+        "actual": actual,
+        "optimal": best["points"],
+        "left_on_bench": round(max(best["points"] - actual, 0), 2),
+        "lineup": best["lineup"],
+    }
+
+
+def most_points_left(reports, k=1):
+    """Reports with the most points left on the bench, worst manager first."""
+    return TopK(k, key=lambda report: report["left_on_bench"]).extend(reports).results()
+
+
+def season_totals(weekly_reports):
+    """
+    Sums lineup reports over a season.
+
+    Args:
+    - weekly_reports (iterable): One list of team reports per week.
+
+    Returns:
+    - dict: {team: {"actual", "optimal", "left_on_bench"}} season totals.
+    """
+    totals = defaultdict(lambda: {"actual": 0.0, "optimal": 0.0, "left_on_bench": 0.0})
+    for reports in weekly_reports:
+        for report in reports:
+            team = totals[report["team"]]
+            for field in ("actual", "optimal", "left_on_bench"):
+                team[field] += report[field]
+    return {team: {field: round(value, 2) for field, value in fields.items()} for team, fields in totals.items()}
+
+
+def format_bench_line(report):
+    return (
+        f"**Most Points Left on Bench:** {report['team']} scored **{report['actual']:.2f}** "
+        f"but an optimal lineup would have scored **{report['optimal']:.2f}** "
+        f"(**{report['left_on_bench']:.2f}** left on the bench)."
+    )
+
+
+# Provider adapters
+
+def espn_lineup_reports(box_scores, clean=lambda name: name):
+    """
+    Lineup reports for every team in a week of ESPN box scores. Slot counts come
+    from each team's own starting lineup; eligibility from each player's eligibleSlots.
+    """
+    reports = []
+    for box_score in box_scores:
+        for team, lineup in ((box_score.home_team, box_score.home_lineup), (box_score.away_team, box_score.away_lineup)):
+            if not team:  # Playoff byes have no opponent
+                continue
+            slot_counts = starting_slots(player.slot_position for player in lineup)
+            players = [(player.playerId, player.points, player.eligibleSlots) for player in lineup]
+            actual = sum(player.points for player in lineup if player.slot_position not in NON_STARTING_SLOTS)
+            reports.append(lineup_report(clean(team.team_name), players, slot_counts, actual))
+    return reports
+
+
+def _sleeper_eligible(fantasy_positions, slot_counts):
+    positions = set(fantasy_positions or ())
+    return [slot for slot in slot_counts if positions & SLEEPER_SLOT_POSITIONS.get(slot, {slot})]
+
+
+def sleeper_lineup_reports(matchups, roster_positions, user_team_mapping, roster_owner_mapping, positions_of, fallback_points=None):
+    """
+    Lineup reports for every team in a week of Sleeper matchups.
+
+    Args:
+    - roster_positions (list): The league's `roster_positions` setting.
+    - positions_of (callable): player_id -> list of fantasy positions.
+    - fallback_points (dict): Optional {player_id: points} for players missing from `players_points`.
+    """
+    slot_counts = starting_slots(roster_positions)
+    fallback_points = fallback_points or {}
+    eligible_by_positions = {}  # A handful of distinct position lists cover every player
+    reports = []
+    for matchup in matchups:
+        owner_id = roster_owner_mapping.get(matchup.get('roster_id'))
+        team_name = user_team_mapping.get(owner_id, "Unknown Team")
+        players_points = matchup.get('players_points') or {}
+        players = []
+        for player_id in matchup.get('players') or []:
+            player_id = str(player_id)
+            points = players_points.get(player_id, fallback_points.get(player_id, 0))
+            positions = tuple(positions_of(player_id) or ())
+            eligible = eligible_by_positions.get(positions)
+            if eligible is None:
+                eligible = eligible_by_positions[positions] = _sleeper_eligible(positions, slot_counts)
+            players.append((player_id, points, eligible))
+        actual = matchup.get('points')
+        if actual is None:
+            actual = sum(players_points.get(str(player_id), 0) for player_id in matchup.get('starters') or [])
+        reports.append(lineup_report(team_name, players, slot_counts, actual))
+    return reports
+
+
+def yahoo_eligible_positions(player):
+    """Slot names a Yahoo player may fill (eligible_positions as strings, dicts or objects)."""
+    positions = []
+    for position in getattr(player, "eligible_positions", None) or []:
+        if isinstance(position, dict):
+            position = position.get("position")
+        position = getattr(position, "position", position)
+        if position:
+            positions.append(position)
+    return positions
+
+
+def yahoo_lineup_report(team_name, players_stats):
+    """Lineup report for one Yahoo team from its weekly roster player stats."""
+    slot_counts = starting_slots(player.selected_position.position for player in players_stats)
+    players = [(player.player_id, player.player_points.total, yahoo_eligible_positions(player)) for player in players_stats]
+    actual = sum(
+        player.player_points.total for player in players_stats
+        if player.selected_position.position not in NON_STARTING_SLOTS
+    )
+    return lineup_report(team_name, players, slot_counts, actual)
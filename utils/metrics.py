@@ -0,0 +1,90 @@
+import threading
+from collections import defaultdict, deque
+
+# Process-wide counters, gauges and timings. Everything here is in-memory and
+# shared by every Streamlit session running in the same server process.
+_LOCK = threading.Lock()
+_COUNTERS = defaultdict(float)
+_GAUGES = {}
+_TIMINGS = {}
+
+# Number of recent samples kept per timing for percentile estimates.
+_RESERVOIR_SIZE = 1024
+
+
+def _key(name, labels):
+    if not labels:
+        return name
+    label_str = ",".join(f"{k}={labels[k]}" for k in sorted(labels))
+    return f"{name}{{{label_str}}}"
+
+
+def increment(name, value=1, **labels):
+    """Adds `value` to the counter `name` for the given labels."""
+    with _LOCK:
+        _COUNTERS[_key(name, labels)] += value
+
+
+def set_gauge(name, value, **labels):
+    """Records the current value of a gauge."""
+    with _LOCK:
+        _GAUGES[_key(name, labels)] = value
+
+
+def observe(name, seconds, **labels):
+    """Records a single duration (in seconds) for the timing `name`."""
+    key = _key(name, labels)
+    with _LOCK:
+        timing = _TIMINGS.get(key)
+        if timing is None:
+            timing = {"count": 0, "total": 0.0, "max": 0.0, "samples": deque(maxlen=_RESERVOIR_SIZE)}
+            _TIMINGS[key] = timing
+        timing["count"] += 1
+        timing["total"] += seconds
+        timing["max"] = max(timing["max"], seconds)
+        timing["samples"].append(seconds)
+
+
+def get_counter(name, **labels):
+    with _LOCK:
+        return _COUNTERS.get(_key(name, labels), 0)
+
+
+def _percentile(sorted_samples, pct):
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, int(round(pct / 100 * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+def snapshot():
+    """
+    Returns a point-in-time copy of every metric.
+
+    Returns:
+    - dict: {"counters": {...}, "gauges": {...}, "timings": {key: {count, mean, max, p50, p95, p99}}}
+    """
+    with _LOCK:
+        counters = dict(_COUNTERS)
+        gauges = dict(_GAUGES)
+        timings = {key: (t["count"], t["total"], t["max"], sorted(t["samples"])) for key, t in _TIMINGS.items()}
+
+    timing_summary = {}
+    for key, (count, total, max_seconds, samples) in timings.items():
+        timing_summary[key] = {
+            "count": count,
+            "mean": total / count if count else 0.0,
+            "max": max_seconds,
+            "p50": _percentile(samples, 50),
+            "p95": _percentile(samples, 95),
+            "p99": _percentile(samples, 99),
+        }
+    return {"counters": counters, "gauges": gauges, "timings": timing_summary}
+
+
+def reset():
+    """Clears every metric. Mostly useful for benchmarks."""
+    with _LOCK:
+        _COUNTERS.clear()
+        _GAUGES.clear()
+        _TIMINGS.clear()
@@ -0,0 +1,56 @@
+import os
+import threading
+import streamlit as st
+from utils import lazy_imports
+
+# Same names as the Streamlit secrets the app uses; environment variables win so
+# headless services can run without a secrets.toml.
+_SETTINGS = {
+    "api_key": "OPENAI_COMMISH_API_KEY",
+    "organization": "OPENAI_ORG_ID",
+    "project": "OPENAI_API_PROJECT_ID",
+}
+
+_LOCK = threading.Lock()
+_CLIENT = None
+
+
+def _setting(name):
+    value = os.environ.get(name)
+    if value:
+        return value
+    try:
+        return st.secrets[name]
+    except Exception:
+        return None
+
+
+def client_settings():
+    """Returns the OpenAI client keyword arguments, or None if no API key is configured."""
+    settings = {arg: _setting(name) for arg, name in _SETTINGS.items()}
+    if not settings["api_key"]:
+        return None
+    return settings
+
+
+def get_client():
+    """Returns the process-wide OpenAI client (and its connection pool), or None if not configured."""
+    global _CLIENT
+    with _LOCK:
+        if _CLIENT is None:
+            settings = client_settings()
+            if settings is None:
+                return None
+            _CLIENT = lazy_imports.load("openai").OpenAI(**settings)
+        return _CLIENT
+
+
+def get_async_client():
+    """
+    Returns a new AsyncOpenAI client, or None if not configured. Async clients are
+    bound to the event loop they are used on, so each loop should create its own.
+    """
+    settings = client_settings()
+    if settings is None:
+        return None
+    return lazy_imports.load("openai").AsyncOpenAI(**settings)
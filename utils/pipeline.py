@@ -0,0 +1,163 @@
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from streamlit.logger import get_logger
+from utils import metrics
+from utils.structured_logging import fields
+
+LOGGER = get_logger(__name__)
+
+# Total wall-clock budget for one stage of a recap request, and the default
+# time any single section may take within it.
+DEFAULT_BUDGET_SECONDS = 20.0
+DEFAULT_SECTION_TIMEOUT = 10.0
+# Sections of every request share one pool. When it is busy, sections wait in its
+# queue, and that wait counts against their timeout and the stage deadline.
+MAX_WORKERS = int(os.environ.get("COMMISH_SECTION_WORKERS", 32))
+# A thread can't be killed, so a section that hangs past its timeout (e.g. a provider
+# call that never returns) keeps its worker. Once this many workers are stuck, new
+# sections go to a fresh pool and the old one is left to drain, so hung calls cost
+# extra threads instead of starving every request of workers.
+MAX_STUCK_WORKERS = max(1, MAX_WORKERS // 2)
+
+_LOCK = threading.Lock()
+_EXECUTOR = None
+_STUCK = set()  # futures of the current pool still running past their timeout
+
+
+def _get_executor():
+    global _EXECUTOR
+    with _LOCK:
+        if _EXECUTOR is not None and len(_STUCK) >= MAX_STUCK_WORKERS:
+            LOGGER.warning(f"{len(_STUCK)} recap sections are stuck past their timeout; starting a new section pool")
+            metrics.increment("pipeline.pool_replaced")
+            _EXECUTOR.shutdown(wait=False)
+            _EXECUTOR = None
+            _STUCK.clear()
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="recap-section")
+        return _EXECUTOR
+
+
+def _mark_stuck(future):
+    with _LOCK:
+        _STUCK.add(future)
+    future.add_done_callback(_unmark_stuck)
+
+
+def _unmark_stuck(future):
+    with _LOCK:
+        _STUCK.discard(future)
+
+
+def run_sections(sections, stage, budget_seconds=DEFAULT_BUDGET_SECONDS, section_timeout=DEFAULT_SECTION_TIMEOUT, context=""):
+    """
+    Runs independent recap sections concurrently under a shared latency budget.
+
+    Every section gets its own timeout, capped by the stage deadline. Sections
+    that raise, time out or miss the deadline are left out of the results and
+    logged with the stage and the elapsed time; the rest are returned as-is.
+
+    Args:
+    - sections (list): (name, callable) pairs, or (name, callable, timeout) to override the default timeout.
+    - stage (str): Stage label used in logs and metrics, e.g. "espn.stats".
+    - budget_seconds (float): Deadline for the whole stage.
+    - section_timeout (float): Default per-section timeout.
+    - context (str): Extra text (league/week) included in log lines.
+
+    Returns:
+    - Tuple(dict, list): Results keyed by section name, and the names of sections that did not finish.
+    """
+    start = time.perf_counter()
+    deadline = start + budget_seconds
+    results = {}
+    missed = []
+
+    executor = _get_executor()
+    futures = []
+    try:
+        for section in sections:
+            name, fn = section[0], section[1]
+            timeout = section[2] if len(section) > 2 else section_timeout
+            # Each section keeps the caller's log context (provider, league, week)
+            futures.append((name, timeout, executor.submit(contextvars.copy_context().run, fn)))
+
+        for name, timeout, future in futures:
+            remaining = min(start + timeout, deadline) - time.perf_counter()
+            try:
+                results[name] = future.result(timeout=max(0.0, remaining))
+                continue
+            except FutureTimeoutError:
+                if not future.cancel():
+                    _mark_stuck(future)
+                reason = "deadline exceeded"
+            except Exception as e:
+                reason = f"failed: {e}"
+            elapsed = time.perf_counter() - start
+            missed.append(name)
+            metrics.increment("pipeline.section_missed", stage=stage, section=name)
+            LOGGER.warning(f"Section '{name}' missing from stage '{stage}' after {elapsed:.2f}s ({reason}) {context}".rstrip())
+    finally:
+        # Never block the request on a hung section; its thread finishes in the background,
+        # and sections that haven't started yet are dropped from the queue.
+        for _, _, future in futures:
+            future.cancel()
+
+    elapsed = time.perf_counter() - start
+    metrics.observe("pipeline.stage_seconds", elapsed, stage=stage)
+    LOGGER.info(
+        f"Stage '{stage}' finished",
+        extra=fields(stage=stage, duration_ms=round(elapsed * 1000, 1), sections=len(sections), missed=len(missed)),
+    )
+    return results, missed
+
+
+def shared(fn):
+    """
+    Wraps `fn` for sections that depend on the same result: the first caller computes
+    it and concurrent callers wait for it instead of computing it again.
+    """
+    lock = threading.Lock()
+    result = []
+
+    def call():
+        with lock:
+            if not result:
+                result.append(fn())
+        return result[0]
+    return call
+
+
+def join_lines(results, names):
+    """Returns the lines for `names` that finished, in the given order, skipping missing ones."""
+    lines = []
+    for name in names:
+        value = results.get(name)
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple)):
+            lines.extend(value)
+        else:
+            lines.append(value)
+    return lines
+
+
+def render_groups(groups, results):
+    """
+    Builds markdown from (header, section_names) groups, dropping headers whose sections all missed.
+
+    Returns:
+    - str: Markdown with groups separated by horizontal rules.
+    """
+    summary_parts = []
+    for header, names in groups:
+        lines = join_lines(results, names)
+        if not lines:
+            continue
+        if summary_parts:
+            summary_parts.append("\n---\n")
+        summary_parts.append(header)
+        summary_parts.extend(lines)
+    return "\n".join(summary_parts)
@@ -0,0 +1,103 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from streamlit.logger import get_logger
+from utils import metrics, provider_http, singleflight, sleeper_helper
+
+LOGGER = get_logger(__name__)
+
+# Shared, cross-league store of NFL player weekly stats keyed by (season, week, player_id).
+# Filled once per week from Sleeper's bulk stats endpoint; every league's stat
+# computation reads from it, so an extra league only costs its roster join.
+STATS_URL = "https://api.sleeper.app/v1/stats/nfl/regular/{season}/{week}"
+MAX_WEEKS_IN_MEMORY = 6
+
+_LOCK = threading.Lock()
+_WEEKS = OrderedDict()   # (season, week) -> {player_id: stat line}
+_POINTS = {}             # (season, week, scoring fingerprint) -> {player_id: points}
+_NAMES = {}              # player_id -> display name
+
+
+def _fetch_week(season, week):
+    stats = provider_http.get_json("sleeper", STATS_URL.format(season=season, week=week)) or {}
+    metrics.increment("player_store.weeks_loaded")
+    LOGGER.info(f"Loaded bulk stats for {len(stats)} players (season {season}, week {week})")
+    return stats
+
+
+def week_stats(season, week):
+    """
+    Returns {player_id: stat line} for every NFL player in a week, fetching it
+    once per process no matter how many leagues ask.
+    """
+    key = (int(season), int(week))
+    with _LOCK:
+        stats = _WEEKS.get(key)
+        if stats is not None:
+            _WEEKS.move_to_end(key)
+            metrics.increment("player_store.hits")
+            return stats
+    stats = singleflight.do(("sleeper-stats", key[0], key[1]), _fetch_week, key[0], key[1])
+    with _LOCK:
+        _WEEKS[key] = stats
+        _WEEKS.move_to_end(key)
+        while len(_WEEKS) > MAX_WEEKS_IN_MEMORY:
+            evicted, _ = _WEEKS.popitem(last=False)
+            for points_key in [k for k in _POINTS if k[:2] == evicted]:
+                del _POINTS[points_key]
+    return stats
+
+
+def scoring_fingerprint(scoring_settings):
+    """Stable hash of a league's scoring settings; leagues with identical scoring share points."""
+    encoded = json.dumps(scoring_settings or {}, sort_keys=True).encode("utf-8")
+    return hashlib.sha1(encoded).hexdigest()[:16]
+
+
+def weekly_points(season, week, scoring_settings):
+    """
+    Returns {player_id: fantasy points} for a week under the given Sleeper scoring
+    settings (stat line dotted with the scoring weights). Computed once per
+    distinct scoring format per week.
+    """
+    key = (int(season), int(week), scoring_fingerprint(scoring_settings))
+    with _LOCK:
+        points = _POINTS.get(key)
+    if points is not None:
+        return points
+
+    stats = week_stats(season, week)
+    weights = {stat: float(weight) for stat, weight in (scoring_settings or {}).items() if isinstance(weight, (int, float)) and weight}
+    points = {}
+    for player_id, line in stats.items():
+        total = 0.0
+        for stat, value in line.items():
+            weight = weights.get(stat)
+            if weight is not None and isinstance(value, (int, float)):
+                total += weight * value
+        points[player_id] = round(total, 2)
+    with _LOCK:
+        _POINTS[key] = points
+    return points
+
+
+def player_name(player_id):
+    """Shared player_id -> display name lookup built from the player index."""
+    player_id = str(player_id)
+    name = _NAMES.get(player_id)
+    if name is None:
+        name = sleeper_helper.get_player_name_from_id(player_id, sleeper_helper.load_players_data())
+        _NAMES[player_id] = name
+    return name
+
+
+def player_metadata(player_id):
+    """Position, team and name for a player from the shared player index."""
+    info = sleeper_helper.load_players_data().get(str(player_id)) or {}
+    return {
+        "name": player_name(player_id),
+        "position": info.get("position"),
+        "fantasy_positions": info.get("fantasy_positions") or [],
+        "team": info.get("team"),
+    }
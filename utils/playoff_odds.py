@@ -0,0 +1,236 @@
+import hashlib
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from streamlit.logger import get_logger
+from utils import metrics
+
+LOGGER = get_logger(__name__)
+
+# Monte Carlo playoff odds. Each simulated season draws every remaining game's scores
+# from the teams' scoring so far (normal, per-team mean and spread), adds the wins and
+# points to the current standings and seeds by wins, then points for.
+DEFAULT_SIMULATIONS = 200_000
+# Fixed shard count, so results for a seed don't depend on how many CPUs run them
+SHARDS = 8
+CHUNK_SIMULATIONS = 25_000
+MIN_WEEKS_PLAYED = 3
+MIN_STD = 8.0
+MAX_CACHED_WEEKS = 512
+POOL_WORKERS = int(os.environ.get("COMMISH_SIM_WORKERS", min(SHARDS, os.cpu_count() or 1)))
+
+_LOCK = threading.Lock()
+_CACHE = OrderedDict()  # (provider, league_id, season, week) -> odds
+_POOL = None
+
+
+def _get_pool():
+    """Process pool shared by every recap; spawned workers are safe to start from threaded servers."""
+    global _POOL
+    with _LOCK:
+        if _POOL is None and POOL_WORKERS > 1:
+            _POOL = ProcessPoolExecutor(max_workers=POOL_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _POOL
+
+
+def warm_up():
+    """Starts the pool's worker processes ahead of the first recap (spawned workers import numpy on start)."""
+    pool = _get_pool()
+    if pool is not None:
+        list(pool.map(simulate_shard, *zip(*[_tiny_job(seed) for seed in range(POOL_WORKERS)])))
+
+
+def _tiny_job(seed):
+    one = np.ones(2, dtype=np.float32)
+    return one, one, one, one, [np.array([[0, 1]])], 1, 1, seed
+
+
+def simulate_shard(wins, points_for, means, stds, schedule, playoff_spots, simulations, seed):
+    """
+    Simulates `simulations` seasons.
+
+    Args:
+    - wins, points_for, means, stds (ndarray): Per-team current wins, points for and scoring distribution.
+    - schedule (list): Per remaining week, an (games, 2) array of team indices.
+    - playoff_spots (int): Teams that make the playoffs.
+    - seed: Seed (or SeedSequence) for this shard's generator.
+
+    Returns:
+    - Tuple(ndarray, ndarray): Per-team counts of playoff berths and #1 seeds.
+    """
+    rng = np.random.default_rng(seed)
+    teams = len(wins)
+    weeks = len(schedule)
+    made = np.zeros(teams, dtype=np.int64)
+    top_seed = np.zeros(teams, dtype=np.int64)
+    # Teams on a bye score nothing that week
+    playing = np.zeros((weeks, teams), dtype=np.float32)
+    for week, games in enumerate(schedule):
+        playing[week, games.ravel()] = 1.0
+    for start in range(0, simulations, CHUNK_SIMULATIONS):
+        size = min(CHUNK_SIMULATIONS, simulations - start)
+        scores = (rng.standard_normal((size, weeks, teams), dtype=np.float32) * stds + means) * playing
+        season_wins = np.zeros((size, teams), dtype=np.float32)
+        for week, games in enumerate(schedule):
+            home, away = games[:, 0], games[:, 1]
+            home_scores, away_scores = scores[:, week, home], scores[:, week, away]
+            # A team plays at most once a week, so the fancy-indexed adds never collide
+            season_wins[:, home] += home_scores > away_scores
+            season_wins[:, away] += away_scores > home_scores
+        season_wins += wins
+        season_points = points_for + scores.sum(axis=1)
+        # Wins first, points for breaks ties (points stay far below the 1e6 wins multiplier)
+        seeding = np.argsort(-(season_wins.astype(np.float64) * 1e6 + season_points), axis=1)
+        made += np.bincount(seeding[:, :playoff_spots].ravel(), minlength=teams)
+        top_seed += np.bincount(seeding[:, 0], minlength=teams)
+    return made, top_seed
+
+
+def _seed_for(key):
+    return int(hashlib.sha256(repr(key).encode("utf-8")).hexdigest()[:16], 16)
+
+
+def simulate(wins, points_for, means, stds, schedule, playoff_spots, simulations=DEFAULT_SIMULATIONS, seed=0):
+    """
+    Runs `simulations` seasons in SHARDS deterministic shards, across the process pool when there is one.
+
+    Returns:
+    - Tuple(ndarray, ndarray): Per-team playoff and #1 seed probabilities.
+    """
+    args = [np.asarray(a, dtype=np.float32) for a in (wins, points_for, means, stds)]
+    schedule = [np.asarray(games, dtype=np.int64).reshape(-1, 2) for games in schedule]
+    per_shard = -(-simulations // SHARDS)
+    seeds = np.random.SeedSequence(seed).spawn(SHARDS)
+    shard_args = [(*args, schedule, playoff_spots, per_shard, shard_seed) for shard_seed in seeds]
+    pool = _get_pool()
+    if pool is None:
+        results = [simulate_shard(*shard) for shard in shard_args]
+    else:
+        results = list(pool.map(simulate_shard, *zip(*shard_args)))
+    made = sum(result[0] for result in results)
+    top_seed = sum(result[1] for result in results)
+    total = per_shard * SHARDS
+    return made / total, top_seed / total
+
+
+def team_distributions(scores):
+    """Per-team scoring mean and spread from a teams x weeks score matrix (NaN = didn't play)."""
+    means = np.nanmean(scores, axis=1)
+    league_std = np.nanstd(scores) if np.isfinite(scores).sum() > 1 else MIN_STD
+    counts = np.isfinite(scores).sum(axis=1)
+    with np.errstate(invalid="ignore"):
+        stds = np.where(counts > 1, np.nanstd(scores, axis=1, ddof=1), league_std)
+    stds = np.maximum(np.nan_to_num(stds, nan=league_std), MIN_STD)
+    return np.nan_to_num(means, nan=np.nanmean(scores)), stds
+
+
+def playoff_odds(key, tracker, remaining_games, playoff_spots, simulations=DEFAULT_SIMULATIONS):
+    """
+    Playoff odds for a league after a finalized week, cached per (provider, league_id, season, week).
+
+    Args:
+    - key (tuple): (provider, league_id, season, week).
+    - tracker (SeasonTracker): The league's power rankings tracker, up to date through `week`.
+    - remaining_games (list): One list of (team_id, team_id) games per remaining regular season week.
+    - playoff_spots (int): Teams that make the playoffs.
+
+    Returns:
+    - List[dict]: "team", "playoff_odds" and "top_seed_odds", best odds first. Empty when the
+      regular season is over or too few weeks were played to judge scoring.
+    """
+    odds = cached(key)
+    if odds is not None:
+        return odds
+
+    odds = []
+    index = {team_id: i for i, team_id in enumerate(tracker.team_ids)}
+    games = [
+        [(index[str(a)], index[str(b)]) for a, b in week if str(a) in index and str(b) in index]
+        for week in remaining_games
+    ]
+    games = [week for week in games if week]
+    if games and len(tracker.weeks) >= MIN_WEEKS_PLAYED and 0 < playoff_spots < len(index):
+        start = time.perf_counter()
+        means, stds = team_distributions(tracker.scores)
+        points_for = np.nansum(tracker.scores, axis=1)
+        made, top_seed = simulate(tracker.actual_wins, points_for, means, stds, games, playoff_spots, simulations, _seed_for(key))
+        elapsed = time.perf_counter() - start
+        metrics.observe("playoff_odds.simulate_seconds", elapsed)
+        LOGGER.info(f"Simulated {simulations} seasons for {key} in {elapsed:.2f}s")
+        odds = sorted(
+            (
+                {"team": tracker.names[team_id], "playoff_odds": float(made[i]), "top_seed_odds": float(top_seed[i])}
+                for team_id, i in index.items()
+            ),
+            key=lambda row: (-row["playoff_odds"], -row["top_seed_odds"]),
+        )
+
+    with _LOCK:
+        _CACHE[key] = odds
+        while len(_CACHE) > MAX_CACHED_WEEKS:
+            _CACHE.popitem(last=False)
+    return odds
+
+
+def cached(key):
+    """Cached odds for `key`, or None; callers check it before fetching the remaining schedule."""
+    with _LOCK:
+        if key in _CACHE:
+            _CACHE.move_to_end(key)
+            metrics.increment("playoff_odds.cache_hits")
+            return _CACHE[key]
+    return None
+
+
+def invalidate(provider, league_id, season):
+    """Drops a league season's cached odds (e.g. after a stat correction). Returns how many weeks were dropped."""
+    prefix = (provider, str(league_id), int(season))
+    with _LOCK:
+        stale = [key for key in _CACHE if key[:3] == prefix]
+        for key in stale:
+            del _CACHE[key]
+    return len(stale)
+
+
+def format_odds(odds):
+    """Markdown lines for the Playoff Odds section."""
+    return [
+        f"{rank}. **{row['team']}** - **{row['playoff_odds'] * 100:.1f}%** to make the playoffs"
+        + (f" ({row['top_seed_odds'] * 100:.1f}% for the #1 seed)" if row['top_seed_odds'] >= 0.001 else "")
+        + "\n"
+        for rank, row in enumerate(odds, start=1)
+    ]
+
+
+# Provider adapters: remaining regular season games as (team_id, team_id) pairs per week
+
+def espn_remaining_games(league, week):
+    """Remaining games from each team's schedule; ESPN loads it with the league."""
+    last_week = league.settings.reg_season_count
+    remaining = []
+    for future_week in range(week + 1, last_week + 1):
+        seen = set()
+        games = []
+        for team in league.teams:
+            if future_week - 1 >= len(team.schedule) or team.team_id in seen:
+                continue
+            opponent = team.schedule[future_week - 1]
+            if opponent is None or opponent.team_id == team.team_id:
+                continue
+            seen.update((team.team_id, opponent.team_id))
+            games.append((team.team_id, opponent.team_id))
+        remaining.append(games)
+    return remaining
+
+
+def pair_by_matchup(entries):
+    """(team_id, matchup_id) entries -> (team_id, team_id) games; unpaired teams are skipped."""
+    by_matchup = OrderedDict()
+    for team_id, matchup_id in entries:
+        if matchup_id is not None:
+            by_matchup.setdefault(matchup_id, []).append(team_id)
+    return [tuple(teams) for teams in by_matchup.values() if len(teams) == 2]
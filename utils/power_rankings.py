@@ -0,0 +1,273 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from streamlit.logger import get_logger
+from utils import metrics, week_archive
+
+LOGGER = get_logger(__name__)
+
+# All-play records, points-for rank and luck index over a league's completed weeks.
+# Each league keeps a teams x weeks score matrix plus running totals; a new finalized
+# week only adds its own column, so a recap never recomputes weeks it has seen.
+MAX_LEAGUES_IN_MEMORY = 256
+SHOWN_TEAMS = 5
+FETCH_WORKERS = 4
+OUTCOME_WINS = {"W": 1.0, "T": 0.5, "L": 0.0}
+
+_LOCK = threading.Lock()
+_TRACKERS = OrderedDict()  # (provider, league_id, season) -> SeasonTracker
+
+
+def all_play_counts(scores):
+    """
+    All-play results for a teams x weeks score matrix (NaN where a team didn't play).
+
+    Returns:
+    - Tuple(ndarray, ndarray, ndarray, ndarray): Per-team all-play wins, losses and ties,
+      and expected wins (each week's all-play win share, summed over weeks).
+    """
+    a = scores[:, None, :]
+    b = scores[None, :, :]
+    played = ~np.isnan(a) & ~np.isnan(b)
+    played &= ~np.eye(scores.shape[0], dtype=bool)[:, :, None]  # No team plays itself
+    beat = (a > b) & played
+    tied = (a == b) & played
+    wins_by_week = beat.sum(axis=1)
+    ties_by_week = tied.sum(axis=1)
+    opponents = played.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        share = np.where(opponents > 0, (wins_by_week + 0.5 * ties_by_week) / opponents, 0.0)
+    wins = wins_by_week.sum(axis=1)
+    ties = ties_by_week.sum(axis=1)
+    return wins, opponents.sum(axis=1) - wins - ties, ties, share.sum(axis=1)
+
+
+class SeasonTracker:
+    """Incrementally updated season score matrix and all-play totals for one league."""
+
+    def __init__(self):
+        self.team_ids = []
+        self.names = {}
+        self.weeks = []
+        self.scores = np.zeros((0, 0))
+        self.all_play = np.zeros((0, 3))   # wins, losses, ties
+        self.expected_wins = np.zeros(0)
+        self.actual_wins = np.zeros(0)
+        self.games = np.zeros(0)
+        self._lock = threading.Lock()
+
+    def missing_weeks(self, through_week):
+        """Completed weeks (1..through_week) not yet added."""
+        seen = set(self.weeks)
+        return [week for week in range(1, through_week + 1) if week not in seen]
+
+    def _ensure_teams(self, team_ids):
+        new = [team_id for team_id in team_ids if team_id not in self.names]
+        if not new:
+            return
+        self.team_ids.extend(new)
+        grow = len(new)
+        self.scores = np.vstack([self.scores, np.full((grow, self.scores.shape[1]), np.nan)])
+        self.all_play = np.vstack([self.all_play, np.zeros((grow, 3))])
+        self.expected_wins = np.concatenate([self.expected_wins, np.zeros(grow)])
+        self.actual_wins = np.concatenate([self.actual_wins, np.zeros(grow)])
+        self.games = np.concatenate([self.games, np.zeros(grow)])
+
+    def add_weeks(self, results_by_week):
+        """
+        Adds finalized weeks in one vectorized block; weeks already added are ignored.
+
+        Args:
+        - results_by_week (dict): {week: [(team_id, team_name, points, outcome)]}, with
+          outcome "W", "L", "T" or None (no game, e.g. a bye).
+
+        Returns:
+        - int: Number of weeks added.
+        """
+        with self._lock:
+            weeks = sorted(week for week, rows in results_by_week.items() if week not in self.weeks and rows)
+            if not weeks:
+                return 0
+            # Team ids are kept as strings so fresh and archived weeks line up
+            results_by_week = {
+                week: [(str(team_id), name, points, outcome) for team_id, name, points, outcome in results_by_week[week]]
+                for week in weeks
+            }
+            for week in weeks:
+                for team_id, name, _, _ in results_by_week[week]:
+                    self._ensure_teams([team_id])
+                    self.names[team_id] = name
+            index = {team_id: i for i, team_id in enumerate(self.team_ids)}
+
+            block = np.full((len(self.team_ids), len(weeks)), np.nan)
+            won = np.zeros(len(self.team_ids))
+            games = np.zeros(len(self.team_ids))
+            for column, week in enumerate(weeks):
+                for team_id, _, points, outcome in results_by_week[week]:
+                    block[index[team_id], column] = points
+                    if outcome in OUTCOME_WINS:
+                        won[index[team_id]] += OUTCOME_WINS[outcome]
+                        games[index[team_id]] += 1
+
+            wins, losses, ties, expected = all_play_counts(block)
+            self.all_play += np.column_stack([wins, losses, ties])
+            self.expected_wins += expected
+            self.actual_wins += won
+            self.games += games
+            self.scores = np.hstack([self.scores, block])
+            self.weeks.extend(weeks)
+            metrics.increment("power_rankings.weeks_added", len(weeks))
+            return len(weeks)
+
+    def rankings(self):
+        """
+        Teams ordered by all-play win percentage (points for breaks ties).
+
+        Returns:
+        - List[dict]: "team", "all_play" (wins, losses, ties), "all_play_pct", "points_for",
+          "points_for_rank", "wins", "expected_wins" and "luck" (actual minus all-play expected wins).
+        """
+        with self._lock:
+            if not self.team_ids:
+                return []
+            wins, losses, ties = self.all_play.T
+            total = wins + losses + ties
+            with np.errstate(invalid="ignore", divide="ignore"):
+                pct = np.where(total > 0, (wins + 0.5 * ties) / total, 0.0)
+            points_for = np.nansum(self.scores, axis=1)
+            points_for_rank = np.empty(len(points_for), dtype=int)
+            points_for_rank[np.argsort(-points_for, kind="stable")] = np.arange(1, len(points_for) + 1)
+            # lexsort sorts by the last key first
+            order = np.lexsort((-points_for, -pct))
+            return [
+                {
+                    "team": self.names[self.team_ids[i]],
+                    "all_play": (int(wins[i]), int(losses[i]), int(ties[i])),
+                    "all_play_pct": float(pct[i]),
+                    "points_for": round(float(points_for[i]), 2),
+                    "points_for_rank": int(points_for_rank[i]),
+                    "wins": float(self.actual_wins[i]),
+                    "expected_wins": round(float(self.expected_wins[i]), 2),
+                    "luck": round(float(self.actual_wins[i] - self.expected_wins[i]), 2),
+                }
+                for i in order
+            ]
+
+
+def get_tracker(provider, league_id, season):
+    """Returns the league's season tracker, creating it on first use."""
+    key = (provider, str(league_id), int(season))
+    with _LOCK:
+        tracker = _TRACKERS.get(key)
+        if tracker is None:
+            tracker = _TRACKERS[key] = SeasonTracker()
+        _TRACKERS.move_to_end(key)
+        while len(_TRACKERS) > MAX_LEAGUES_IN_MEMORY:
+            _TRACKERS.popitem(last=False)
+        return tracker
+
+
+def invalidate(provider, league_id, season):
+    """Drops a league's tracker (e.g. after a stat correction); the next update rebuilds it."""
+    with _LOCK:
+        return _TRACKERS.pop((provider, str(league_id), int(season)), None) is not None
+
+
+def update(provider, league_id, season, through_week, fetch_week):
+    """
+    Brings a league's tracker up to `through_week` and returns its rankings. Only weeks
+    the tracker hasn't seen are loaded: from the local week archive when they are there,
+    otherwise fetched concurrently.
+
+    Args:
+    - fetch_week (callable): week -> [(team_id, team_name, points, outcome)].
+    """
+    tracker = get_tracker(provider, league_id, season)
+    missing = tracker.missing_weeks(through_week)
+    if missing:
+        fetched = {
+            week: pair_outcomes(pairs)
+            for week, pairs in week_archive.week_pairs(provider, league_id, season, missing).items()
+        }
+        to_fetch = [week for week in missing if week not in fetched]
+        if to_fetch:
+            with ThreadPoolExecutor(max_workers=min(FETCH_WORKERS, len(to_fetch))) as executor:
+                fetched.update(zip(to_fetch, executor.map(fetch_week, to_fetch)))
+        added = tracker.add_weeks(fetched)
+        LOGGER.info(f"Power rankings for {provider} league {league_id}: added {added} week(s) through week {through_week}")
+    return tracker.rankings()
+
+
+def pair_outcomes(pairs):
+    """
+    Week rows from head-to-head pairs.
+
+    Args:
+    - pairs (iterable): [(team_id, team_name, points), ...] per matchup; a single team is a bye.
+
+    Returns:
+    - list: (team_id, team_name, points, outcome) rows.
+    """
+    rows = []
+    for pair in pairs:
+        if len(pair) != 2:
+            rows.extend((team_id, name, points, None) for team_id, name, points in pair)
+            continue
+        (a_id, a_name, a_points), (b_id, b_name, b_points) = pair
+        a_outcome = "W" if a_points > b_points else "L" if a_points < b_points else "T"
+        b_outcome = {"W": "L", "L": "W", "T": "T"}[a_outcome]
+        rows.append((a_id, a_name, a_points, a_outcome))
+        rows.append((b_id, b_name, b_points, b_outcome))
+    return rows
+
+
+def format_rankings(rankings, shown=SHOWN_TEAMS):
+    """Markdown power rankings lines plus the luckiest and unluckiest teams."""
+    lines = [
+        f"{rank}. **{row['team']}** - All-play {row['all_play'][0]}-{row['all_play'][1]}"
+        + (f"-{row['all_play'][2]}" if row['all_play'][2] else "")
+        + f" ({row['all_play_pct']:.3f}), {row['points_for']:.2f} PF (#{row['points_for_rank']}), luck {row['luck']:+.2f}\n"
+        for rank, row in enumerate(rankings[:shown], start=1)
+    ]
+    if len(rankings) > 1:
+        luckiest = max(rankings, key=lambda row: row["luck"])
+        unluckiest = min(rankings, key=lambda row: row["luck"])
+        lines.append(
+            f"**Luckiest:** {luckiest['team']} ({luckiest['luck']:+.2f} wins vs all-play) | "
+            f"**Unluckiest:** {unluckiest['team']} ({unluckiest['luck']:+.2f} wins vs all-play)\n"
+        )
+    return lines
+
+
+# Provider adapters: week -> [(team_id, team_name, points, outcome)]
+
+def espn_week_rows(league, week, clean=lambda name: name):
+    """Week rows from the season scores and outcomes espn_api already loads with the league."""
+    rows = []
+    for team in league.teams:
+        if week - 1 < len(team.scores):
+            outcome = team.outcomes[week - 1] if week - 1 < len(team.outcomes) else None
+            rows.append((team.team_id, clean(team.team_name), team.scores[week - 1], outcome if outcome in OUTCOME_WINS else None))
+    return rows
+
+
+def sleeper_week_rows(matchups, user_team_mapping, roster_owner_mapping):
+    """Week rows from one week of Sleeper matchups, paired by matchup_id."""
+    pairs = OrderedDict()
+    for matchup in matchups:
+        roster_id = matchup.get('roster_id')
+        team_name = user_team_mapping.get(roster_owner_mapping.get(roster_id), "Unknown Team")
+        entry = (roster_id, team_name, matchup.get('points') or 0)
+        matchup_id = matchup.get('matchup_id')
+        # Teams without a matchup_id (byes, some playoff brackets) have no opponent
+        pairs.setdefault(matchup_id if matchup_id is not None else ("bye", roster_id), []).append(entry)
+    return pair_outcomes(pairs.values())
+
+
+def yahoo_week_rows(matchups):
+    """Week rows from one week of Yahoo league matchups."""
+    pairs = []
+    for matchup in matchups:
+        pairs.append([(team.team_id, team.name.decode('utf-8'), team.team_points.total) for team in matchup.teams])
+    return pair_outcomes(pairs)
@@ -0,0 +1,170 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+import pytz
+from streamlit.logger import get_logger
+from utils import helper, metrics, season_calendar, summary_generator
+
+LOGGER = get_logger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Leagues opted in to precompute. Holds credentials for private leagues, so it is not committed.
+REGISTRY_PATH = os.environ.get("COMMISH_PRECOMPUTE_REGISTRY", os.path.join(PROJECT_ROOT, "precompute_leagues.json"))
+MAX_WORKERS = 4
+POLL_INTERVAL_SECONDS = 300
+
+EST = pytz.timezone('US/Eastern')
+
+
+def load_registry(path=REGISTRY_PATH):
+    """
+    Loads the list of opted-in leagues.
+
+    The file is a JSON list of objects with "provider" ("sleeper", "espn" or
+    "yahoo") and "league_id", plus "espn_s2"/"swid" for ESPN and "auth_dir" for Yahoo.
+
+    Returns:
+    - list: League entries, or an empty list if the registry doesn't exist.
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def warm_league(entry):
+    """Computes (and so caches) the stat summary for one registry entry."""
+    return summary_generator.get_league_summary(
+        entry.get("provider", ""),
+        entry["league_id"],
+        espn_s2=entry.get("espn_s2"),
+        swid=entry.get("swid"),
+        auth_dir=entry.get("auth_dir"),
+    )
+
+
+def entry_key(entry):
+    return entry.get("provider", "").lower(), str(entry["league_id"])
+
+
+def precompute_week(entries, season_year, week, max_workers=MAX_WORKERS, on_warmed=None):
+    """
+    Warms the summary cache for every entry with a bounded worker pool.
+
+    Args:
+    - on_warmed (callable): Called with each entry whose summary was built.
+
+    Returns:
+    - dict: Run report with counts, throughput (leagues/second) and lag behind finalization.
+    """
+    finalized = season_calendar.get_calendar(season_year).finalized_at(week)
+    start = time.perf_counter()
+    warmed, failed, lags = 0, 0, []
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="precompute") as pool:
+        futures = {pool.submit(warm_league, entry): entry for entry in entries}
+        for future in as_completed(futures):
+            entry = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                failed += 1
+                metrics.increment("precompute.failures", provider=entry.get("provider"))
+                LOGGER.warning(f"Precompute failed for {entry.get('provider')} league {entry.get('league_id')}: {e}")
+                continue
+            warmed += 1
+            if on_warmed:
+                on_warmed(entry)
+            lag = (datetime.now(EST) - finalized).total_seconds()
+            lags.append(lag)
+            metrics.increment("precompute.leagues_warmed", provider=entry.get("provider"))
+            metrics.observe("precompute.lag_seconds", lag, provider=entry.get("provider"))
+
+    elapsed = time.perf_counter() - start
+    report = {
+        "season": season_year,
+        "week": week,
+        "leagues": len(entries),
+        "warmed": warmed,
+        "failed": failed,
+        "elapsed_seconds": round(elapsed, 2),
+        "throughput_per_second": round(warmed / elapsed, 2) if elapsed else 0.0,
+        "max_lag_seconds": round(max(lags), 1) if lags else None,
+    }
+    metrics.set_gauge("precompute.throughput_per_second", report["throughput_per_second"])
+    metrics.set_gauge("precompute.last_week", week)
+    LOGGER.info(f"Precompute report: {report}")
+    return report
+
+
+class PrecomputeScheduler:
+    """
+    Background thread that waits for each week to finalize (see
+    `helper.get_last_completed_week`) and then precomputes recaps for every
+    registered league, so peak-hour requests are cache hits. Leagues that failed are
+    retried on the next poll, and warmed ones are warmed again once their finalized
+    summary has expired from the cache.
+    """
+
+    def __init__(self, registry_path=REGISTRY_PATH, max_workers=MAX_WORKERS, poll_interval=POLL_INTERVAL_SECONDS):
+        self.registry_path = registry_path
+        self.max_workers = max_workers
+        self.poll_interval = poll_interval
+        self.week = None
+        self.warmed_at = {}  # entry_key -> monotonic time its summary was last built for self.week
+        self.last_report = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="precompute-scheduler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def run_once(self, now=None):
+        """
+        Precomputes the latest finalized week for every league not warmed yet (or whose
+        summary has expired since). Returns the run report, or None if nothing was due.
+        """
+        now = now or datetime.now(EST)
+        season_year = helper.get_nfl_season_year(now)
+        week = helper.get_last_completed_week(now)
+        if not helper.is_week_finalized(week, now):
+            return None
+        if self.week != (season_year, week):
+            self.week, self.warmed_at = (season_year, week), {}
+        entries = [entry for entry in load_registry(self.registry_path) if self._expired(entry)]
+        if not entries:
+            return None
+        self.last_report = precompute_week(entries, season_year, week, self.max_workers, on_warmed=self._warmed)
+        return self.last_report
+
+    def _expired(self, entry):
+        key = entry_key(entry)
+        if key not in self.warmed_at:
+            return True
+        return time.monotonic() - self.warmed_at[key] >= summary_generator.finalized_summary_ttl(key[0])
+
+    def _warmed(self, entry):
+        self.warmed_at[entry_key(entry)] = time.monotonic()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                LOGGER.exception("Precompute run failed")
+            self._stop.wait(self.poll_interval)
+
+
+def start_scheduler(registry_path=REGISTRY_PATH):
+    """Starts the scheduler if any leagues are registered. Returns it, or None."""
+    if not load_registry(registry_path):
+        LOGGER.info(f"No leagues registered for precompute at {registry_path}")
+        return None
+    return PrecomputeScheduler(registry_path).start()
@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+from streamlit.logger import get_logger
+from utils import metrics, resilience
+
+LOGGER = get_logger(__name__)
+
+# urllib3 only advertises "br" when a brotli decoder is installed, so we never
+# ask for an encoding we can't decode.
+ACCEPT_ENCODING_HEADER = ACCEPT_ENCODING
+# Stored responses (validators + body) kept in memory for conditional requests.
+MAX_CACHED_RESPONSES = 256
+DEFAULT_TIMEOUT = 10
+
+_LOCK = threading.Lock()
+_VALIDATORS = OrderedDict()
+_SESSION = None
+
+
+def get_session():
+    """Returns the process-wide keep-alive session used for provider HTTP calls."""
+    global _SESSION
+    with _LOCK:
+        if _SESSION is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=32)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({"Accept-Encoding": ACCEPT_ENCODING_HEADER, "User-Agent": "commish.ai"})
+            _SESSION = session
+        return _SESSION
+
+
+def _stored(url):
+    with _LOCK:
+        entry = _VALIDATORS.get(url)
+        if entry is not None:
+            _VALIDATORS.move_to_end(url)
+        return entry
+
+
+def _store(url, etag, last_modified, body):
+    if not etag and not last_modified:
+        return
+    with _LOCK:
+        _VALIDATORS[url] = {"etag": etag, "last_modified": last_modified, "body": body}
+        _VALIDATORS.move_to_end(url)
+        while len(_VALIDATORS) > MAX_CACHED_RESPONSES:
+            _VALIDATORS.popitem(last=False)
+
+
+def _conditional_headers(entry):
+    headers = {}
+    if entry:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def _record_transfer(provider, response):
+    """Counts wire bytes and what compression saved us, when the server tells us the wire size."""
+    decoded = len(response.content)
+    wire = response.headers.get("Content-Length")
+    metrics.increment("http.bytes_decoded", decoded, provider=provider)
+    if wire and response.headers.get("Content-Encoding"):
+        try:
+            metrics.increment("http.bytes_received", int(wire), provider=provider)
+            metrics.increment("http.bytes_saved_compression", max(0, decoded - int(wire)), provider=provider)
+            return
+        except ValueError:
+            pass
+    metrics.increment("http.bytes_received", decoded, provider=provider)
+
+
+def _fetch(provider, url, params, timeout, entry, cookies=None):
+    """Returns (body, changed, etag, last_modified)."""
+    response = get_session().get(url, params=params, headers=_conditional_headers(entry), cookies=cookies, timeout=timeout)
+    metrics.increment("http.requests", provider=provider)
+    if response.status_code == 304 and entry:
+        metrics.increment("http.not_modified", provider=provider)
+        metrics.increment("http.bytes_saved_304", len(entry["body"]), provider=provider)
+        return entry["body"], False, entry.get("etag"), entry.get("last_modified")
+    response.raise_for_status()
+    _record_transfer(provider, response)
+    return response.content, True, response.headers.get("ETag"), response.headers.get("Last-Modified")
+
+
+def get_bytes(provider, url, params=None, timeout=DEFAULT_TIMEOUT, cookies=None):
+    """
+    GETs `url` with conditional validators from earlier responses.
+
+    A 304 answer is served from the stored body. Calls go through the shared
+    resilience layer, so they are rate limited, retried and circuit broken.
+    Requests with `cookies` (private league credentials) get their own stored
+    responses, keyed by a fingerprint of the cookies.
+
+    Returns:
+    - Tuple(bytes, bool): The response body and whether it changed since the last fetch.
+    """
+    cache_key = requests.Request("GET", url, params=params).prepare().url
+    if cookies:
+        cache_key += "#" + hashlib.sha256(json.dumps(cookies, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    entry = _stored(cache_key)
+    body, changed, etag, last_modified = resilience.call(provider, _fetch, provider, url, params, timeout, entry, cookies)
+    if changed:
+        _store(cache_key, etag, last_modified, body)
+    return body, changed
+
+
+def get_json(provider, url, params=None, timeout=DEFAULT_TIMEOUT, cookies=None):
+    """GETs and decodes a JSON document, revalidating it with the provider when possible."""
+    body, _ = get_bytes(provider, url, params=params, timeout=timeout, cookies=cookies)
+    return json.loads(body)
+
+
+def download_to_file(provider, url, path, timeout=60):
+    """
+    Downloads `url` into `path`, keeping the validators in a sidecar file so the
+    next run can send a conditional request and skip the download on a 304.
+
+    Returns:
+    - bool: True if the file was (re)written, False if the server said it was unchanged.
+    """
+    meta_path = os.path.splitext(path)[0] + ".meta.json"
+    entry = None
+    if os.path.exists(path) and os.path.exists(meta_path):
+        with open(meta_path, "r") as f:
+            meta = json.load(f)
+        with open(path, "rb") as f:
+            entry = {"etag": meta.get("etag"), "last_modified": meta.get("last_modified"), "body": f.read()}
+
+    body, changed, etag, last_modified = resilience.call(provider, _fetch, provider, url, None, timeout, entry)
+    if not changed:
+        LOGGER.info(f"{url} not modified; keeping {path}")
+        return False
+
+    with open(path, "wb") as f:
+        f.write(body)
+    with open(meta_path, "w") as f:
+        json.dump({"etag": etag, "last_modified": last_modified}, f)
+    return True
+
+
+def stats():
+    """
+    Per-provider conditional-request and compression savings.
+
+    Returns:
+    - dict: {provider: {"requests", "not_modified", "hit_rate_304", "bytes_saved_304", "bytes_saved_compression"}}
+    """
+    counters = metrics.snapshot()["counters"]
+    report = {}
+    for provider in resilience.PROVIDER_LIMITS:
+        requests_made = counters.get(f"http.requests{{provider={provider}}}", 0)
+        not_modified = counters.get(f"http.not_modified{{provider={provider}}}", 0)
+        report[provider] = {
+            "requests": requests_made,
+            "not_modified": not_modified,
+            "hit_rate_304": not_modified / requests_made if requests_made else 0.0,
+            "bytes_saved_304": counters.get(f"http.bytes_saved_304{{provider={provider}}}", 0),
+            "bytes_saved_compression": counters.get(f"http.bytes_saved_compression{{provider={provider}}}", 0),
+        }
+    return report
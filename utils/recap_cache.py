@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from streamlit.logger import get_logger
+from utils import metrics, week_archive
+
+LOGGER = get_logger(__name__)
+
+# What a league week's recap was built from: the raw result of every stat section, the
+# headline facts and the LLM recaps written from them. After a stat correction, sections
+# the correction can't have touched are reused instead of recomputed, and an LLM recap is
+# reused as long as the headline facts it was written from are unchanged.
+MAX_CACHED_WEEKS = 1024
+MAX_RECAPS = 4096
+# Sections whose results are the facts an LLM recap is written around
+HEADLINE_SECTIONS = ("top_team", "top_player", "blowout", "closest")
+# Recaps written by another process (offline batch generation) are shared through
+# files under the archive directory; a memory miss looks there before giving up.
+RECAP_DIR = os.path.join(week_archive.ARCHIVE_DIR, "recaps")
+
+_LOCK = threading.Lock()
+_ENTRIES = OrderedDict()  # (provider, league_id, week) -> entry
+_LATEST = {}  # (provider, league_id) -> week of the newest entry
+_RECAPS = OrderedDict()  # (provider, league_id, headline_hash, persona, trash_talk) -> recap text
+
+
+def _key(provider, league_id, week):
+    return (provider, str(league_id), int(week))
+
+
+def content_hash(value):
+    """Stable short hash of a JSON-able value (tuples hash like lists)."""
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+def headline_hash(week, results):
+    """Hash of a week's headline facts; missing sections count as empty."""
+    return content_hash([int(week)] + [results.get(name) for name in HEADLINE_SECTIONS])
+
+
+def store_sections(provider, league_id, week, sections):
+    """Records a freshly built recap's raw section results (before formatting); clears any stale marks."""
+    key = _key(provider, league_id, week)
+    with _LOCK:
+        _ENTRIES[key] = {"sections": dict(sections), "stale": set(), "headlines": None, "updated": time.time()}
+        _ENTRIES.move_to_end(key)
+        _LATEST[key[:2]] = max(key[2], _LATEST.get(key[:2], 0))
+        while len(_ENTRIES) > MAX_CACHED_WEEKS:
+            _ENTRIES.popitem(last=False)
+
+
+def store_headlines(provider, league_id, week, results):
+    """Records the headline facts of a week's recap. Returns their hash."""
+    digest = headline_hash(week, results)
+    with _LOCK:
+        entry = _ENTRIES.get(_key(provider, league_id, week))
+        if entry is not None:
+            entry["headlines"] = digest
+    return digest
+
+
+def mark_stale(provider, league_id, week, sections):
+    """Marks sections of a cached week as out of date (a stat correction touched them)."""
+    with _LOCK:
+        entry = _ENTRIES.get(_key(provider, league_id, week))
+        if entry is not None:
+            entry["stale"].update(sections)
+
+
+def reusable_sections(provider, league_id, week):
+    """
+    Section results of the last build of a week that a stat correction left valid.
+
+    Returns:
+    - dict: {section name: raw result}; empty when the week was never built or nothing
+      is stale (a plain cache expiry recomputes every section).
+    """
+    with _LOCK:
+        entry = _ENTRIES.get(_key(provider, league_id, week))
+        if entry is None or not entry["stale"]:
+            return {}
+        reused = {name: value for name, value in entry["sections"].items() if name not in entry["stale"]}
+    if reused:
+        metrics.increment("recap_cache.sections_reused", len(reused), provider=provider)
+    return reused
+
+
+def current_headlines(provider, league_id):
+    """Headline hash of the newest recap built for a league, or None."""
+    with _LOCK:
+        week = _LATEST.get((provider, str(league_id)))
+        entry = _ENTRIES.get((provider, str(league_id), week)) if week is not None else None
+        return entry["headlines"] if entry else None
+
+
+def recap_path(key, root=None):
+    provider, league_id, headlines, persona, trash_talk = key
+    return os.path.join(
+        root or RECAP_DIR, f"provider={provider}", f"league_id={league_id}", headlines,
+        f"{content_hash([persona, trash_talk])}.json",
+    )
+
+
+def _load_recap(key, root=None):
+    try:
+        with open(recap_path(key, root)) as f:
+            return json.load(f).get("recap")
+    except (OSError, ValueError):
+        return None
+
+
+def _save_recap(key, recap, root=None):
+    path = recap_path(key, root)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temp, "w") as f:
+            json.dump({"persona": key[3], "trash_talk": key[4], "recap": recap, "written": time.time()}, f)
+        os.replace(temp, path)
+        return True
+    except OSError as e:
+        LOGGER.warning(f"Could not save recap for {key[0]} league {key[1]}: {e}")
+        return False
+
+
+def _remember(key, recap):
+    with _LOCK:
+        _RECAPS[key] = recap
+        _RECAPS.move_to_end(key)
+        while len(_RECAPS) > MAX_RECAPS:
+            _RECAPS.popitem(last=False)
+
+
+def get_recap(provider, league_id, persona, trash_talk, headlines=None, root=None):
+    """
+    LLM recap written for the league's current headline facts, or None.
+
+    Args:
+    - headlines (str): Headline hash to match; defaults to the newest recap's.
+    """
+    headlines = headlines or current_headlines(provider, league_id)
+    if headlines is None:
+        return None
+    key = (provider, str(league_id), headlines, str(persona), str(trash_talk))
+    with _LOCK:
+        recap = _RECAPS.get(key)
+        if recap is not None:
+            _RECAPS.move_to_end(key)
+    if recap is None:
+        recap = _load_recap(key, root)
+        if recap is not None:
+            _remember(key, recap)
+            metrics.increment("recap_cache.recap_disk_hits", provider=provider)
+    metrics.increment("recap_cache.recap_hits" if recap is not None else "recap_cache.recap_misses", provider=provider)
+    return recap
+
+
+def store_recap(provider, league_id, persona, trash_talk, recap, headlines=None, persist=False, root=None):
+    """
+    Caches an LLM recap under the headline facts it was written from. Returns False if there are none.
+
+    Args:
+    - persist (bool): Also write it to disk, for other processes (the app reading batch-written recaps).
+    """
+    headlines = headlines or current_headlines(provider, league_id)
+    if headlines is None or not recap:
+        return False
+    key = (provider, str(league_id), headlines, str(persona), str(trash_talk))
+    _remember(key, recap)
+    if persist:
+        return _save_recap(key, recap, root)
+    return True
@@ -0,0 +1,318 @@
+import random
+import threading
+import time
+from collections import OrderedDict
+import requests
+from streamlit.logger import get_logger
+from utils import metrics
+
+LOGGER = get_logger(__name__)
+
+# Hosts behind each provider SDK, with the sustained request rate (per second)
+# and burst size we allow ourselves against them from one process.
+PROVIDER_LIMITS = {
+    "espn": {"host": "lm-api-reads.fantasy.espn.com", "rate": 5.0, "burst": 10},
+    "sleeper": {"host": "api.sleeper.app", "rate": 15.0, "burst": 30},
+    "yahoo": {"host": "fantasysports.yahooapis.com", "rate": 3.0, "burst": 6},
+}
+
+MAX_RETRIES = 3
+BASE_BACKOFF_SECONDS = 0.5
+MAX_BACKOFF_SECONDS = 8.0
+# Longest a caller waits for a rate-limit token before we treat the provider as saturated.
+MAX_TOKEN_WAIT_SECONDS = 10.0
+FAILURE_THRESHOLD = 5
+RESET_TIMEOUT_SECONDS = 30.0
+# A half-open trial call still in flight after this long is given up on and another one is let through.
+TRIAL_TIMEOUT_SECONDS = 60.0
+# Last good summaries kept for serving while a provider is down (least recently used go first)
+MAX_LAST_GOOD = 1024
+
+
+class ProviderUnavailable(Exception):
+    """
+    Raised instead of calling a provider whose circuit is open (or whose rate
+    limit is saturated). `stale` carries the last good result when one exists,
+    so callers can show it instead of an error.
+    """
+
+    def __init__(self, provider, message, retry_after=None, stale=None):
+        super().__init__(message)
+        self.provider = provider
+        self.retry_after = retry_after
+        self.stale = stale
+
+    def __reduce__(self):
+        # Keeps the error intact across the batch job's worker processes
+        return type(self), (self.provider, str(self), self.retry_after, self.stale)
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, holding at most `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, timeout=MAX_TOKEN_WAIT_SECONDS):
+        """Blocks until a token is available. Returns False if that would take longer than `timeout`."""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def available(self):
+        with self.lock:
+            self._refill(time.monotonic())
+            return self.tokens
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive transient failures and fails fast
+    for `reset_timeout` seconds. After that one trial call is let through
+    (half-open); its outcome closes or re-opens the circuit. A trial that hangs
+    for `trial_timeout` seconds is replaced by a new one.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT_SECONDS, trial_timeout=TRIAL_TIMEOUT_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.trial_timeout = trial_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_started_at = 0.0
+        self.lock = threading.Lock()
+
+    def allow(self):
+        """Returns (allowed, seconds_until_retry)."""
+        with self.lock:
+            now = time.monotonic()
+            if self.state == self.OPEN:
+                elapsed = now - self.opened_at
+                if elapsed < self.reset_timeout:
+                    return False, self.reset_timeout - elapsed
+                self.state = self.HALF_OPEN
+                self.trial_started_at = now
+                return True, 0.0
+            if self.state == self.HALF_OPEN:
+                if now - self.trial_started_at < self.trial_timeout:
+                    # A trial call is already in flight
+                    return False, 1.0
+                self.trial_started_at = now
+                return True, 0.0
+            return True, 0.0
+
+    def release_trial(self):
+        """Re-opens a half-open circuit whose trial call never got an outcome, so the next call is the trial."""
+        with self.lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+
+    def record_success(self):
+        with self.lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        """Records a transient failure. Returns True if this call opened the circuit."""
+        with self.lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                opened = self.state != self.OPEN
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                return opened
+            return False
+
+
+_LOCK = threading.Lock()
+_BUCKETS = {}
+_BREAKERS = {}
+_LAST_GOOD = OrderedDict()  # summary key -> last good result
+
+
+def configure(provider, rate=None, burst=None):
+    """Overrides the rate limit for a provider, e.g. to split it across worker processes."""
+    with _LOCK:
+        limits = PROVIDER_LIMITS.setdefault(provider, {"host": provider, "rate": 5.0, "burst": 10})
+        if rate is not None:
+            limits["rate"] = rate
+        if burst is not None:
+            limits["burst"] = burst
+        _BUCKETS.pop(limits["host"], None)
+
+
+def _bucket_for(provider):
+    limits = PROVIDER_LIMITS.get(provider, {"host": provider, "rate": 5.0, "burst": 10})
+    with _LOCK:
+        bucket = _BUCKETS.get(limits["host"])
+        if bucket is None:
+            bucket = TokenBucket(limits["rate"], limits["burst"])
+            _BUCKETS[limits["host"]] = bucket
+        return bucket
+
+
+def _breaker_for(provider):
+    with _LOCK:
+        breaker = _BREAKERS.get(provider)
+        if breaker is None:
+            breaker = CircuitBreaker()
+            _BREAKERS[provider] = breaker
+        return breaker
+
+
+def _status_code(exc):
+    response = getattr(exc, "response", None)
+    return getattr(response, "status_code", None)
+
+
+def is_transient(exc):
+    """
+    Whether an error is worth retrying: connection problems, timeouts, 429s and 5xx.
+    SDK errors are matched by name so this module does not import the SDKs.
+    """
+    if isinstance(exc, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    status = _status_code(exc)
+    if status is not None:
+        return status == 429 or status >= 500
+    # sleeper_wrapper calls .json() on whatever came back, so throttling and
+    # gateway errors surface as JSON decode errors.
+    if isinstance(exc, requests.exceptions.JSONDecodeError):
+        return True
+    return type(exc).__name__ in ("ESPNUnknownError",)
+
+
+def _retry_after(exc):
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt):
+    """Full-jitter exponential backoff for the given (0-based) retry attempt."""
+    return random.uniform(0, min(MAX_BACKOFF_SECONDS, BASE_BACKOFF_SECONDS * (2 ** attempt)))
+
+
+def call(provider, fn, *args, idempotent=True, **kwargs):
+    """
+    Calls a provider SDK/HTTP function under the provider's rate limit and circuit breaker.
+
+    Idempotent calls (every GET we make) are retried on transient errors with
+    jittered exponential backoff, honouring Retry-After when the provider sends it.
+
+    Args:
+    - provider (str): "espn", "sleeper" or "yahoo".
+    - fn (callable): The function performing the request.
+    - idempotent (bool): Only idempotent calls are retried.
+
+    Returns:
+    - Whatever `fn` returns.
+
+    Raises:
+    - ProviderUnavailable: If the provider's circuit is open or its rate limit is saturated.
+    """
+    breaker = _breaker_for(provider)
+    bucket = _bucket_for(provider)
+    attempts = MAX_RETRIES + 1 if idempotent else 1
+
+    for attempt in range(attempts):
+        allowed, retry_after = breaker.allow()
+        if not allowed:
+            metrics.increment("resilience.short_circuited", provider=provider)
+            raise ProviderUnavailable(provider, f"{provider} is temporarily unavailable", retry_after=retry_after)
+        trial = breaker.state == CircuitBreaker.HALF_OPEN
+        recorded = False
+        try:
+            if not bucket.acquire():
+                metrics.increment("resilience.rate_limited", provider=provider)
+                raise ProviderUnavailable(provider, f"{provider} request budget exhausted", retry_after=1.0)
+
+            metrics.increment("resilience.requests", provider=provider)
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                recorded = True
+                if not is_transient(e):
+                    # The provider answered; the request itself was bad (auth, missing league...)
+                    breaker.record_success()
+                    raise
+                metrics.increment("resilience.transient_errors", provider=provider)
+                if breaker.record_failure():
+                    LOGGER.warning(f"Circuit opened for {provider} after repeated failures: {e}")
+                _publish_state(provider)
+                if attempt + 1 >= attempts:
+                    raise
+                delay = _retry_after(e) or backoff_delay(attempt)
+                metrics.increment("resilience.retries", provider=provider)
+                LOGGER.info(f"Retrying {provider} call in {delay:.2f}s after transient error: {e}")
+                time.sleep(min(delay, MAX_BACKOFF_SECONDS))
+                continue
+
+            recorded = True
+            breaker.record_success()
+            _publish_state(provider)
+            return result
+        finally:
+            # A trial that never reached the provider (no token, or interrupted) must not
+            # leave the circuit half-open with nothing in flight
+            if trial and not recorded:
+                breaker.release_trial()
+
+
+def _publish_state(provider):
+    breaker = _breaker_for(provider)
+    metrics.set_gauge("resilience.circuit_open", 1 if breaker.state != CircuitBreaker.CLOSED else 0, provider=provider)
+    metrics.set_gauge("resilience.tokens_available", round(_bucket_for(provider).available(), 2), provider=provider)
+
+
+def remember(key, value):
+    """Stores the last good result for `key` so it can be served while its provider is down."""
+    with _LOCK:
+        _LAST_GOOD[key] = value
+        _LAST_GOOD.move_to_end(key)
+        while len(_LAST_GOOD) > MAX_LAST_GOOD:
+            _LAST_GOOD.popitem(last=False)
+
+
+def last_good(key):
+    with _LOCK:
+        if key not in _LAST_GOOD:
+            return None
+        _LAST_GOOD.move_to_end(key)
+        return _LAST_GOOD[key]
+
+
+def state():
+    """Returns circuit state, consecutive failures and available tokens per provider."""
+    report = {}
+    for provider in PROVIDER_LIMITS:
+        breaker = _breaker_for(provider)
+        report[provider] = {
+            "circuit": breaker.state,
+            "consecutive_failures": breaker.failures,
+            "tokens_available": round(_bucket_for(provider).available(), 2),
+        }
+    return report
@@ -0,0 +1,111 @@
+import bisect
+import functools
+from datetime import datetime, timedelta
+import pytz
+
+EST = pytz.timezone('US/Eastern')
+
+REGULAR_SEASON_WEEKS = 18
+# Playoff rounds and how many weeks after the regular season each one starts.
+# There is an off week before the Super Bowl.
+PLAYOFF_ROUNDS = (("Wild Card", 0), ("Divisional", 1), ("Conference Championships", 2), ("Super Bowl", 4))
+# Last fantasy scoring period each provider plays; fantasy weeks use NFL week numbers.
+PROVIDER_LAST_WEEK = {"espn": 18, "sleeper": 18, "yahoo": 17}
+# Scores are considered final at 6 AM EST on the Tuesday after a week's games.
+FINALIZE_HOUR = 6
+
+
+def season_year_for(current_date):
+    """September or later is the current year's season; January through August the previous one."""
+    return current_date.year if current_date.month >= 9 else current_date.year - 1
+
+
+def week_1_start(season_year):
+    """
+    Start of NFL Week 1: the Wednesday before the first Thursday of September,
+    used as the "start" of Week 1 for scoring purposes.
+    """
+    first_of_sept = datetime(season_year, 9, 1)
+
+    # Find first Thursday (weekday 3)
+    days_until_thursday = (3 - first_of_sept.weekday()) % 7
+    if days_until_thursday == 0 and first_of_sept.weekday() != 3:
+        days_until_thursday = 7
+
+    first_thursday = first_of_sept + timedelta(days=days_until_thursday)
+    return first_thursday - timedelta(days=1)
+
+
+def _as_est(current_date):
+    """Aware datetime in EST. Naive datetimes are taken to already be EST."""
+    return current_date.astimezone(EST) if current_date.tzinfo else EST.localize(current_date)
+
+
+class SeasonCalendar:
+    """
+    Week boundaries and finalization times for one NFL season, regular season
+    and playoffs. Built once per season (see `get_calendar`); every lookup is a
+    bisect over sorted week start or finalization times.
+    """
+
+    def __init__(self, season_year):
+        self.season_year = season_year
+        start = week_1_start(season_year)
+
+        self.weeks = list(range(1, REGULAR_SEASON_WEEKS + 1))
+        self.week_starts = [start + timedelta(days=7 * (week - 1)) for week in self.weeks]
+        self.labels = {week: f"Week {week}" for week in self.weeks}
+        playoffs_start = start + timedelta(days=7 * REGULAR_SEASON_WEEKS)
+        for offset, (name, weeks_after) in enumerate(PLAYOFF_ROUNDS, start=1):
+            week = REGULAR_SEASON_WEEKS + offset
+            self.weeks.append(week)
+            self.week_starts.append(playoffs_start + timedelta(days=7 * weeks_after))
+            self.labels[week] = name
+
+        # Week starts on Wednesday; the Tuesday six days later finalizes it
+        self.finalized_times = [
+            EST.localize(datetime(d.year, d.month, d.day, FINALIZE_HOUR) + timedelta(days=6)) for d in self.week_starts
+        ]
+        self._index = {week: i for i, week in enumerate(self.weeks)}
+
+    def schedule(self):
+        """Regular season {week start: week} mapping."""
+        return {self.week_starts[i]: week for i, week in enumerate(self.weeks) if week <= REGULAR_SEASON_WEEKS}
+
+    def current_week(self, current_date):
+        """NFL week in progress (not necessarily completed); playoff weeks are 19 and up."""
+        naive_est = _as_est(current_date).replace(tzinfo=None)
+        index = bisect.bisect_right(self.week_starts, naive_est) - 1
+        return self.weeks[index] if index >= 0 else 1
+
+    def finalized_at(self, week):
+        """Aware EST datetime at which `week`'s scoring is final."""
+        return self.finalized_times[self._index[week]]
+
+    def is_finalized(self, week, current_date):
+        return week in self._index and _as_est(current_date) >= self.finalized_at(week)
+
+    def last_finalized_week(self, current_date, provider=None):
+        """
+        Most recent week with final scoring, capped at the provider's last
+        fantasy week (the regular season by default). 0 if no week is final yet.
+        """
+        index = bisect.bisect_right(self.finalized_times, _as_est(current_date)) - 1
+        if index < 0:
+            return 0
+        last_week = PROVIDER_LAST_WEEK.get(provider, REGULAR_SEASON_WEEKS) if provider else REGULAR_SEASON_WEEKS
+        return min(self.weeks[index], last_week)
+
+    def label(self, week):
+        return self.labels.get(week, f"Week {week}")
+
+
+@functools.lru_cache(maxsize=8)
+def get_calendar(season_year):
+    """Returns the (memoized) calendar for a season."""
+    return SeasonCalendar(season_year)
+
+
+def calendar_for(current_date):
+    """Returns the calendar of the season `current_date` falls in."""
+    return get_calendar(season_year_for(_as_est(current_date)))
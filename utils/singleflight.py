@@ -0,0 +1,78 @@
+import threading
+import time
+from streamlit.logger import get_logger
+from utils import metrics
+
+LOGGER = get_logger(__name__)
+
+# Single-flight coalescing: concurrent callers asking for the same key wait on
+# the one computation already in progress instead of starting their own.
+_LOCK = threading.Lock()
+_IN_FLIGHT = {}
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+def _provider_of(key):
+    return key[0] if isinstance(key, tuple) and key else "unknown"
+
+
+def do(key, fn, *args, **kwargs):
+    """
+    Runs `fn(*args, **kwargs)` once per in-flight `key`.
+
+    The first caller for a key computes the result; callers arriving while that
+    computation is running block until it finishes and receive the same result
+    (or the same exception).
+
+    Args:
+    - key (tuple): Hashable key, conventionally (provider, league_id, week, ...).
+    - fn (callable): The computation to run.
+
+    Returns:
+    - The value returned by `fn`.
+    """
+    provider = _provider_of(key)
+    with _LOCK:
+        call = _IN_FLIGHT.get(key)
+        leader = call is None
+        if leader:
+            call = _Call()
+            _IN_FLIGHT[key] = call
+        else:
+            call.waiters += 1
+
+    if not leader:
+        metrics.increment("singleflight.coalesced", provider=provider)
+        start = time.perf_counter()
+        call.done.wait()
+        metrics.observe("singleflight.wait_seconds", time.perf_counter() - start, provider=provider)
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    metrics.increment("singleflight.executed", provider=provider)
+    try:
+        call.result = fn(*args, **kwargs)
+        return call.result
+    except Exception as e:
+        call.error = e
+        raise
+    finally:
+        with _LOCK:
+            _IN_FLIGHT.pop(key, None)
+        if call.waiters:
+            LOGGER.info(f"Coalesced {call.waiters} duplicate request(s) for {key[:3] if isinstance(key, tuple) else key}")
+        call.done.set()
+
+
+def in_flight():
+    """Returns the number of keys currently being computed."""
+    with _LOCK:
+        return len(_IN_FLIGHT)
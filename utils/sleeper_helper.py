@@ -1,157 +1,152 @@
 import json
+import os
 import requests
 import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from utils import metrics, provider_http
+from utils.leaderboard import TopK
 
 logger = logging.getLogger(__name__)
 
-def get_player_name_from_id(player_id, players_data):
-    """Gets a player's name from their ID."""
-    player_info = players_data.get(str(player_id))
-    if player_info:
-        return f"{player_info.get('first_name', '')} {player_info.get('last_name', '')}".strip()
-    return "Unknown Player"
+SLEEPER_API_URL = "https://api.sleeper.app/v1"
+PLAYERS_FILE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'players_data.json')
 
-def calculate_scoreboards(matchups, team_name_map, roster_owner_map):
-    """Creates scoreboards from matchup data with proper matchup grouping."""
-    # Group matchups by matchup_id to find opponents
-    matchup_groups = {}
-    
-    for matchup in matchups:
-        matchup_id = matchup.get('matchup_id')
-        if matchup_id:
-            if matchup_id not in matchup_groups:
-                matchup_groups[matchup_id] = []
-            
-            owner_id = roster_owner_map.get(matchup['roster_id'])
-            team_name = team_name_map.get(owner_id, "Unknown Team")
-            points = matchup.get('points', 0)
-            
-            matchup_groups[matchup_id].append({
-                'team_name': team_name,
-                'points': points,
-                'roster_id': matchup['roster_id']
-            })
-    
-    return matchup_groups
+_PLAYERS_LOCK = threading.Lock()
+_PLAYERS_CACHE = {"mtime": None, "data": None}
 
-def highest_scoring_team_of_week(scoreboards):
-    """Determines the highest-scoring team of the week."""
-    highest_score = -1
-    highest_team = "Unknown Team"
-    
-    for matchup_id, teams in scoreboards.items():
-        for team in teams:
-            if team['points'] > highest_score:
-                highest_score = team['points']
-                highest_team = team['team_name']
-    
-    return highest_team, highest_score
+# Transactions are listed one league week ("round") at a time. A finalized round never
+# changes again, so it is kept for the life of the process and later recaps only fetch
+# the rounds they haven't seen.
+TRANSACTION_WORKERS = 6
+MAX_CACHED_ROUNDS = 8192
+TRANSACTION_TYPES = ("waiver", "free_agent", "trade")
 
-def top_3_teams(standings):
-    """Gets the top 3 teams from the standings."""
-    return standings[:3]
+_ROUNDS_LOCK = threading.Lock()
+_FINALIZED_ROUNDS = OrderedDict()  # (league_id, round) -> [transaction]
 
-def highest_scoring_player_of_week(matchups, players_data, user_team_mapping, roster_owner_mapping):
-    highest_score = -1
-    player_name, team_name = "N/A", "N/A"
-    
-    for m in matchups:
-        owner_id = roster_owner_mapping.get(m['roster_id'])
-        current_team_name = user_team_mapping.get(owner_id, "Unknown Team")
-        
-        for player_id, score in m.get('players_points', {}).items():
-            if score > highest_score:
-                highest_score = score
-                player_name = get_player_name_from_id(player_id, players_data)
-                team_name = current_team_name
-                
-    return player_name, highest_score, team_name
-
-def lowest_scoring_starter_of_week(matchups, players_data, user_team_mapping, roster_owner_mapping):
-    lowest_score = float('inf')
-    player_name, team_name = "N/A", "N/A"
-    
-    for m in matchups:
-        owner_id = roster_owner_mapping.get(m['roster_id'])
-        current_team_name = user_team_mapping.get(owner_id, "Unknown Team")
-        
-        for player_id in m.get('starters', []):
-            score = m.get('players_points', {}).get(str(player_id), 0)
-            if score < lowest_score:
-                lowest_score = score
-                player_name = get_player_name_from_id(player_id, players_data)
-                team_name = current_team_name
-                
-    if lowest_score == float('inf'):
-        lowest_score = 0
-        
-    return player_name, lowest_score, team_name
+def load_players_data(path=PLAYERS_FILE_PATH):
+    """
+    Loads the Sleeper player index (player_id -> player info) once per process.
+    The file is re-read only when it changes on disk.
 
-def highest_scoring_benched_player_of_week(matchups, players_data, user_team_mapping, roster_owner_mapping):
-    highest_score = -1
-    player_name, team_name = "N/A", "N/A"
-    
-    for m in matchups:
-        owner_id = roster_owner_mapping.get(m['roster_id'])
-        current_team_name = user_team_mapping.get(owner_id, "Unknown Team")
-        starters = set(str(p) for p in m.get('starters', []))
-        
-        for player_id, score in m.get('players_points', {}).items():
-            if str(player_id) not in starters and score > highest_score:
-                highest_score = score
-                player_name = get_player_name_from_id(player_id, players_data)
-                team_name = current_team_name
-                
-    return player_name, highest_score, team_name
-
-def biggest_blowout_match_of_week(scoreboards):
-    """Finds the biggest blowout match with actual team names."""
-    biggest_diff = -1
-    blowout_match = None
-    
-    for matchup_id, teams in scoreboards.items():
-        if len(teams) >= 2:
-            # Sort teams by points to get winner and loser
-            sorted_teams = sorted(teams, key=lambda x: x['points'], reverse=True)
-            point_diff = sorted_teams[0]['points'] - sorted_teams[1]['points']
-            
-            if point_diff > biggest_diff:
-                biggest_diff = point_diff
-                blowout_match = (
-                    (sorted_teams[0]['team_name'], sorted_teams[0]['points']),
-                    (sorted_teams[1]['team_name'], sorted_teams[1]['points'])
-                )
-    
-    if blowout_match is None:
-        return (("No match", 0), ("No match", 0)), 0
-    
-    return blowout_match, biggest_diff
+    Raises:
+    - FileNotFoundError: If the players file doesn't exist.
+    """
+    mtime = os.path.getmtime(path)
+    with _PLAYERS_LOCK:
+        if _PLAYERS_CACHE["data"] is None or _PLAYERS_CACHE["mtime"] != mtime:
+            with open(path, 'r') as f:
+                _PLAYERS_CACHE["data"] = json.load(f)
+            _PLAYERS_CACHE["mtime"] = mtime
+            logger.info(f"Loaded {len(_PLAYERS_CACHE['data'])} players from data file")
+        return _PLAYERS_CACHE["data"]
 
-def closest_match_of_week(scoreboards):
-    """Finds the closest match with actual team names."""
-    smallest_diff = float('inf')
-    closest_match = None
-    
-    for matchup_id, teams in scoreboards.items():
-        if len(teams) >= 2:
-            # Sort teams by points
-            sorted_teams = sorted(teams, key=lambda x: x['points'], reverse=True)
-            point_diff = abs(sorted_teams[0]['points'] - sorted_teams[1]['points'])
-            
-            if point_diff < smallest_diff:
-                smallest_diff = point_diff
-                closest_match = (
-                    (sorted_teams[0]['team_name'], sorted_teams[0]['points']),
-                    (sorted_teams[1]['team_name'], sorted_teams[1]['points'])
-                )
-    
-    if closest_match is None:
-        return (("No match", 0), ("No match", 0)), 0
-    
-    if smallest_diff == float('inf'):
-        smallest_diff = 0
-        
-    return closest_match, smallest_diff
+# League data fetches. These go through the shared provider HTTP layer, so
+# repeat fetches within a week revalidate with ETag/Last-Modified instead of
+# downloading unchanged rosters, users and matchups again.
+
+def fetch_league(league_id):
+    """Fetches a league's settings, season and `previous_league_id`."""
+    return provider_http.get_json("sleeper", f"{SLEEPER_API_URL}/league/{league_id}")
+
+def fetch_rosters(league_id):
+    """Fetches all rosters in a league."""
+    return provider_http.get_json("sleeper", f"{SLEEPER_API_URL}/league/{league_id}/rosters")
+
+def fetch_users(league_id):
+    """Fetches all users (managers) in a league."""
+    return provider_http.get_json("sleeper", f"{SLEEPER_API_URL}/league/{league_id}/users")
+
+def fetch_matchups(league_id, week):
+    """Fetches every roster's matchup entry for a week."""
+    return provider_http.get_json("sleeper", f"{SLEEPER_API_URL}/league/{league_id}/matchups/{week}")
+
+def fetch_transactions(league_id, week):
+    """Fetches a league's transactions (waivers, free agent moves, trades) for one round (league week)."""
+    return provider_http.get_json("sleeper", f"{SLEEPER_API_URL}/league/{league_id}/transactions/{week}")
+
+def fetch_transaction_rounds(league_id, through_round, finalized_through=None):
+    """
+    Transactions for rounds 1..through_round. Rounds missing from the cache are
+    fetched concurrently; rounds up to `finalized_through` are cached for good.
+
+    Args:
+    - finalized_through (int): Last round that can't change anymore (defaults to through_round).
+
+    Returns:
+    - dict: {round: [transaction]}.
+    """
+    league_id = str(league_id)
+    finalized_through = through_round if finalized_through is None else finalized_through
+    rounds = {}
+    with _ROUNDS_LOCK:
+        for week in range(1, through_round + 1):
+            if (league_id, week) in _FINALIZED_ROUNDS:
+                rounds[week] = _FINALIZED_ROUNDS[(league_id, week)]
+                _FINALIZED_ROUNDS.move_to_end((league_id, week))
+    missing = [week for week in range(1, through_round + 1) if week not in rounds]
+    metrics.increment("sleeper.transaction_rounds_cached", len(rounds))
+    if not missing:
+        return rounds
+    with ThreadPoolExecutor(max_workers=min(TRANSACTION_WORKERS, len(missing))) as executor:
+        fetched = dict(zip(missing, executor.map(lambda week: fetch_transactions(league_id, week) or [], missing)))
+    metrics.increment("sleeper.transaction_rounds_fetched", len(missing))
+    with _ROUNDS_LOCK:
+        for week, transactions in fetched.items():
+            if week <= finalized_through:
+                _FINALIZED_ROUNDS[(league_id, week)] = transactions
+        while len(_FINALIZED_ROUNDS) > MAX_CACHED_ROUNDS:
+            _FINALIZED_ROUNDS.popitem(last=False)
+    rounds.update(fetched)
+    return rounds
+
+def transaction_counts(rounds):
+    """
+    Completed waiver, free agent and trade moves per roster. A trade counts once
+    for every roster in it.
+
+    Returns:
+    - dict: {roster_id: {"waiver": int, "free_agent": int, "trade": int}}.
+    """
+    counts = {}
+    for transactions in rounds.values():
+        for transaction in transactions:
+            kind = transaction.get('type')
+            if kind not in TRANSACTION_TYPES or transaction.get('status') != 'complete':
+                continue
+            for roster_id in transaction.get('roster_ids') or []:
+                counts.setdefault(roster_id, dict.fromkeys(TRANSACTION_TYPES, 0))[kind] += 1
+    return counts
+
+def most_active_team(counts, user_team_mapping, roster_owner_mapping):
+    """
+    Team with the most transactions.
+
+    Returns:
+    - Tuple(str, dict) or None: (team name, {"waiver", "free_agent", "trade"} counts).
+    """
+    top = TopK(1, key=lambda item: sum(item[1].values())).extend(counts.items()).results()
+    if not top:
+        return None
+    roster_id, team_counts = top[0]
+    return user_team_mapping.get(roster_owner_mapping.get(roster_id), "Unknown Team"), team_counts
+
+def team_names_by_owner(users):
+    """{owner user_id: display name}, as sleeper_wrapper's map_users_to_team_name, without a League instance."""
+    return {user.get('user_id'): user.get('display_name') for user in users or []}
+
+def owners_by_roster(rosters):
+    """{roster_id: owner user_id}, as sleeper_wrapper's map_rosterid_to_ownerid."""
+    return {roster.get('roster_id'): roster.get('owner_id') for roster in rosters or []}
+
+def get_player_name_from_id(player_id, players_data):
+    """Gets a player's name from their ID."""
+    player_info = players_data.get(str(player_id))
+    if player_info:
+        return f"{player_info.get('first_name', '')} {player_info.get('last_name', '')}".strip()
+    return "Unknown Player"
 
 def team_on_hottest_streak(rosters, user_team_mapping, roster_owner_mapping):
     """Finds the team on the hottest win streak."""
@@ -0,0 +1,165 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from streamlit.logger import get_logger
+from utils import espn_helper, lazy_imports, league_history, metrics, provider_http, recap_cache, week_archive
+
+LOGGER = get_logger(__name__)
+playoff_odds = lazy_imports.module("utils.playoff_odds")
+power_rankings = lazy_imports.module("utils.power_rankings")
+week_model = lazy_imports.module("utils.week_model")
+
+# Stat corrections land days after a week is "final". Instead of waiting out the recap
+# cache TTL, each recap request (at most every CHECK_INTERVAL_SECONDS per league week)
+# re-fetches just the per-matchup score totals of the recap week and the weeks right
+# before it and compares their content hashes with the last ones seen. A changed week
+# bumps the recap week's revision, which recap caches are keyed on, and marks only the
+# stat sections the correction can reach as stale.
+RECENT_WEEKS = 2
+CHECK_INTERVAL_SECONDS = float(os.environ.get("COMMISH_CORRECTION_CHECK_SECONDS", 600))
+MAX_TRACKED_WEEKS = 2048
+# Sections built from the recap week's scores, and from every week's scores so far
+WEEK_SECTIONS = ("weekly", "points_left", "waiver_gem")
+SEASON_SECTIONS = ("power_rankings", "playoff_odds", "all_time", "season_top_scorer")
+
+ESPN_LEAGUE_URL = "https://lm-api-reads.fantasy.espn.com/apis/v3/games/ffl/seasons/{season}/segments/0/leagues/{league_id}"
+
+_LOCK = threading.Lock()
+_HASHES = OrderedDict()  # (provider, league_id, season, week) -> {matchup: hash}
+_CHECKED = {}  # (provider, league_id, season, week) -> monotonic time of the last check
+_REVISIONS = {}  # (provider, league_id, season, week) -> corrections seen for that recap week
+
+
+def matchup_hashes(pairs):
+    """
+    {matchup: content hash} for a week's head-to-head pairs. Only team ids and points
+    are hashed, so renamed teams don't look like corrections.
+    """
+    hashes = {}
+    for pair in pairs:
+        totals = sorted((str(team_id), round(float(points or 0), 2)) for team_id, _, points in pair)
+        hashes["|".join(team_id for team_id, _ in totals)] = recap_cache.content_hash(totals)
+    return hashes
+
+
+def changed_matchups(old, new):
+    return sorted(matchup for matchup in set(old) | set(new) if old.get(matchup) != new.get(matchup))
+
+
+def revision(provider, league_id, season, week):
+    with _LOCK:
+        return _REVISIONS.get((provider, str(league_id), int(season), int(week)), 0)
+
+
+def check(provider, league_id, season, week, fetch_pairs, force=False):
+    """
+    Looks for stat corrections in a recap week and the RECENT_WEEKS - 1 weeks before it.
+    The first look at a week only records its hashes.
+
+    Args:
+    - fetch_pairs (callable): week -> [(team_id, team_name, points), ...] per matchup.
+    - force (bool): Check even if the league week was checked less than CHECK_INTERVAL_SECONDS ago.
+
+    Returns:
+    - int: The recap week's revision; it moves whenever a correction is found.
+    """
+    recap_key = (provider, str(league_id), int(season), int(week))
+    now = time.monotonic()
+    with _LOCK:
+        if not force and now - _CHECKED.get(recap_key, float("-inf")) < CHECK_INTERVAL_SECONDS:
+            return _REVISIONS.get(recap_key, 0)
+
+    fetched = False
+    for checked_week in range(int(week), max(0, int(week) - RECENT_WEEKS), -1):
+        key = recap_key[:3] + (checked_week,)
+        try:
+            pairs = fetch_pairs(checked_week)
+        except Exception as e:
+            LOGGER.warning(f"Stat correction check failed for {provider} league {league_id} week {checked_week}: {e}")
+            continue
+        fetched = True
+        hashes = matchup_hashes(pairs or [])
+        if not hashes:
+            continue
+        with _LOCK:
+            old = _HASHES.get(key)
+            _HASHES[key] = hashes
+            _HASHES.move_to_end(key)
+            while len(_HASHES) > MAX_TRACKED_WEEKS:
+                _HASHES.popitem(last=False)
+        changed = changed_matchups(old, hashes) if old is not None else []
+        if not changed:
+            continue
+        LOGGER.info(f"Stat correction in {provider} league {league_id} week {checked_week}: {len(changed)} matchup(s) changed")
+        metrics.increment("stat_corrections.detected", provider=provider)
+        apply_correction(provider, league_id, season, checked_week, pairs)
+        stale = SEASON_SECTIONS + (WEEK_SECTIONS if checked_week == int(week) else ())
+        recap_cache.mark_stale(provider, league_id, week, stale)
+        with _LOCK:
+            _REVISIONS[recap_key] = _REVISIONS.get(recap_key, 0) + 1
+    # A check where every fetch failed doesn't count; the next request tries again
+    if fetched:
+        with _LOCK:
+            _CHECKED[recap_key] = now
+    return revision(provider, league_id, season, week)
+
+
+def apply_correction(provider, league_id, season, week, pairs):
+    """
+    Brings everything derived from a corrected week's scores up to date: the archived
+    matchups (its player rows are dropped until the week is archived again), the
+    season's power rankings and playoff odds, and the league's all-time records.
+    """
+    week_archive.archive_week(provider, league_id, season, week, week_model.from_pairs(pairs))
+    week_archive.drop_week("players", provider, league_id, season, week)
+    power_rankings.invalidate(provider, league_id, season)
+    playoff_odds.invalidate(provider, league_id, season)
+    if provider == "espn":
+        espn_helper.forget_free_agents(league_id, season, week)
+    if league_history.get_records(provider, league_id).has_week(season, week):
+        league_history.rebuild_records(provider, league_id)
+
+
+# Provider adapters: week -> head-to-head pairs with fresh score totals
+
+def sleeper_week_pairs(matchups, user_team_mapping, roster_owner_mapping):
+    """Pairs from one week of Sleeper matchups; teams without a matchup_id are byes."""
+    pairs = OrderedDict()
+    for matchup in matchups:
+        roster_id = matchup.get('roster_id')
+        team_name = user_team_mapping.get(roster_owner_mapping.get(roster_id), "Unknown Team")
+        matchup_id = matchup.get('matchup_id')
+        pairs.setdefault(matchup_id if matchup_id is not None else ("bye", roster_id), []).append(
+            (roster_id, team_name, matchup.get('points') or 0)
+        )
+    return list(pairs.values())
+
+
+def espn_week_pairs(league_id, season, week, espn_s2=None, swid=None, clean=lambda name: name):
+    """
+    Pairs for one ESPN matchup period from the league's matchup-score view: one small
+    request instead of loading the whole League.
+    """
+    cookies = {"espn_s2": espn_s2, "SWID": swid} if espn_s2 and swid else None
+    data = provider_http.get_json(
+        "espn",
+        ESPN_LEAGUE_URL.format(season=int(season), league_id=league_id),
+        params={"view": ["mMatchupScore", "mTeam"], "scoringPeriodId": int(week)},
+        cookies=cookies,
+    )
+    names = {
+        team.get("id"): clean(team.get("name") or f"{team.get('location', '')} {team.get('nickname', '')}".strip())
+        for team in data.get("teams") or []
+    }
+    pairs = []
+    for game in data.get("schedule") or []:
+        if game.get("matchupPeriodId") != int(week):
+            continue
+        pair = [
+            (side["teamId"], names.get(side["teamId"], str(side["teamId"])), side.get("totalPoints") or 0)
+            for side in (game.get("home"), game.get("away")) if side
+        ]
+        if pair:
+            pairs.append(pair)
+    return pairs
@@ -0,0 +1,134 @@
+import atexit
+import contextlib
+import contextvars
+import logging
+import os
+import queue
+import random
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from utils import metrics
+
+# Logging off the request path. `install()` swaps every handler the app's loggers
+# write through for one shared QueueHandler; a single listener thread formats the
+# records and does the actual I/O. On the request path a log call only builds its
+# message (capped at MAX_MESSAGE_CHARS) plus a few structured fields - provider,
+# league, week, stage timings - and enqueues it. When the queue is full records are
+# dropped and counted rather than blocking the request.
+MAX_QUEUED_RECORDS = int(os.environ.get("COMMISH_LOG_QUEUE_SIZE", 10000))
+MAX_MESSAGE_CHARS = 4000
+# Large payloads (whole summaries, debug dicts) are logged for a sample of requests only
+PAYLOAD_SAMPLE_RATE = float(os.environ.get("COMMISH_LOG_PAYLOAD_SAMPLE_RATE", 0.05))
+MAX_PAYLOAD_CHARS = 2000
+
+_LOCK = threading.Lock()
+_STATE = {"handler": None, "listener": None}
+_CONTEXT = contextvars.ContextVar("commish_log_context", default={})
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    def prepare(self, record):
+        # Only the message is built here; timestamps, levels and tracebacks are
+        # formatted by the sink handlers on the listener thread.
+        message = record.getMessage()
+        if len(message) > MAX_MESSAGE_CHARS:
+            message = f"{message[:MAX_MESSAGE_CHARS]}... [{len(message) - MAX_MESSAGE_CHARS} more chars]"
+        fields = {**_CONTEXT.get(), **(getattr(record, "fields", None) or {})}
+        if fields:
+            message += " | " + " ".join(f"{name}={value}" for name, value in fields.items())
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg, record.args, record.fields = message, None, fields
+        metrics.increment("logging.records", level=record.levelname)
+        metrics.increment("logging.bytes", len(message))
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.increment("logging.dropped")
+
+
+def fields(**values):
+    """`extra` for a log call that carries structured fields: LOGGER.info("...", extra=fields(stage=...))."""
+    return {"fields": values}
+
+
+@contextlib.contextmanager
+def log_context(**values):
+    """Adds structured fields (provider, league_id, week, ...) to every record logged inside the block."""
+    token = _CONTEXT.set({**_CONTEXT.get(), **values})
+    try:
+        yield
+    finally:
+        _CONTEXT.reset(token)
+
+
+def _route(logger, handler, sinks):
+    moved = [h for h in logger.handlers if h is not handler]
+    if not moved:
+        return
+    for h in moved:
+        logger.removeHandler(h)
+        # Streamlit gives every logger its own console handler; one per stream is enough
+        if not any(type(s) is type(h) and getattr(s, "stream", None) is getattr(h, "stream", None) for s in sinks):
+            sinks.append(h)
+    logger.addHandler(handler)
+
+
+def install():
+    """
+    Routes the root logger and every logger created so far through the shared queue.
+    Safe to call repeatedly (e.g. on every Streamlit rerun); later calls pick up
+    loggers created since the last one.
+
+    Returns:
+    - QueueListener: The listener writing the queued records.
+    """
+    with _LOCK:
+        handler, listener = _STATE["handler"], _STATE["listener"]
+        if listener is None:
+            handler = _NonBlockingQueueHandler(queue.Queue(MAX_QUEUED_RECORDS))
+            listener = QueueListener(handler.queue, respect_handler_level=True)
+            listener.start()
+            atexit.register(listener.stop)
+            _STATE.update(handler=handler, listener=listener)
+        sinks = list(listener.handlers)
+        loggers = [logging.getLogger()] + [
+            logger for logger in list(logging.Logger.manager.loggerDict.values()) if isinstance(logger, logging.Logger)
+        ]
+        for logger in loggers:
+            _route(logger, handler, sinks)
+        listener.handlers = tuple(sinks)
+        return listener
+
+
+def flush():
+    """Blocks until every queued record has been written (for benchmarks and shutdown)."""
+    with _LOCK:
+        listener = _STATE["listener"]
+        if listener is not None:
+            listener.stop()
+            listener.start()
+
+
+def log_payload(logger, message, payload, level=logging.DEBUG, sample_rate=None, max_chars=MAX_PAYLOAD_CHARS, **values):
+    """
+    Logs a large payload (a whole summary, a debug dict) for a sample of calls, cut to
+    `max_chars`. The payload is only turned into a string when it is actually logged.
+
+    Returns:
+    - bool: Whether the payload was logged.
+    """
+    sample_rate = PAYLOAD_SAMPLE_RATE if sample_rate is None else sample_rate
+    if not logger.isEnabledFor(level):
+        return False
+    if random.random() >= sample_rate:
+        metrics.increment("logging.payloads_skipped")
+        return False
+    text = payload if isinstance(payload, str) else repr(payload)
+    size = len(text)
+    if size > max_chars:
+        text = f"{text[:max_chars]}... [{size - max_chars} more chars]"
+    logger.log(level, f"{message}\n{text}", extra=fields(payload_chars=size, **values))
+    return True
@@ -1,15 +1,18 @@
 import streamlit as st
-import os
-import json
-from espn_api.football import League
-from yfpy.query import YahooFantasySportsQuery
-from sleeper_wrapper import League as SleeperLeague
 from utils import espn_helper, yahoo_helper, sleeper_helper, helper
-from openai import OpenAI
+import asyncio
 import datetime
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
 from streamlit.logger import get_logger
+from utils import metrics, fair_scheduler, structured_logging, singleflight, pipeline, resilience, lazy_imports, player_stats_store, lineup_optimizer, week_archive, league_history, recap_cache, stat_corrections
 
 LOGGER = get_logger(__name__)
+# NumPy-backed stat modules are imported on first use (or by the background warm-up)
+power_rankings = lazy_imports.module("utils.power_rankings")
+playoff_odds = lazy_imports.module("utils.playoff_odds")
+week_model = lazy_imports.module("utils.week_model")
 
 def moderate_text(client, text):
     try:
@@ -39,7 +42,10 @@ def moderate_text(client, text):
         LOGGER.error("An error occurred during moderation: %s", str(e))
         return False  # Assume text is inappropriate in case of an error
 
-def generate_gpt4_summary_streaming(client, summary, character_choice, trash_talk_level):
+RECAP_MODEL = "gpt-4o-mini"
+RECAP_MAX_TOKENS = 1600
+
+def build_recap_messages(summary, character_choice, trash_talk_level):
     # Construct the instruction for GPT-4 based on user inputs
     instruction = f"You will be provided a summary below containing the most recent weekly stats for a fantasy football league. \
     Create a weekly recap in the style of {character_choice}. Do not simply repeat every single stat verbatim - be creative while calling out stats and being on theme. You should include trash talk with a level of {trash_talk_level} based on a scale of 1-10 (1 being no trash talk, 10 being excessive hardcore trash talk); feel free to make fun of (or praise) team names and performances, and add a touch of humor related to the chosen character. \
@@ -47,17 +53,20 @@ def generate_gpt4_summary_streaming(client, summary, character_choice, trash_tal
     your character. Here is the provided weekly fantasy summary: {summary}"
 
     # Create the messages array
-    messages = [
+    return [
         {"role": "system", "content": "You are a helpful assistant."},
         {"role": "user", "content": instruction}
     ]
 
+def generate_gpt4_summary_streaming(client, summary, character_choice, trash_talk_level):
+    messages = build_recap_messages(summary, character_choice, trash_talk_level)
+
     try:
         # Send the messages to OpenAI's GPT-4 for analysis
         response = client.chat.completions.create(
-            model="gpt-4o-mini",  # Use the appropriate model
+            model=RECAP_MODEL,  # Use the appropriate model
             messages=messages,
-            max_tokens=1600,  # Control response length
+            max_tokens=RECAP_MAX_TOKENS,  # Control response length
             stream=True
         )
         
@@ -70,177 +79,482 @@ def generate_gpt4_summary_streaming(client, summary, character_choice, trash_tal
     except Exception as e:
         yield f"Error details: {e}"
 
-def generate_espn_summary(league, cw):
+async def generate_gpt4_summary_streaming_async(async_client, summary, character_choice, trash_talk_level):
+    """Async counterpart of generate_gpt4_summary_streaming for an AsyncOpenAI client."""
+    messages = build_recap_messages(summary, character_choice, trash_talk_level)
+
+    try:
+        response = await async_client.chat.completions.create(
+            model=RECAP_MODEL,
+            messages=messages,
+            max_tokens=RECAP_MAX_TOKENS,
+            stream=True
+        )
+        async for chunk in response:
+            if chunk.choices and getattr(chunk.choices[0].delta, 'content', None):
+                yield chunk.choices[0].delta.content
+
+    except Exception as e:
+        yield f"Error details: {e}"
+
+def cached_recap_stream(client, provider, league_id, summary, character_choice, trash_talk_level, client_id=None):
+    """
+    Streams an LLM recap of `summary`, reusing the recap already written for the same
+    headline facts (a stat correction that didn't change them doesn't cost a new call).
+    New recaps wait for a fair share of the LLM slots (see fair_scheduler).
+    """
+    headlines = recap_cache.current_headlines(provider, league_id)
+    cached = recap_cache.get_recap(provider, league_id, character_choice, trash_talk_level, headlines)
+    if cached is not None:
+        yield cached
+        return
+    parts = []
+    with fair_scheduler.slot("llm", client_id or "internal", (provider, str(league_id))):
+        for chunk in generate_gpt4_summary_streaming(client, summary, character_choice, trash_talk_level):
+            if chunk:
+                parts.append(chunk)
+            yield chunk
+    recap = "".join(parts)
+    if not recap.startswith("Error details:"):
+        recap_cache.store_recap(provider, league_id, character_choice, trash_talk_level, recap, headlines)
+
+MAX_PERSONAS = 4
+PERSONA_CONCURRENCY = 4
+
+def parse_personas(character_choice, trash_talk_level, extra_personas="", limit=MAX_PERSONAS):
+    """
+    The personas to write a week up as: the main one plus one per line of `extra_personas`,
+    each optionally followed by "| <trash talk level>". Duplicates are dropped.
+
+    Returns:
+    - list: (persona, trash_talk_level) pairs, at most `limit`.
+    """
+    personas = [(character_choice.strip(), int(trash_talk_level))]
+    for line in (extra_personas or "").splitlines():
+        name, _, level = line.partition("|")
+        name = name.strip()
+        if not name:
+            continue
+        try:
+            level = min(10, max(1, int(level.strip())))
+        except ValueError:
+            level = int(trash_talk_level)
+        if (name, level) not in personas:
+            personas.append((name, level))
+    return personas[:limit]
+
+async def stream_persona_recaps(async_client, summary, personas, on_update, concurrency=PERSONA_CONCURRENCY, provider=None, league_id=None, client_id=None):
+    """
+    Writes one recap per persona from the same summary, streaming them concurrently
+    (at most `concurrency` at a time), so the total wait is close to the slowest stream.
+    Recaps already written for the league's current headline facts are reused.
+
+    Args:
+    - personas (list): (persona, trash_talk_level) pairs.
+    - on_update (callable): (persona index, recap text so far), called as chunks arrive.
+
+    Returns:
+    - list: The recaps, in persona order.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    headlines = recap_cache.current_headlines(provider, league_id) if provider else None
+    stream_seconds = []
+
+    async def write(index, persona, trash_talk):
+        cached = recap_cache.get_recap(provider, league_id, persona, trash_talk, headlines) if headlines else None
+        if cached is not None:
+            on_update(index, cached)
+            return cached
+        async with semaphore, fair_scheduler.async_slot("llm", client_id or "internal", (provider, str(league_id))):
+            start = time.perf_counter()
+            parts = []
+            async for chunk in generate_gpt4_summary_streaming_async(async_client, summary, persona, trash_talk):
+                parts.append(chunk)
+                on_update(index, "".join(parts))
+            stream_seconds.append(time.perf_counter() - start)
+        recap = "".join(parts)
+        if headlines and not recap.startswith("Error details:"):
+            recap_cache.store_recap(provider, league_id, persona, trash_talk, recap, headlines)
+        return recap
+
+    start = time.perf_counter()
+    recaps = await asyncio.gather(*(write(index, persona, trash_talk) for index, (persona, trash_talk) in enumerate(personas)))
+    elapsed = time.perf_counter() - start
+    metrics.observe("llm.persona_batch_seconds", elapsed)
+    if stream_seconds:
+        LOGGER.info(f"Wrote {len(personas)} persona recap(s) in {elapsed:.2f}s (slowest stream {max(stream_seconds):.2f}s)")
+    return recaps
+
+def generate_espn_summary(league, cw, load_season=None):
     """
     Generate a human-friendly summary for an ESPN league with improved formatting.
+    Each stat runs as its own section under the recap latency budget; stats that
+    miss the deadline or fail are left out instead of failing the whole summary.
+    `load_season` (year -> League) lets the league's history be backfilled for all-time records.
     """
-    top_teams = espn_helper.top_three_teams(league)
-    top_scorer_week = espn_helper.top_scorer_of_week(league, cw)
-    worst_scorer_week = espn_helper.worst_scorer_of_week(league, cw)
-    top_scorer_szn = espn_helper.top_scorer_of_season(league)
-    worst_scorer_szn = espn_helper.worst_scorer_of_season(league)
-    most_trans = espn_helper.team_with_most_transactions(league)
-    most_injured = espn_helper.team_with_most_injured_players(league)
-    highest_bench = espn_helper.highest_scoring_benched_player(league, cw)
-    lowest_start = espn_helper.lowest_scoring_starting_player(league, cw)
-    biggest_blowout = espn_helper.biggest_blowout_match(league, cw)
-    closest_game = espn_helper.closest_game_match(league, cw)
-    top_scoring_team_Week = espn_helper.highest_scoring_team(league, cw)
-    
-    summary_parts = [
-        f"### Weekly Standouts\n",
-        f"**Top Scoring Team:** {top_scoring_team_Week}\n",
-        f"**Top Player:** {top_scorer_week[0].name} with **{top_scorer_week[1]}** points.",
-        f"**Lowest Scoring Starter:** {lowest_start[0].name} with just **{lowest_start[0].points}** points (Rostered by {espn_helper.clean_team_name(lowest_start[1].team_name)}).",
-        f"**Best Bench Player:** {highest_bench[0].name} scored **{highest_bench[0].points}** points on the bench for {espn_helper.clean_team_name(highest_bench[1].team_name)}.",
-        "\n---\n",
-        f"### Matchup Highlights\n",
-        f"**Biggest Blowout:** {espn_helper.clean_team_name(biggest_blowout.home_team.team_name)} (**{biggest_blowout.home_score}**) vs {espn_helper.clean_team_name(biggest_blowout.away_team.team_name)} (**{biggest_blowout.away_score}**)\n",
-        f"**Closest Game:** {espn_helper.clean_team_name(closest_game.home_team.team_name)} (**{closest_game.home_score}**) vs {espn_helper.clean_team_name(closest_game.away_team.team_name)} (**{closest_game.away_score}**)\n",
-        "\n---\n",
-        f"### League Power Rankings\n",
-        f"1. **{espn_helper.clean_team_name(top_teams[0].team_name)}**\n",
-        f"2. **{espn_helper.clean_team_name(top_teams[1].team_name)}**\n",
-        f"3. **{espn_helper.clean_team_name(top_teams[2].team_name)}**\n",
-        "\n---\n",
-        f"### Season-Long Stats\n",
-        f"**Season Top Scorer:** {top_scorer_szn[0].name} with **{top_scorer_szn[1]}** total points.\n",
-        f"**Most Active Manager:** {espn_helper.clean_team_name(most_trans[0].team_name)} with **{most_trans[1]}** transactions.\n",
-        f"**Most Injured Team:** {espn_helper.clean_team_name(most_injured[0].team_name)} with **{most_injured[1]}** injured players: {', '.join(most_injured[2])}."
+    clean = espn_helper.clean_team_name
+
+    def weekly():
+        # One box score fetch feeds the columnar week, and one stat pass every weekly line
+        box_scores = espn_helper.extract_players_weekly_scores(league, cw)
+        week_data = week_model.from_espn(box_scores, clean)
+        if helper.is_week_finalized(cw, helper.now_est()):
+            week_archive.archive_week("espn", league.league_id, league.year, cw, week_data)
+        stats = week_model.weekly_stats(week_data, k=3)
+        lines = _format_stat_sections(_weekly_stat_results(stats))
+        bench = lineup_optimizer.most_points_left(lineup_optimizer.espn_lineup_reports(box_scores, clean))
+        if bench:
+            lines["points_left"] = lineup_optimizer.format_bench_line(bench[0]) + "\n"
+        return lines
+
+    def waiver_gem():
+        gems = espn_helper.waiver_wire_gems(league, cw, k=1)
+        if not gems:
+            return None
+        name, position, points = gems[0]
+        return f"**Waiver Wire Gem:** {name} ({position}) scored **{points:.2f}** points without being on any roster.\n"
+
+    @pipeline.shared
+    def season_rankings():
+        # All-play records and luck over every completed week; only new weeks are added
+        rows = power_rankings.update(
+            "espn", league.league_id, league.year, cw, lambda week: power_rankings.espn_week_rows(league, week, clean)
+        )
+        week_archive.archive_standings("espn", league.league_id, league.year, cw, rows)
+        return rows
+
+    def rankings():
+        return power_rankings.format_rankings(season_rankings())
+
+    def odds():
+        key = ("espn", str(league.league_id), league.year, cw)
+        odds = playoff_odds.cached(key)
+        if odds is None:
+            season_rankings()
+            remaining = playoff_odds.espn_remaining_games(league, cw)
+            odds = playoff_odds.playoff_odds(key, power_rankings.get_tracker(*key[:3]), remaining, league.settings.playoff_team_count)
+        return playoff_odds.format_odds(odds)
+
+    def all_time():
+        # Past seasons are backfilled in the background; this week is folded in right away
+        if load_season is not None:
+            league_history.start_backfill("espn", league.league_id, league_history.backfill_espn, league, load_season, cw, clean)
+        pairs = league_history.espn_week_pairs(league, cw, clean)
+        records = league_history.record_week("espn", league.league_id, league.year, cw, pairs)
+        return league_history.format_records(records, league.year, cw, pairs)
+
+    def season_top_scorer():
+        # Summed from the archived weeks when the whole season so far is on disk
+        totals = week_archive.season_player_totals("espn", league.league_id, league.year, range(1, cw + 1))
+        if totals:
+            return f"**Season Top Scorer:** {totals[0]['name']} with **{totals[0]['points']}** total points.\n"
+        top_scorer_szn = espn_helper.top_scorer_of_season(league)
+        return f"**Season Top Scorer:** {top_scorer_szn[0].name} with **{top_scorer_szn[1]}** total points.\n"
+
+    def most_active():
+        most_trans = espn_helper.team_with_most_transactions(league)
+        return f"**Most Active Manager:** {clean(most_trans[0].team_name)} with **{most_trans[1]}** transactions.\n"
+
+    def most_injured():
+        injured = espn_helper.team_with_most_injured_players(league)
+        return f"**Most Injured Team:** {clean(injured[0].team_name)} with **{injured[1]}** injured players: {', '.join(injured[2])}."
+
+    sections = [
+        ("weekly", weekly),
+        ("waiver_gem", waiver_gem),
+        ("power_rankings", rankings),
+        ("playoff_odds", odds),
+        ("all_time", all_time),
+        ("season_top_scorer", season_top_scorer),
+        ("most_active", most_active),
+        ("most_injured", most_injured),
     ]
-    return "\n".join(summary_parts)
+    # After a stat correction only the sections it reached are recomputed
+    reuse = recap_cache.reusable_sections("espn", league.league_id, cw)
+    sections = [section for section in sections if section[0] not in reuse]
+    results, _ = pipeline.run_sections(sections, stage="espn.stats", context=f"(league {getattr(league, 'league_id', '?')}, week {cw})")
+    results.update(reuse)
+    recap_cache.store_sections("espn", league.league_id, cw, results)
+    results.update(results.pop("weekly", None) or {})
+    recap_cache.store_headlines("espn", league.league_id, cw, results)
+
+    groups = [
+        ("### Weekly Standouts\n", ["top_team", "top_player", "top_performers", "lowest_starter", "best_bench", "waiver_gem", "points_left"]),
+        ("### Matchup Highlights\n", ["blowout", "closest"]),
+        ("### League Power Rankings\n", ["power_rankings"]),
+        ("### Playoff Odds\n", ["playoff_odds"]),
+        ("### All-Time Records\n", ["all_time"]),
+        ("### Season-Long Stats\n", ["season_top_scorer", "most_active", "most_injured"]),
+    ]
+    return pipeline.render_groups(groups, results)
+
+class SummaryUnavailable(Exception):
+    """
+    There is no summary for the league week yet (scores not final, no matchups, all
+    zeros). The message is meant for the user. It is raised rather than returned so it
+    is never cached or kept as a last good summary.
+    """
+
+def _credentials_fingerprint(*secrets):
+    """Short, non-reversible fingerprint so coalescing never shares data across credentials."""
+    return hashlib.sha256("|".join(str(s) for s in secrets).encode("utf-8")).hexdigest()[:16]
+
+def _fetch_summary(key, build, *args):
+    """
+    Builds a summary once per in-flight key. While the provider is down the
+    ProviderUnavailable error carries the last good summary for the same key.
+    """
+    try:
+        with structured_logging.log_context(provider=key[0], league_id=key[1], week=key[2]):
+            result = singleflight.do(key, build, *args)
+    except resilience.ProviderUnavailable as e:
+        e.stale = resilience.last_good(key)
+        raise
+    # Builds raise on failure, so only a real summary is ever served as a stale one
+    resilience.remember(key, result)
+    return result
+
+# A finalized week's summary only changes with a stat correction, which moves the
+# revision in its cache key, so it is kept long enough for the precompute run after
+# finalization to still be a cache hit at peak hours. Anything else expires hourly, and
+# so do Yahoo summaries, which have no stat-correction check. Failures raise and are
+# never cached.
+SUMMARY_TTL_SECONDS = 3600
+FINALIZED_SUMMARY_TTL_SECONDS = 24 * 3600
+
+def finalized_summary_ttl(provider):
+    """How long a provider's summary of a finalized week stays cached."""
+    return SUMMARY_TTL_SECONDS if provider == "yahoo" else FINALIZED_SUMMARY_TTL_SECONDS
 
-@st.cache_data(ttl=3600)
 def get_espn_league_summary(league_id, espn2, SWID):
+    # Use dynamic week calculation
+    now = helper.now_est()
+    cw = helper.get_most_recent_completed_week(now, "espn")
+    revision = _espn_revision(league_id, espn2, SWID, cw)
+    cached = _cached_final_espn_league_summary if helper.is_week_finalized(cw, now) else _cached_espn_league_summary
+    return cached(league_id, espn2, SWID, cw, revision)
+
+def _espn_revision(league_id, espn2, SWID, cw):
+    """Stat-correction revision of the league week; checking costs one matchup-score request per recent week."""
+    now = helper.now_est()
+    if not helper.is_week_finalized(cw, now):
+        return 0
+    season = helper.get_nfl_season_year(now)
+    fetch_pairs = lambda week: stat_corrections.espn_week_pairs(league_id, season, week, espn2, SWID, espn_helper.clean_team_name)
+    return stat_corrections.check("espn", league_id, season, cw, fetch_pairs)
+
+@st.cache_data(ttl=SUMMARY_TTL_SECONDS)
+def _cached_espn_league_summary(league_id, espn2, SWID, cw, revision):
+    # `revision` is only part of the cache key: it moves when a stat correction is found
+    return _espn_league_summary(league_id, espn2, SWID, cw)
+
+@st.cache_data(ttl=FINALIZED_SUMMARY_TTL_SECONDS)
+def _cached_final_espn_league_summary(league_id, espn2, SWID, cw, revision):
+    return _espn_league_summary(league_id, espn2, SWID, cw)
+
+def _espn_league_summary(league_id, espn2, SWID, cw):
+    key = ("espn", league_id, cw, _credentials_fingerprint(espn2, SWID))
+    return _fetch_summary(key, _build_espn_league_summary, league_id, espn2, SWID, cw)
+
+def _build_espn_league_summary(league_id, espn2, SWID, cw):
     # Fetch data from ESPN Fantasy API and compute statistics   
     start_time_league_connect = datetime.datetime.now() 
-    league_id = league_id
-    year = helper.get_nfl_season_year(datetime.datetime.now())  # Dynamic year
+    year = helper.get_nfl_season_year(helper.now_est())  # Dynamic year
     espn_s2 = espn2
     swid = SWID
     # Initialize league & current week
+    load_season = lambda season: resilience.call(
+        "espn", lazy_imports.load("espn_api.football").League, league_id=league_id, year=season, espn_s2=espn_s2, swid=swid
+    )
     try:
-        league = League(league_id=league_id, year=year, espn_s2=espn_s2, swid=swid)
+        league = load_season(year)
+    except resilience.ProviderUnavailable:
+        raise
     except Exception as e:
-        return str(e), "Error occurred during validation"
+        if resilience.is_transient(e):
+            raise
+        # Rejected credentials or an unknown league
+        raise PermissionError(str(e)) from e
     end_time_league_connect = datetime.datetime.now()
     league_connect_duration = (end_time_league_connect - start_time_league_connect).total_seconds()
     
-    # Use dynamic week calculation
-    cw = helper.get_most_recent_completed_week(datetime.datetime.now())
-    
     # Generate summary
     start_time_summary = datetime.datetime.now()
-    summary = generate_espn_summary(league, cw)
+    summary = generate_espn_summary(league, cw, load_season)
     end_time_summary = datetime.datetime.now()
     summary_duration = (end_time_summary - start_time_summary).total_seconds()
     # Generate debugging information
     debug_info = f"Summary: {summary} ~~~Timings~~~ League Connect Duration: {league_connect_duration} seconds Summary Duration: {summary_duration} seconds Current Week: {cw} Season Year: {year}"
     return summary, debug_info
 
-@st.cache_data(ttl=3600)
 def get_yahoo_league_summary(league_id, auth_path):    
-    league_id = league_id
     LOGGER.info(f"League id: {league_id}")
+    # Use dynamic week calculation instead of hardcoded
+    week = helper.get_most_recent_completed_week(helper.now_est(), "yahoo")
+    return _cached_yahoo_league_summary(league_id, auth_path, week)
+
+@st.cache_data(ttl=SUMMARY_TTL_SECONDS)
+def _cached_yahoo_league_summary(league_id, auth_path, week):
+    key = ("yahoo", league_id, week, _credentials_fingerprint(auth_path))
+    return _fetch_summary(key, _build_yahoo_league_summary, league_id, auth_path, week)
+
+def _build_yahoo_league_summary(league_id, auth_path, week):
     auth_directory = auth_path
-    sc = YahooFantasySportsQuery(
+    sc = lazy_imports.load("yfpy.query").YahooFantasySportsQuery(
         auth_dir=auth_directory,
         league_id=league_id,
         game_code="nfl"
     )
     LOGGER.info(f"sc: {sc}")
-    # Use dynamic week calculation instead of hardcoded
-    week = helper.get_most_recent_completed_week(datetime.datetime.now())
     recap = yahoo_helper.generate_weekly_recap(sc, week=week)
     return recap
 
-@st.cache_data(ttl=3600)
 def generate_sleeper_summary(league_id):
     """Generates a human-friendly summary for a Sleeper league - only uses completed weeks."""
-    league = SleeperLeague(league_id)
-    
     # Use the safest week calculation - guarantees completed scoring
-    week = helper.get_safest_week_for_recap(datetime.datetime.now())
-    current_nfl_week = helper.get_current_week(datetime.datetime.now())
+    now = helper.now_est()
+    week = helper.get_safest_week_for_recap(now, "sleeper")
+    cached = _cached_final_sleeper_summary if helper.is_week_finalized(week, now) else _cached_sleeper_summary
+    return cached(league_id, week, _sleeper_revision(league_id, week))
+
+def _sleeper_revision(league_id, week):
+    """Stat-correction revision of the league week; checking re-fetches only matchup totals of recent weeks."""
+    now = helper.now_est()
+    if not helper.is_week_finalized(week, now):
+        return 0
+    mappings = {}
+
+    def fetch_pairs(w):
+        # Team names are only needed to archive a corrected week
+        if not mappings:
+            mappings["users"] = sleeper_helper.team_names_by_owner(sleeper_helper.fetch_users(league_id))
+            mappings["rosters"] = sleeper_helper.owners_by_roster(sleeper_helper.fetch_rosters(league_id))
+        return stat_corrections.sleeper_week_pairs(sleeper_helper.fetch_matchups(league_id, w) or [], mappings["users"], mappings["rosters"])
+
+    return stat_corrections.check("sleeper", league_id, helper.get_nfl_season_year(now), week, fetch_pairs)
+
+@st.cache_data(ttl=SUMMARY_TTL_SECONDS)
+def _cached_sleeper_summary(league_id, week, revision):
+    # `revision` is only part of the cache key: it moves when a stat correction is found
+    # Managers of the same league tend to arrive together; share one fetch between them
+    return _fetch_summary(("sleeper", league_id, week), _build_sleeper_summary, league_id, week)
+
+@st.cache_data(ttl=FINALIZED_SUMMARY_TTL_SECONDS)
+def _cached_final_sleeper_summary(league_id, week, revision):
+    return _fetch_summary(("sleeper", league_id, week), _build_sleeper_summary, league_id, week)
+
+def get_league_summary(provider, league_id, espn_s2=None, swid=None, auth_dir=None, client_id=None):
+    """
+    Returns the stat summary text for any provider through its cached summary function.
+    The build waits for a fair share of the summary slots; leagues whose summary was
+    built recently (likely cache hits) go ahead of cold fetches.
+
+    Args:
+    - client_id (str): Who is asking (an app session or API client); background jobs share "internal".
+
+    Raises:
+    - PermissionError: If ESPN rejects the league credentials.
+    - SummaryUnavailable: If the league week has no summary yet.
+    - ValueError: For an unknown provider.
+    - ProviderUnavailable: If no summary slot frees up in time.
+    """
+    provider = provider.lower()
+    league_id = str(league_id)
+    warm = fair_scheduler.is_warm(provider, league_id)
+    with fair_scheduler.slot("summary", client_id or "internal", (provider, league_id), warm=warm):
+        summary = _league_summary(provider, league_id, espn_s2, swid, auth_dir)
+    fair_scheduler.note_built(provider, league_id)
+    return summary
+
+def _league_summary(provider, league_id, espn_s2, swid, auth_dir):
+    if provider == "sleeper":
+        return generate_sleeper_summary(league_id)
+    if provider == "espn":
+        summary, _ = get_espn_league_summary(league_id, espn_s2, swid)
+        return summary
+    if provider == "yahoo":
+        return get_yahoo_league_summary(league_id, auth_dir)
+    raise ValueError(f"Unknown provider '{provider}'")
+
+def _build_sleeper_summary(league_id, week):
+    now = helper.now_est()
+    current_nfl_week = helper.get_current_week(now)
     
     # Debug info to understand what's happening
-    debug_info = helper.debug_week_selection(datetime.datetime.now())
+    debug_info = helper.debug_week_selection(now, "sleeper")
     
-    LOGGER.info(f"Week Selection Debug: {debug_info}")
-    LOGGER.info(f"Current NFL week: {current_nfl_week}, Using completed week: {week} for data")
+    structured_logging.log_payload(LOGGER, "Week selection", debug_info)
+    LOGGER.info(f"Current NFL week: {current_nfl_week}, using completed week {week}")
+    context = f"(league {league_id}, week {week})"
+
+    # Never spend fetches on a week that can't have final scores yet
+    if not helper.is_week_finalized(week, now):
+        raise SummaryUnavailable(f"No completed weeks yet. Week {week} scores are final after Tuesday 6 AM EST.")
 
     try:
-        rosters = league.get_rosters()
-        users = league.get_users()
-        matchups = league.get_matchups(week)
-        standings = league.get_standings(rosters, users)
+        # Independent fetches run side by side; each one has its own timeout
+        fetched, missed = pipeline.run_sections(
+            [
+                ("league", lambda: sleeper_helper.fetch_league(league_id)),
+                ("rosters", lambda: sleeper_helper.fetch_rosters(league_id)),
+                ("users", lambda: sleeper_helper.fetch_users(league_id)),
+                ("matchups", lambda: sleeper_helper.fetch_matchups(league_id, week)),
+            ],
+            stage="sleeper.fetch",
+            context=context,
+        )
+        if missed:
+            raise resilience.ProviderUnavailable("sleeper", f"Sleeper is taking too long to respond (missing: {', '.join(missed)})", retry_after=60)
+        league_info = fetched["league"] or {}
+        rosters = fetched["rosters"]
+        users = fetched["users"]
+        matchups = fetched["matchups"]
 
         # Check if we actually got matchup data
         if not matchups:
             LOGGER.warning(f"No matchup data returned for week {week}")
-            return f"No data available for Week {week}. This week may not have started yet or data isn't available."
-
-        # Check if matchup data has actual scores
-        has_real_scores = False
-        for matchup in matchups:
-            if matchup.get('points', 0) > 0:
-                has_real_scores = True
-                break
-            
-        if not has_real_scores:
-            # Try an even earlier week
-            safer_week = max(1, week - 1)
-            LOGGER.info(f"Week {week} has no scores, trying week {safer_week}")
-            matchups = league.get_matchups(safer_week)
-            week = safer_week  # Update week variable for display
-
-        # Load player data directly from the local file
+            raise SummaryUnavailable(f"No data available for Week {week}. This week may not have started yet or data isn't available.")
+
+        # Player index is loaded once per process (and preloaded by the startup warm-up)
         try:
-            project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            players_file_path = os.path.join(project_root, 'players_data.json')
-            with open(players_file_path, 'r') as f:
-                players_data = json.load(f)
-            LOGGER.info(f"Loaded {len(players_data)} players from data file")
+            sleeper_helper.load_players_data()
         except FileNotFoundError:
-            st.error(f"Player data file ('players_data.json') not found at: {players_file_path}.")
-            return "Player data not found."
-
-        user_team_mapping = league.map_users_to_team_name(users)
-        roster_owner_mapping = league.map_rosterid_to_ownerid(rosters)
-        scoreboards = sleeper_helper.calculate_scoreboards(matchups, user_team_mapping, roster_owner_mapping)
-        # Get matchup data
-        blowout_match, blowout_diff = sleeper_helper.biggest_blowout_match_of_week(scoreboards)
-        close_match, close_diff = sleeper_helper.closest_match_of_week(scoreboards)
-        
-        # Format blowout match display
-        if blowout_match and len(blowout_match) >= 2:
-            blowout_winner = blowout_match[0]
-            blowout_loser = blowout_match[1]
-            blowout_text = f"{blowout_winner[0]} ({blowout_winner[1]:.1f}) vs {blowout_loser[0]} ({blowout_loser[1]:.1f})"
-        else:
-            blowout_text = "No matchup data available"
-        
-        # Format closest match display  
-        if close_match and len(close_match) >= 2:
-            close_winner = close_match[0]
-            close_loser = close_match[1]
-            close_text = f"{close_winner[0]} ({close_winner[1]:.1f}) vs {close_loser[0]} ({close_loser[1]:.1f})"
-        else:
-            close_text = "No matchup data available"
-        
-        # Generate individual summary components
-        highest_scoring_team_name, highest_scoring_team_score = sleeper_helper.highest_scoring_team_of_week(scoreboards)
-        top_3_teams_result = sleeper_helper.top_3_teams(standings)
-        hs_player, hs_score, hs_team = sleeper_helper.highest_scoring_player_of_week(matchups, players_data, user_team_mapping, roster_owner_mapping)
-        ls_starter, ls_score, ls_team = sleeper_helper.lowest_scoring_starter_of_week(matchups, players_data, user_team_mapping, roster_owner_mapping)
-        hs_benched, hs_benched_score, hs_benched_team = sleeper_helper.highest_scoring_benched_player_of_week(matchups, players_data, user_team_mapping, roster_owner_mapping)
-        blowout_teams, blowout_diff = sleeper_helper.biggest_blowout_match_of_week(scoreboards)
-        close_teams, close_diff = sleeper_helper.closest_match_of_week(scoreboards)
-        hottest_team, streak = sleeper_helper.team_on_hottest_streak(rosters, user_team_mapping, roster_owner_mapping)
+            st.error(f"Player data file ('players_data.json') not found at: {sleeper_helper.PLAYERS_FILE_PATH}.")
+            raise SummaryUnavailable("Player data not found.")
+
+        user_team_mapping = sleeper_helper.team_names_by_owner(users)
+        roster_owner_mapping = sleeper_helper.owners_by_roster(rosters)
+        week_points = _shared_week_points(league_info, week, matchups)
+        week_data = week_model.from_sleeper(
+            matchups, user_team_mapping, roster_owner_mapping, player_stats_store.player_name, week_points
+        )
+
+        # The playoff odds need the rankings tracker up to date; both sections share one update
+        season_rankings = pipeline.shared(
+            lambda: _sleeper_power_rankings(league_id, week, matchups, user_team_mapping, roster_owner_mapping)
+        )
+        sections = [
+            ("weekly", lambda: _sleeper_weekly_stats(league_id, week, week_data)),
+            ("points_left", lambda: _sleeper_points_left(league_info, matchups, user_team_mapping, roster_owner_mapping, week_points)),
+            ("power_rankings", season_rankings),
+            ("playoff_odds", lambda: _sleeper_playoff_odds(league_id, week, league_info, season_rankings)),
+            ("all_time", lambda: _sleeper_all_time(league_id, week, week_data)),
+            ("hottest_streak", lambda: sleeper_helper.team_on_hottest_streak(rosters, user_team_mapping, roster_owner_mapping)),
+            ("most_active", lambda: _sleeper_most_active(league_id, week, user_team_mapping, roster_owner_mapping)),
+        ]
+        # After a stat correction only the sections it reached are recomputed
+        reuse = recap_cache.reusable_sections("sleeper", league_id, week)
+        sections = [section for section in sections if section[0] not in reuse]
+        stats, _ = pipeline.run_sections(sections, stage="sleeper.stats", context=context)
+        stats.update(reuse)
+        recap_cache.store_sections("sleeper", league_id, week, stats)
+        stats.update(_weekly_stat_results(stats.pop("weekly", None)))
+        recap_cache.store_headlines("sleeper", league_id, week, stats)
 
         # Check if we got real data
-        if hs_score == 0 and ls_score == 0 and highest_scoring_team_score == 0:
-            return f"""
+        headline_scores = [stats[name][1] for name in ("top_team", "top_player", "lowest_starter") if name in stats]
+        if headline_scores and all(score == 0 for score in headline_scores):
+            raise SummaryUnavailable(f"""
             ### No Scoring Data Available
             
             **Week {week}** data shows all zeros, which means:
@@ -254,35 +568,171 @@ def generate_sleeper_summary(league_id):
             - Current NFL Week: {current_nfl_week}  
             - Attempted Week: {week}
             - Available Weeks: {debug_info.get('available_weeks', [])}
-            """
-
-        # Format summary with Markdown for better readability
-        summary_parts = [
-            f"### Weekly Standouts (Week {week})\n",
-            f"**Top Scoring Team:** {highest_scoring_team_name} with **{highest_scoring_team_score:.2f}** points.\n",
-            f"**Top Player:** {hs_player} with **{hs_score:.2f}** points (Team: {hs_team}).\n",
-            f"**Lowest Scoring Starter:** {ls_starter} with **{ls_score:.2f}** points (Team: {ls_team}).\n",
-            f"**Best Bench Player:** {hs_benched} scored **{hs_benched_score:.2f}** points on the bench for {hs_benched_team}.\n",
-            "\n---\n",
-            f"### Matchup Highlights\n",
-            f"**Biggest Blowout:** {blowout_text} (Point Differential: **{blowout_diff:.2f}**)\n",
-            f"**Closest Game:** {close_text} (Point Differential: **{close_diff:.2f}**)\n",
-            "\n---\n",
-            f"### League Power Rankings\n",
-            f"1. **{top_3_teams_result[0][0]}** ({top_3_teams_result[0][1]}W-{top_3_teams_result[0][2]}L) - {float(top_3_teams_result[0][3]):.2f} total points\n",
-            f"2. **{top_3_teams_result[1][0]}** ({top_3_teams_result[1][1]}W-{top_3_teams_result[1][2]}L) - {float(top_3_teams_result[1][3]):.2f} total points\n",
-            f"3. **{top_3_teams_result[2][0]}** ({top_3_teams_result[2][1]}W-{top_3_teams_result[2][2]}L) - {float(top_3_teams_result[2][3]):.2f} total points\n",
-            "\n---\n",
-            f"### Team Streaks\n",
-            f"**Hottest Team:** {hottest_team} is on a **{streak}** game win streak."
-        ]
-        
-        summary = "\n".join(summary_parts)
+            """)
+
+        summary = pipeline.render_groups(
+            [
+                (f"### Weekly Standouts (Week {week})\n", ["top_team", "top_player", "top_performers", "lowest_starter", "best_bench", "points_left"]),
+                ("### Matchup Highlights\n", ["blowout", "closest"]),
+                ("### League Power Rankings\n", ["power_rankings"]),
+                ("### Playoff Odds\n", ["playoff_odds"]),
+                ("### All-Time Records\n", ["all_time"]),
+                ("### Team Streaks\n", ["hottest_streak"]),
+                ("### Season-Long Stats\n", ["most_active"]),
+            ],
+            _format_stat_sections(stats),
+        )
         LOGGER.info(f"Sleeper Summary Generated for Week {week} with real data")
 
         return summary
         
+    except (resilience.ProviderUnavailable, SummaryUnavailable):
+        raise
+    except Exception as e:
+        LOGGER.error(f"Error generating Sleeper summary: {str(e)}")
+        raise
+
+def _shared_week_points(league_info, week, matchups):
+    """
+    Points from the cross-league weekly store, only needed (and only fetched)
+    when some rostered player has no points in the league's own matchups.
+    """
+    missing = any(
+        str(player_id) not in (m.get('players_points') or {})
+        for m in matchups for player_id in m.get('players') or []
+    )
+    if not missing:
+        return None
+    season = league_info.get('season') or helper.get_nfl_season_year(helper.now_est())
+    try:
+        return player_stats_store.weekly_points(season, week, league_info.get('scoring_settings'))
     except Exception as e:
-        error_msg = f"Error generating Sleeper summary: {str(e)}"
-        LOGGER.error(error_msg)
-        return error_msg
+        LOGGER.warning(f"Shared player stats unavailable for week {week}: {e}")
+        return None
+
+def _sleeper_weekly_stats(league_id, week, week_data):
+    """Archives the finalized week, then computes its weekly stats."""
+    week_archive.archive_week("sleeper", league_id, helper.get_nfl_season_year(helper.now_est()), week, week_data)
+    return week_model.weekly_stats(week_data, k=3)
+
+def _sleeper_power_rankings(league_id, week, matchups, user_team_mapping, roster_owner_mapping):
+    """All-play power rankings through `week`, fetching only weeks the league's tracker hasn't seen."""
+    def week_rows(w):
+        week_matchups = matchups if w == week else sleeper_helper.fetch_matchups(league_id, w) or []
+        return power_rankings.sleeper_week_rows(week_matchups, user_team_mapping, roster_owner_mapping)
+    season = helper.get_nfl_season_year(helper.now_est())
+    season_rankings = power_rankings.update("sleeper", league_id, season, week, week_rows)
+    week_archive.archive_standings("sleeper", league_id, season, week, season_rankings)
+    return season_rankings
+
+def _sleeper_playoff_odds(league_id, week, league_info, season_rankings):
+    """
+    Playoff odds from the league's remaining regular season matchups, cached per finalized week.
+    `season_rankings` brings the rankings tracker up to date (see pipeline.shared).
+    """
+    season = helper.get_nfl_season_year(helper.now_est())
+    key = ("sleeper", str(league_id), season, week)
+    odds = playoff_odds.cached(key)
+    if odds is not None:
+        return odds
+    settings = league_info.get('settings') or {}
+    last_week = int(settings.get('playoff_week_start') or 15) - 1
+    playoff_spots = int(settings.get('playoff_teams') or 0)
+    season_rankings()
+    fetch_games = lambda w: playoff_odds.pair_by_matchup(
+        (m.get('roster_id'), m.get('matchup_id')) for m in sleeper_helper.fetch_matchups(league_id, w) or []
+    )
+    future_weeks = list(range(week + 1, last_week + 1))
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        remaining = list(executor.map(fetch_games, future_weeks)) if future_weeks else []
+    return playoff_odds.playoff_odds(key, power_rankings.get_tracker(*key[:3]), remaining, playoff_spots)
+
+def _sleeper_all_time(league_id, week, week_data):
+    """All-time record lines; the league's past seasons are backfilled in the background."""
+    season = helper.get_nfl_season_year(helper.now_est())
+    league_history.start_backfill("sleeper", league_id, league_history.backfill_sleeper, league_id, week, player_stats_store.player_name)
+    pairs = week_model.matchup_pairs(week_data)
+    records = league_history.record_week("sleeper", league_id, season, week, pairs)
+    return league_history.format_records(records, season, week, pairs)
+
+def _sleeper_most_active(league_id, week, user_team_mapping, roster_owner_mapping):
+    """Manager with the most moves this season; only rounds not seen before are fetched."""
+    # Moves keep landing in the latest round until the league moves on, so only earlier rounds are kept for good
+    rounds = sleeper_helper.fetch_transaction_rounds(league_id, week, finalized_through=week - 1)
+    return sleeper_helper.most_active_team(sleeper_helper.transaction_counts(rounds), user_team_mapping, roster_owner_mapping)
+
+def _sleeper_points_left(league_info, matchups, user_team_mapping, roster_owner_mapping, week_points):
+    """Team that left the most points on its bench, from the league's roster slot settings."""
+    roster_positions = league_info.get('roster_positions') or []
+    positions_of = lambda player_id: player_stats_store.player_metadata(player_id)["fantasy_positions"]
+    reports = lineup_optimizer.sleeper_lineup_reports(
+        matchups, roster_positions, user_team_mapping, roster_owner_mapping, positions_of, week_points
+    )
+    bench = lineup_optimizer.most_points_left(reports)
+    return bench[0] if bench else None
+
+def _weekly_stat_results(weekly):
+    """Splits the week model's stat boards into the per-line stat results (headline entries first)."""
+    if weekly is None:
+        return {}
+    first = lambda board, empty: weekly[board][0] if weekly[board] else empty
+    return {
+        "top_team": first("top_teams", ("N/A", 0)),
+        "top_player": first("top_players", ("N/A", -1, "N/A")),
+        "top_performers": weekly["top_players"],
+        "lowest_starter": first("worst_starters", ("N/A", 0, "N/A")),
+        "best_bench": first("best_bench", ("N/A", -1, "N/A")),
+        "blowout": first("blowouts", ((("No match", 0), ("No match", 0)), 0)),
+        "closest": first("closest", ((("No match", 0), ("No match", 0)), 0)),
+    }
+
+def _format_match(match):
+    """Formats a ((winner, points), (loser, points)) pair for display."""
+    if match and len(match) >= 2:
+        winner, loser = match[0], match[1]
+        return f"{winner[0]} ({winner[1]:.1f}) vs {loser[0]} ({loser[1]:.1f})"
+    return "No matchup data available"
+
+def _format_stat_sections(stats):
+    """Turns raw stat results into markdown lines, keyed by section name."""
+    lines = {}
+    if "top_team" in stats:
+        name, score = stats["top_team"]
+        lines["top_team"] = f"**Top Scoring Team:** {name} with **{score:.2f}** points.\n"
+    if "top_player" in stats:
+        player, score, team = stats["top_player"]
+        lines["top_player"] = f"**Top Player:** {player} with **{score:.2f}** points (Team: {team}).\n"
+    if stats.get("top_performers"):
+        lines["top_performers"] = "**Top Performers:** " + ", ".join(
+            f"{player} ({score:.2f}, {team})" for player, score, team in stats["top_performers"]
+        ) + "\n"
+    if "lowest_starter" in stats:
+        player, score, team = stats["lowest_starter"]
+        lines["lowest_starter"] = f"**Lowest Scoring Starter:** {player} with **{score:.2f}** points (Team: {team}).\n"
+    if "best_bench" in stats:
+        player, score, team = stats["best_bench"]
+        lines["best_bench"] = f"**Best Bench Player:** {player} scored **{score:.2f}** points on the bench for {team}.\n"
+    if "blowout" in stats:
+        match, diff = stats["blowout"]
+        lines["blowout"] = f"**Biggest Blowout:** {_format_match(match)} (Point Differential: **{diff:.2f}**)\n"
+    if "closest" in stats:
+        match, diff = stats["closest"]
+        lines["closest"] = f"**Closest Game:** {_format_match(match)} (Point Differential: **{diff:.2f}**)\n"
+    if stats.get("points_left"):
+        lines["points_left"] = lineup_optimizer.format_bench_line(stats["points_left"]) + "\n"
+    if "power_rankings" in stats:
+        lines["power_rankings"] = power_rankings.format_rankings(stats["power_rankings"])
+    if stats.get("playoff_odds"):
+        lines["playoff_odds"] = playoff_odds.format_odds(stats["playoff_odds"])
+    if stats.get("all_time"):
+        lines["all_time"] = stats["all_time"]
+    if stats.get("most_active"):
+        team, counts = stats["most_active"]
+        lines["most_active"] = (
+            f"**Most Active Manager:** {team} with **{sum(counts.values())}** transactions "
+            f"({counts['waiver']} waiver, {counts['free_agent']} free agent, {counts['trade']} trade).\n"
+        )
+    if "hottest_streak" in stats:
+        team, streak = stats["hottest_streak"]
+        lines["hottest_streak"] = f"**Hottest Team:** {team} is on a **{streak}** game win streak."
+    return lines
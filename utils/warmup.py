@@ -0,0 +1,100 @@
+import threading
+import time
+from datetime import datetime
+import pytz
+from streamlit.logger import get_logger
+from utils import helper, lazy_imports, metrics, openai_client, provider_http, resilience, sleeper_helper
+
+LOGGER = get_logger(__name__)
+playoff_odds = lazy_imports.module("utils.playoff_odds")
+
+PENDING, READY, FAILED = "pending", "ready", "failed"
+# Steps the app cannot serve a fast recap without. Connection warm-ups are best effort.
+REQUIRED_STEPS = ("players_index", "week_calendar")
+# Providers fetched through provider_http's pooled session: Sleeper, and ESPN's
+# matchup-score view. espn_api and yfpy open their own connections, so warming
+# those hosts here would not help them.
+SESSION_PROVIDERS = ("sleeper", "espn")
+
+_LOCK = threading.Lock()
+_STATUS = {}
+_STARTED = threading.Event()
+_DONE = threading.Event()
+
+
+def _set_status(step, value):
+    with _LOCK:
+        _STATUS[step] = value
+
+
+def _run_step(step, fn):
+    start = time.perf_counter()
+    try:
+        fn()
+        _set_status(step, READY)
+    except Exception as e:
+        _set_status(step, FAILED)
+        LOGGER.warning(f"Warm-up step '{step}' failed: {e}")
+    finally:
+        metrics.observe("warmup.step_seconds", time.perf_counter() - start, step=step)
+
+
+def _prefill_calendar():
+    now = datetime.now(pytz.timezone('US/Eastern'))
+    helper.debug_week_selection(now)
+
+
+def _open_provider_connections():
+    # Opens pooled keep-alive (TLS) connections so the first recap doesn't pay for the handshakes
+    session = provider_http.get_session()
+    for provider in SESSION_PROVIDERS:
+        session.head(f"https://{resilience.PROVIDER_LIMITS[provider]['host']}/", timeout=5)
+
+
+def _open_openai_connection():
+    # Listing models is free; it opens a connection in the client's own pool for the first recap
+    client = openai_client.get_client()
+    if client is None:
+        LOGGER.info("OpenAI is not configured; skipping its connection warm-up")
+        return
+    client.with_options(timeout=5).models.list()
+
+
+def _run():
+    for step in ("players_index", "week_calendar", "provider_connections", "openai_connection", "simulation_pool"):
+        _set_status(step, PENDING)
+    _run_step("players_index", sleeper_helper.load_players_data)
+    _run_step("week_calendar", _prefill_calendar)
+    _run_step("provider_connections", _open_provider_connections)
+    _run_step("openai_connection", _open_openai_connection)
+    _run_step("simulation_pool", playoff_odds.warm_up)
+    _DONE.set()
+    LOGGER.info(f"Warm-up finished: {status()}")
+
+
+def start():
+    """Starts the warm-up on a background thread (once per process). Never blocks the caller."""
+    with _LOCK:
+        if _STARTED.is_set():
+            return False
+        _STARTED.set()
+    threading.Thread(target=_run, name="startup-warmup", daemon=True).start()
+    return True
+
+
+def status():
+    """Returns each warm-up step's state: "pending", "ready" or "failed"."""
+    with _LOCK:
+        return dict(_STATUS)
+
+
+def is_ready():
+    """Readiness for health checks: every required step has succeeded."""
+    current = status()
+    return all(current.get(step) == READY for step in REQUIRED_STEPS)
+
+
+def wait_until_ready(timeout=None):
+    """Blocks until the warm-up finished (or `timeout` passed). Returns `is_ready()`."""
+    _DONE.wait(timeout)
+    return is_ready()
@@ -0,0 +1,235 @@
+import os
+import threading
+import uuid
+from streamlit.logger import get_logger
+from utils import lazy_imports, metrics
+
+LOGGER = get_logger(__name__)
+
+# Local, columnar archive of finalized league weeks, so power rankings, league history
+# and season stats come from disk instead of new ESPN/Sleeper/Yahoo calls. One Parquet file per week and
+# table, hive-partitioned:
+#
+#   <ARCHIVE_DIR>/<table>/provider=sleeper/league_id=123/season=2025/week=7/part-0.parquet
+#
+# Reads are memory-mapped and push filters down to the partition directories and the
+# Parquet row groups. pyarrow is optional: without it archiving is skipped and reads
+# return None, so callers fall back to the provider APIs.
+ARCHIVE_DIR = os.environ.get("COMMISH_ARCHIVE_DIR", "archive")
+PARTITION_KEYS = ("provider", "league_id", "season", "week")
+# Column types (pyarrow type factory names), fixed so partitions written from
+# different weeks always share one schema, even when a column is all null
+SCHEMAS = {
+    "players": {
+        "player_id": "string", "name": "string", "team_id": "string", "team_name": "string",
+        "slot": "string", "points": "float64", "starter": "bool_", "reserve": "bool_",
+    },
+    "matchups": {
+        "home_team_id": "string", "home_team_name": "string", "home_points": "float64",
+        "away_team_id": "string", "away_team_name": "string", "away_points": "float64",
+    },
+    "standings": {
+        "rank": "int64", "team_name": "string", "wins": "float64", "points_for": "float64",
+        "all_play_wins": "int64", "all_play_losses": "int64", "all_play_ties": "int64", "luck": "float64",
+    },
+}
+
+_LOCK = threading.Lock()
+_IMPORT_LOCK = threading.Lock()
+_ARROW = []  # [(pyarrow, pyarrow.parquet, pyarrow.dataset) or None] once imported
+
+
+def _pyarrow():
+    """Returns (pyarrow, pyarrow.parquet, pyarrow.dataset), or None when pyarrow isn't installed."""
+    # Imported once under a lock: threads racing a first import can see a half-initialized module
+    with _IMPORT_LOCK:
+        if not _ARROW:
+            try:
+                _ARROW.append((lazy_imports.load("pyarrow"), lazy_imports.load("pyarrow.parquet"), lazy_imports.load("pyarrow.dataset")))
+            except ImportError:
+                _ARROW.append(None)
+                LOGGER.info("pyarrow is not installed; the week archive is disabled")
+        return _ARROW[0]
+
+
+def is_available():
+    return _pyarrow() is not None
+
+
+def partition_path(table, provider, league_id, season, week, root=None):
+    return os.path.join(
+        root or ARCHIVE_DIR, table,
+        f"provider={provider}", f"league_id={league_id}", f"season={int(season)}", f"week={int(week)}",
+    )
+
+
+def has_week(provider, league_id, season, week, table="matchups", root=None):
+    return os.path.exists(os.path.join(partition_path(table, provider, league_id, season, week, root), "part-0.parquet"))
+
+
+def _write(table, key, columns, root=None):
+    """Atomically replaces one week partition of `table` with `columns` ({name: list})."""
+    arrow = _pyarrow()
+    if arrow is None:
+        return False
+    pa, pq, _ = arrow
+    directory = partition_path(table, *key, root=root)
+    os.makedirs(directory, exist_ok=True)
+    target = os.path.join(directory, "part-0.parquet")
+    temp = os.path.join(directory, f".part-0.{uuid.uuid4().hex}.tmp")
+    schema = pa.schema([(name, getattr(pa, type_name)()) for name, type_name in SCHEMAS[table].items()])
+    pq.write_table(pa.table(columns, schema=schema), temp, compression="zstd")
+    os.replace(temp, target)
+    metrics.increment("archive.partitions_written", table=table)
+    return True
+
+
+def archive_week(provider, league_id, season, week, week_data, root=None):
+    """
+    Archives a finalized week's player and matchup rows from a week_model.WeekData.
+    Re-archiving a week replaces it (e.g. after stat corrections). Team-level weeks
+    (no player rows, e.g. from history backfill) only write matchups. Never raises.
+
+    Returns:
+    - bool: Whether the week was written.
+    """
+    key = (provider, str(league_id), int(season), int(week))
+    team_ids = [str(team_id) for team_id in week_data.team_ids]
+    try:
+        with _LOCK:
+            if _pyarrow() is None:
+                return False
+            if week_data.player_ids:
+                _write("players", key, {
+                    "player_id": [str(player_id) for player_id in week_data.player_ids],
+                    "name": list(week_data.names),
+                    "team_id": [team_ids[i] for i in week_data.team.tolist()],
+                    "team_name": [week_data.team_names[i] for i in week_data.team.tolist()],
+                    "slot": [str(slot) for slot in week_data.slots],
+                    "points": week_data.points.tolist(),
+                    "starter": week_data.starter.tolist(),
+                    "reserve": week_data.reserve.tolist(),
+                }, root)
+            away = week_data.away.tolist()
+            _write("matchups", key, {
+                "home_team_id": [team_ids[i] for i in week_data.home.tolist()],
+                "home_team_name": [week_data.team_names[i] for i in week_data.home.tolist()],
+                "home_points": [float(week_data.team_points[i]) for i in week_data.home.tolist()],
+                "away_team_id": [team_ids[i] if i >= 0 else None for i in away],
+                "away_team_name": [week_data.team_names[i] if i >= 0 else None for i in away],
+                "away_points": [float(week_data.team_points[i]) if i >= 0 else None for i in away],
+            }, root)
+        return True
+    except Exception as e:
+        LOGGER.warning(f"Could not archive {provider} league {league_id} week {week}: {e}")
+        return False
+
+
+def drop_week(table, provider, league_id, season, week, root=None):
+    """Removes one week partition of `table` (e.g. player rows a stat correction made stale). Never raises."""
+    target = os.path.join(partition_path(table, provider, str(league_id), season, week, root), "part-0.parquet")
+    try:
+        with _LOCK:
+            os.remove(target)
+        return True
+    except FileNotFoundError:
+        return False
+    except OSError as e:
+        LOGGER.warning(f"Could not drop {target}: {e}")
+        return False
+
+
+def archive_standings(provider, league_id, season, week, rankings, root=None):
+    """Archives the power rankings rows (see power_rankings.SeasonTracker.rankings) as of `week`. Never raises."""
+    key = (provider, str(league_id), int(season), int(week))
+    try:
+        with _LOCK:
+            return _write("standings", key, {
+                "rank": list(range(1, len(rankings) + 1)),
+                "team_name": [row["team"] for row in rankings],
+                "wins": [row["wins"] for row in rankings],
+                "points_for": [row["points_for"] for row in rankings],
+                "all_play_wins": [row["all_play"][0] for row in rankings],
+                "all_play_losses": [row["all_play"][1] for row in rankings],
+                "all_play_ties": [row["all_play"][2] for row in rankings],
+                "luck": [row["luck"] for row in rankings],
+            }, root)
+    except Exception as e:
+        LOGGER.warning(f"Could not archive {provider} league {league_id} standings for week {week}: {e}")
+        return False
+
+
+def read(table, provider=None, league_id=None, season=None, weeks=None, columns=None, filters=None, root=None):
+    """
+    Reads archived rows as a pyarrow Table, memory-mapped. Partition filters prune
+    directories; extra `filters` (pyarrow DNF tuples, e.g. [("points", ">", 30)]) are
+    pushed down to the Parquet row groups.
+
+    Returns:
+    - pyarrow.Table, or None when pyarrow isn't installed or nothing is archived.
+    """
+    arrow = _pyarrow()
+    path = os.path.join(root or ARCHIVE_DIR, table)
+    if arrow is None or not os.path.isdir(path):
+        return None
+    pa, pq, ds = arrow
+    # Explicit partition types: league ids stay strings even when they look numeric
+    partitioning = ds.partitioning(
+        pa.schema([("provider", pa.string()), ("league_id", pa.string()), ("season", pa.int32()), ("week", pa.int32())]),
+        flavor="hive",
+    )
+    predicates = list(filters or [])
+    for name, value in (("provider", provider), ("league_id", league_id), ("season", season)):
+        if value is not None:
+            predicates.append((name, "=", int(value) if name == "season" else str(value)))
+    if weeks is not None:
+        predicates.append(("week", "in", [int(week) for week in weeks]))
+    try:
+        result = pq.read_table(path, columns=columns, filters=predicates or None, memory_map=True, partitioning=partitioning)
+    except (FileNotFoundError, ValueError) as e:
+        LOGGER.debug(f"Nothing archived in {path} for {predicates}: {e}")
+        return None
+    metrics.increment("archive.reads", table=table)
+    return result if result.num_rows else None
+
+
+def week_pairs(provider, league_id, season, weeks, root=None):
+    """
+    Head-to-head pairs for archived weeks, read in one pass.
+
+    Returns:
+    - dict: {week: [[(team_id, team_name, points), ...]]} for the weeks found (a single
+      entry is a bye); weeks that aren't archived are left out.
+    """
+    table = read("matchups", provider, league_id, season, weeks=weeks, root=root)
+    if table is None:
+        return {}
+    pairs = {}
+    for row in table.to_pylist():
+        pair = [(row["home_team_id"], row["home_team_name"], row["home_points"])]
+        if row["away_team_id"] is not None:
+            pair.append((row["away_team_id"], row["away_team_name"], row["away_points"]))
+        pairs.setdefault(row["week"], []).append(pair)
+    return pairs
+
+
+def season_player_totals(provider, league_id, season, weeks, root=None):
+    """
+    Points per player summed over `weeks` of a season, best first. The league, season
+    and week filters prune the partition directories, so only those files are opened,
+    and only the columns summed are read.
+
+    Returns:
+    - List[dict]: "player_id", "name" and "points", or None unless every one of `weeks`
+      has archived player rows (a partial season would undercount).
+    """
+    weeks = {int(week) for week in weeks}
+    table = read("players", provider, league_id, season, weeks=sorted(weeks), columns=["player_id", "name", "points", "week"], root=root)
+    if table is None or set(table.column("week").to_pylist()) != weeks:
+        return None
+    grouped = table.group_by(["player_id", "name"]).aggregate([("points", "sum")])
+    rows = [
+        {"player_id": row["player_id"], "name": row["name"], "points": round(row["points_sum"], 2)}
+        for row in grouped.to_pylist()
+    ]
+    return sorted(rows, key=lambda row: row["points"], reverse=True)
@@ -0,0 +1,249 @@
+import numpy as np
+from utils.lineup_optimizer import yahoo_eligible_positions
+
+# Provider-agnostic, columnar representation of one league week. Adapters turn ESPN box
+# scores, Sleeper matchups and Yahoo roster stats into the same arrays, and one stat
+# engine (`weekly_stats`) computes every weekly superlative from them.
+
+BENCH_SLOTS = {"BE", "BN"}
+RESERVE_SLOTS = {"IR", "IR+", "NA", "TAXI"}
+
+
+class WeekData:
+    """
+    One week of a league as parallel columns.
+
+    Player columns (one entry per rostered player):
+    - player_ids, names, slots (lists), eligible (lists of slot names, may be empty)
+    - points (float ndarray), team (int ndarray: index into the team columns)
+    - starter, reserve (bool ndarrays): in the starting lineup / on IR or taxi
+
+    Team columns: team_ids, team_names (lists), team_points and team_projected (float
+    ndarrays, projected is NaN when unknown).
+
+    Matchup columns: home and away (int ndarrays of team indices, away is -1 for a bye).
+    """
+
+    def __init__(self):
+        self.player_ids, self.names, self.slots, self.eligible = [], [], [], []
+        self._points, self._team, self._starter, self._reserve = [], [], [], []
+        self.team_ids, self.team_names = [], []
+        self._team_points, self._team_projected = [], []
+        self._home, self._away = [], []
+        self._team_index = {}
+
+    # Building
+
+    def add_team(self, team_id, name, points, projected=None):
+        """Adds a team (once) and returns its index."""
+        index = self._team_index.get(team_id)
+        if index is None:
+            index = self._team_index[team_id] = len(self.team_ids)
+            self.team_ids.append(team_id)
+            self.team_names.append(name)
+            self._team_points.append(float(points or 0))
+            self._team_projected.append(np.nan if projected is None else float(projected))
+        return index
+
+    def add_player(self, team_index, player_id, name, points, slot, starter=None, eligible=()):
+        """Adds a player row. `starter` defaults to "the slot is neither bench nor reserve"."""
+        reserve = slot in RESERVE_SLOTS
+        if starter is None:
+            starter = slot not in BENCH_SLOTS and not reserve
+        self.player_ids.append(player_id)
+        self.names.append(name)
+        self.slots.append(slot)
+        self.eligible.append(list(eligible or ()))
+        self._points.append(float(points or 0))
+        self._team.append(team_index)
+        self._starter.append(bool(starter))
+        self._reserve.append(reserve)
+
+    def add_matchup(self, home_index, away_index=-1):
+        self._home.append(home_index)
+        self._away.append(-1 if away_index is None else away_index)
+
+    def freeze(self):
+        """Converts the accumulated columns to arrays. Returns self."""
+        self.points = np.asarray(self._points, dtype=np.float64)
+        self.team = np.asarray(self._team, dtype=np.int64)
+        self.starter = np.asarray(self._starter, dtype=bool)
+        self.reserve = np.asarray(self._reserve, dtype=bool)
+        self.team_points = np.asarray(self._team_points, dtype=np.float64)
+        self.team_projected = np.asarray(self._team_projected, dtype=np.float64)
+        self.home = np.asarray(self._home, dtype=np.int64)
+        self.away = np.asarray(self._away, dtype=np.int64)
+        return self
+
+    def team_players(self, team_index):
+        """Indices of a team's player rows."""
+        return np.flatnonzero(self.team == team_index)
+
+
+def _top(values, mask, k, largest=True):
+    """Indices of the k best masked values, best first; the earlier row wins ties."""
+    candidates = np.flatnonzero(mask)
+    if not len(candidates):
+        return []
+    keys = -values[candidates] if largest else values[candidates]
+    if 0 < k < len(keys):
+        # Select the k best in linear time, then sort only those: everything better than
+        # the k-th key, plus the earliest rows tied with it
+        kth = np.partition(keys, k - 1)[k - 1]
+        better = np.flatnonzero(keys < kth)
+        tied = np.flatnonzero(keys == kth)[:k - len(better)]
+        chosen = np.sort(np.concatenate([better, tied]))
+        candidates, keys = candidates[chosen], keys[chosen]
+    return candidates[np.argsort(keys, kind="stable")[:k]].tolist()
+
+
+def weekly_stats(week, k=3):
+    """
+    Every weekly superlative from one WeekData.
+
+    Returns:
+    - dict: Lists ordered best first:
+        "top_players", "worst_players" (reserve excluded), "best_bench", "worst_starters": (name, points, team_name)
+        "top_teams": (team_name, points)
+        "blowouts", "closest": (((winner, points), (loser, points)), point_diff)
+        "busts": (team_name, points short of projection)
+    """
+    names, team_names, points = week.names, week.team_names, week.points
+
+    def players(indices):
+        return [(names[i], float(points[i]), team_names[week.team[i]]) for i in indices]
+
+    everyone = np.ones(len(points), dtype=bool)
+    stats = {
+        "top_players": players(_top(points, everyone, k)),
+        "worst_players": players(_top(points, ~week.reserve, k, largest=False)),
+        "best_bench": players(_top(points, ~week.starter & ~week.reserve, k)),
+        "worst_starters": players(_top(points, week.starter, k, largest=False)),
+        "top_teams": [(team_names[i], float(week.team_points[i])) for i in _top(week.team_points, np.ones(len(team_names), dtype=bool), k)],
+    }
+
+    played = week.away >= 0
+    home, away = week.home[played], week.away[played]
+    home_points, away_points = week.team_points[home], week.team_points[away]
+    diffs = np.abs(home_points - away_points)
+    home_won = home_points >= away_points
+    winners = np.where(home_won, home, away)
+    losers = np.where(home_won, away, home)
+
+    def matches(indices):
+        return [
+            (((team_names[winners[i]], float(week.team_points[winners[i]])),
+              (team_names[losers[i]], float(week.team_points[losers[i]]))), float(diffs[i]))
+            for i in indices
+        ]
+
+    every_match = np.ones(len(diffs), dtype=bool)
+    stats["blowouts"] = matches(_top(diffs, every_match, k))
+    stats["closest"] = matches(_top(diffs, every_match, k, largest=False))
+
+    shortfall = week.team_projected - week.team_points
+    stats["busts"] = [
+        (team_names[i], round(float(shortfall[i]), 2))
+        for i in _top(np.nan_to_num(shortfall, nan=-np.inf), ~np.isnan(shortfall) & (shortfall > 0), k)
+    ]
+    return stats
+
+
+# Provider adapters
+
+def from_espn(box_scores, clean=lambda name: name):
+    """WeekData from a week of espn_api box scores."""
+    week = WeekData()
+    for box_score in box_scores:
+        sides = []
+        for side in ("home", "away"):
+            team = getattr(box_score, f"{side}_team")
+            if not team:  # Playoff byes have no opponent
+                sides.append(-1)
+                continue
+            score = getattr(box_score, f"{side}_score")
+            lineup = getattr(box_score, f"{side}_lineup")
+            index = week.add_team(team.team_id, clean(team.team_name), score, getattr(box_score, f"{side}_projected", None))
+            for player in lineup:
+                week.add_player(index, player.playerId, player.name, player.points, player.slot_position, eligible=player.eligibleSlots)
+            sides.append(index)
+        if sides[0] >= 0:
+            week.add_matchup(sides[0], sides[1])
+    return week.freeze()
+
+
+def from_pairs(pairs):
+    """
+    Team-level WeekData (no player rows) from head-to-head pairs.
+
+    Args:
+    - pairs (iterable): [(team_id, team_name, points), ...] per matchup; a single team is a bye.
+    """
+    week = WeekData()
+    for pair in pairs:
+        indices = [week.add_team(team_id, name, points) for team_id, name, points in pair]
+        week.add_matchup(indices[0], indices[1] if len(indices) > 1 else -1)
+    return week.freeze()
+
+
+def matchup_pairs(week):
+    """Head-to-head pairs [(team_id, team_name, points), ...] of a WeekData, byes as single entries."""
+    side = lambda i: (week.team_ids[i], week.team_names[i], float(week.team_points[i]))
+    return [[side(home)] + ([side(away)] if away >= 0 else []) for home, away in zip(week.home.tolist(), week.away.tolist())]
+
+
+def from_sleeper(matchups, user_team_mapping, roster_owner_mapping, name_of, fallback_points=None):
+    """
+    WeekData from a week of Sleeper matchups. Points missing from a roster's
+    `players_points` come from `fallback_points` ({player_id: points}) when given.
+    """
+    week = WeekData()
+    fallback_points = fallback_points or {}
+    by_matchup = {}
+    for matchup in matchups:
+        roster_id = matchup.get('roster_id')
+        team_name = user_team_mapping.get(roster_owner_mapping.get(roster_id), "Unknown Team")
+        index = week.add_team(roster_id, team_name, matchup.get('points'))
+        players_points = matchup.get('players_points') or {}
+        starters = {str(player_id) for player_id in matchup.get('starters') or []}
+        reserve = {str(player_id) for player_id in matchup.get('reserve') or []}
+        for player_id in matchup.get('players') or []:
+            player_id = str(player_id)
+            points = players_points.get(player_id, fallback_points.get(player_id, 0))
+            slot = "IR" if player_id in reserve else "STARTER" if player_id in starters else "BN"
+            week.add_player(index, player_id, name_of(player_id), points, slot, starter=player_id in starters)
+        # Teams without a matchup_id (byes, some playoff brackets) have no opponent
+        matchup_id = matchup.get('matchup_id')
+        by_matchup.setdefault(matchup_id if matchup_id is not None else ("bye", roster_id), []).append(index)
+    for teams in by_matchup.values():
+        week.add_matchup(teams[0], teams[1] if len(teams) > 1 else -1)
+    return week.freeze()
+
+
+def from_yahoo(players_by_team, matchups):
+    """
+    WeekData from Yahoo data.
+
+    Args:
+    - players_by_team (list): (team_id, team_name, roster player stats) per team.
+    - matchups (list): The week's league matchups.
+    """
+    week = WeekData()
+    for matchup in matchups:
+        indices = [
+            week.add_team(team.team_id, team.name.decode('utf-8'), team.team_points.total, team.team_projected_points.total)
+            for team in matchup.teams
+        ]
+        week.add_matchup(indices[0], indices[1] if len(indices) > 1 else -1)
+    for team_id, team_name, players_stats in players_by_team:
+        index = week.add_team(team_id, team_name, sum(
+            player.player_points.total for player in players_stats
+            if player.selected_position.position not in BENCH_SLOTS | RESERVE_SLOTS
+        ))
+        for player in players_stats:
+            week.add_player(
+                index, player.player_id, player.name.full, player.player_points.total,
+                player.selected_position.position, eligible=yahoo_eligible_positions(player),
+            )
+    return week.freeze()
+
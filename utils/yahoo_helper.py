@@ -1,26 +1,11 @@
-from yfpy.query import YahooFantasySportsQuery
+from concurrent.futures import ThreadPoolExecutor
 from streamlit.logger import get_logger
+from utils import helper, lazy_imports, lineup_optimizer, resilience, week_archive
+from utils.leaderboard import TopK
 LOGGER = get_logger(__name__)
-
-def get_most_recent_week(sc):
-    """
-    Retrieves the most recently completed week in the fantasy league.
-    
-    Parameters:
-    - sc (object): The YahooFantasySportsQuery object.
-    
-    Returns:
-    - int: The most recently completed week.
-    """
-    try:
-        league_info = sc.get_league_info()
-        completed_week = league_info.current_week - 1
-        LOGGER.info(f"Most recent week retrieved successfully: {completed_week}")
-        return completed_week
-    except Exception as e:
-        LOGGER.exception("Failed to get the most recent week")
-        raise e  # Reraise the exception after logging it
-
+playoff_odds = lazy_imports.module("utils.playoff_odds")
+power_rankings = lazy_imports.module("utils.power_rankings")
+week_model = lazy_imports.module("utils.week_model")
 
 def extract_team_ids(teams):
     """
@@ -39,64 +24,8 @@ def extract_team_ids(teams):
         raise e  # Reraise the exception after logging it
 
 
-def find_extreme_scorers_and_banged_up_team(sc, team_ids, week=3):
-    """
-    Finds the highest and lowest scoring players of the week, 
-    highest-scoring player on the bench, lowest-scoring player that started,
-    and the team with the most 'banged up' players.
-    
-    Parameters:
-    - sc (object): The YahooFantasySportsQuery object.
-    - team_ids (dict): A dictionary mapping team ids to team names.
-    - week (int): The week for which to retrieve player stats.
-    
-    Returns:
-    - tuple: A tuple containing the highest and lowest scoring players,
-             highest-scoring player on the bench, lowest-scoring player that started,
-             and the team with the most 'banged up' players.
-    """
-    highest_scorer = None
-    lowest_scorer = None
-    highest_scorer_bench = None
-    lowest_scorer_started = None
-    most_banged_up_team = None
-    most_banged_up_count = 0
-    
-    for team_id, team_name in team_ids.items():
-        # Get player stats for the team
-        players_stats = sc.get_team_roster_player_stats_by_week(team_id, chosen_week=week)
-        
-        banged_up_count = 0  # Counter for the number of 'banged up' players in the current team
-        
-        for player in players_stats:
-            # Check if this player has the highest score so far
-            if (highest_scorer is None) or (player.player_points.total > highest_scorer[0].player_points.total):
-                highest_scorer = (player, team_name)
-            
-            # Check if this player has the lowest score so far
-            if (lowest_scorer is None) or (player.player_points.total < lowest_scorer[0].player_points.total):
-                lowest_scorer = (player, team_name)
-            
-            # Check if this player is on the bench and has the highest score among benched players
-            if player.selected_position.position == "BN" and \
-               (highest_scorer_bench is None or player.player_points.total > highest_scorer_bench[0].player_points.total):
-                highest_scorer_bench = (player, team_name)
-            
-            # Check if this player is started and has the lowest score among started players
-            if player.selected_position.position != "BN" and \
-               (lowest_scorer_started is None or player.player_points.total < lowest_scorer_started[0].player_points.total):
-                lowest_scorer_started = (player, team_name)
-            
-            # Check if this player is 'banged up'
-            if player.status in ["IR", "PUP", "O", "Q"]:
-                banged_up_count += 1
-        
-        # Check if this team has the most 'banged up' players so far
-        if banged_up_count > most_banged_up_count:
-            most_banged_up_count = banged_up_count
-            most_banged_up_team = (team_name, banged_up_count)
-    
-    return highest_scorer, lowest_scorer, highest_scorer_bench, lowest_scorer_started, most_banged_up_team
+BANGED_UP_STATUSES = ("IR", "PUP", "O", "Q")
+
 
 def team_with_most_moves(teams):
     """
@@ -122,77 +51,6 @@ def team_with_most_moves(teams):
     # Return a message with the team name and number of moves
     return f"The team with the greatest number of moves/transactions is {team_name.decode('utf-8')} with {most_moves} moves!"
 
-def analyze_weekly_performance(sc, chosen_week):
-    """
-    Analyzes the weekly performance of teams and matches in the league.
-    
-    Parameters:
-    - sc (object): The YahooFantasySportsQuery object.
-    - chosen_week (int): The week for which to retrieve and analyze data.
-    
-    Returns:
-    - dict: A dictionary containing the analysis results.
-    """
-    matchups = sc.get_league_matchups_by_week(chosen_week)
-    
-    highest_scoring_team = None
-    biggest_blowout = {"teams": None, "point_diff": 0}
-    closest_match = {"teams": None, "point_diff": float('inf')}
-    biggest_bust = {"team": None, "point_diff": 0}
-    
-    for matchup in matchups:
-        teams = matchup.teams
-        
-        # 1. Find the highest-scoring team of the week
-        for team in teams:
-            if (highest_scoring_team is None) or (team.team_points.total > highest_scoring_team.team_points.total):
-                highest_scoring_team = team
-        
-        # 2. Find the biggest blowout match of the week
-        point_diff = round(abs(teams[0].team_points.total - teams[1].team_points.total), 2)
-        if point_diff > biggest_blowout["point_diff"]:
-            biggest_blowout = {"teams": teams, "point_diff": point_diff}
-        
-        # 3. Find the closest match of the week
-        if point_diff < closest_match["point_diff"]:
-            closest_match = {"teams": teams, "point_diff": point_diff}
-        
-        # 4. Find the biggest bust of the week
-        for team in teams:
-            projected_diff = round(team.team_projected_points.total - team.team_points.total, 2)
-            if projected_diff > biggest_bust["point_diff"]:
-                biggest_bust = {"team": team, "point_diff": projected_diff}
-
-    
-    # Creating a result dictionary
-    result = {
-        "highest_scoring_team": {
-            "name": highest_scoring_team.name.decode('utf-8'),
-            "score": highest_scoring_team.team_points.total
-        },
-        "biggest_blowout": {
-            "team_1_name": biggest_blowout["teams"][0].name.decode('utf-8'),
-            "team_1_score": biggest_blowout["teams"][0].team_points.total,
-            "team_2_name": biggest_blowout["teams"][1].name.decode('utf-8'),
-            "team_2_score": biggest_blowout["teams"][1].team_points.total,
-            "point_diff": biggest_blowout["point_diff"]
-        },
-        "closest_match": {
-            "team_1_name": closest_match["teams"][0].name.decode('utf-8'),
-            "team_1_score": closest_match["teams"][0].team_points.total,
-            "team_2_name": closest_match["teams"][1].name.decode('utf-8'),
-            "team_2_score": closest_match["teams"][1].team_points.total,
-            "point_diff": closest_match["point_diff"]
-        },
-        "biggest_bust": {
-            "name": biggest_bust["team"].name.decode('utf-8'),
-            "point_diff": biggest_bust["point_diff"]
-        }
-    }
-
-    
-    return result
-
 
 def generate_weekly_recap(sc, week):
     """
@@ -206,31 +64,111 @@ def generate_weekly_recap(sc, week):
     - str: A string containing the weekly recap.
     """
     # Get relevant data
-    teams = sc.get_league_teams()
+    teams = resilience.call("yahoo", sc.get_league_teams)
     team_ids = extract_team_ids(teams)
-    highest_scorer, lowest_scorer, highest_scorer_bench, lowest_scorer_started, most_banged_up_team = find_extreme_scorers_and_banged_up_team(sc, team_ids, week)
-    analysis_result = analyze_weekly_performance(sc, week)
+    players_by_team = [
+        (team_id, team_name.decode('utf-8'), resilience.call("yahoo", sc.get_team_roster_player_stats_by_week, team_id, chosen_week=week))
+        for team_id, team_name in team_ids.items()
+    ]
+    matchups = resilience.call("yahoo", sc.get_league_matchups_by_week, week)
+    # Every weekly superlative comes from one columnar week and one stat pass
+    week_data = week_model.from_yahoo(players_by_team, matchups)
+    now = helper.now_est()
+    if helper.is_week_finalized(week, now):
+        week_archive.archive_week("yahoo", getattr(sc, "league_id", ""), helper.get_nfl_season_year(now), week, week_data)
+    stats = week_model.weekly_stats(week_data, k=3)
+    banged_up = TopK(key=lambda team_count: team_count[1], where=lambda team_count: team_count[1] > 0).extend(
+        (team_name, sum(1 for player in players_stats if player.status in BANGED_UP_STATUSES))
+        for _, team_name, players_stats in players_by_team
+    ).best()
+    bench = lineup_optimizer.most_points_left(
+        lineup_optimizer.yahoo_lineup_report(team_name, players_stats) for _, team_name, players_stats in players_by_team
+    )
+    power_rankings_line = get_power_rankings_string(sc, week)
+    odds = get_playoff_odds_string(sc, week)
+    
+    player_line = lambda label, row: f"{label}: {row[0]} (rostered by: {row[2]}) with {row[1]} points\n" if row else ""
+    match_line = lambda label, row: (
+        f"{label}: {row[0][0][0]} ({row[0][0][1]} points) vs {row[0][1][0]} ({row[0][1][1]} points) with a point differential of {round(row[1], 2)}\n"
+        if row else ""
+    )
+    first = lambda name: stats[name][0] if stats[name] else None
+    top_team = first("top_teams")
+    bust = first("busts")
     
     # Generate the recap string
     recap = (
-        f"Highest Scoring Team: {analysis_result['highest_scoring_team']['name']} with {analysis_result['highest_scoring_team']['score']} points\n"
-        f"Current Standings: {get_top_teams_string(sc)}\n"
-        f"Highest Scoring Player: {highest_scorer[0].name.full} (rostered by: {highest_scorer[1].decode('utf-8')}) with {highest_scorer[0].player_points.total} points\n"
-        f"Lowest Scoring Player: {lowest_scorer[0].name.full} (rostered by: {lowest_scorer[1].decode('utf-8')}) with {lowest_scorer[0].player_points.total} points\n"
-        f"Highest Scoring Player on Bench: {highest_scorer_bench[0].name.full} (rostered by: {highest_scorer_bench[1].decode('utf-8')}) with {highest_scorer_bench[0].player_points.total} points\n"
-        f"Lowest Scoring Player that Started: {lowest_scorer_started[0].name.full} (rostered by: {lowest_scorer_started[1].decode('utf-8')}) with {lowest_scorer_started[0].player_points.total} points\n"
-        f"Most Banged Up Team: {most_banged_up_team[0].decode('utf-8')} with {most_banged_up_team[1]} injured players\n"
-        f"{team_with_most_moves(teams)}\n"
-        f"Closest Match: {analysis_result['closest_match']['team_1_name']} ({analysis_result['closest_match']['team_1_score']} points) vs {analysis_result['closest_match']['team_2_name']} ({analysis_result['closest_match']['team_2_score']} points) with a point differential of {analysis_result['closest_match']['point_diff']}\n"
-        f"Biggest Blowout Match: {analysis_result['biggest_blowout']['team_1_name']} ({analysis_result['biggest_blowout']['team_1_score']} points) vs {analysis_result['biggest_blowout']['team_2_name']} ({analysis_result['biggest_blowout']['team_2_score']} points) with a point differential of {analysis_result['biggest_blowout']['point_diff']}\n"
-        f"Biggest Team Bust: {analysis_result['biggest_bust']['name']} underperformed by {analysis_result['biggest_bust']['point_diff']} points compared to projections"
+        (f"Highest Scoring Team: {top_team[0]} with {top_team[1]} points\n" if top_team else "")
+        + f"Current Standings: {get_top_teams_string(sc)}\n"
+        + f"Power Rankings: {power_rankings_line}\n"
+        + (f"Playoff Odds: {odds}\n" if odds else "")
+        + player_line("Highest Scoring Player", first("top_players"))
+        + f"Top Performers: {', '.join(f'{name} ({points}, {team})' for name, points, team in stats['top_players'])}\n"
+        + player_line("Lowest Scoring Player", first("worst_players"))
+        + player_line("Highest Scoring Player on Bench", first("best_bench"))
+        + player_line("Lowest Scoring Player that Started", first("worst_starters"))
+        + (f"Most Points Left on Bench: {bench[0]['team']} scored {bench[0]['actual']} points but an optimal lineup would have scored {bench[0]['optimal']} ({bench[0]['left_on_bench']} left on the bench)\n" if bench else "")
+        + (f"Most Banged Up Team: {banged_up[0]} with {banged_up[1]} injured players\n" if banged_up else "")
+        + f"{team_with_most_moves(teams)}\n"
+        + match_line("Closest Match", first("closest"))
+        + match_line("Biggest Blowout Match", first("blowouts"))
+        + (f"Biggest Team Bust: {bust[0]} underperformed by {bust[1]} points compared to projections" if bust else "")
     )
     
     return recap
 
+def get_power_rankings_string(sc, week, shown=None):
+    """
+    All-play power rankings through `week`. Only weeks not seen before are fetched.
+    
+    Parameters:
+    - sc (object): The YahooFantasySportsQuery object.
+    - week (int): The most recent completed week.
+    - shown (int): Teams listed (default power_rankings.SHOWN_TEAMS).
+    
+    Returns:
+    - str: Ranked teams with all-play win percentage and luck.
+    """
+    shown = shown or power_rankings.SHOWN_TEAMS
+    fetch_week = lambda w: power_rankings.yahoo_week_rows(resilience.call("yahoo", sc.get_league_matchups_by_week, w))
+    season = helper.get_nfl_season_year(helper.now_est())
+    rankings = power_rankings.update("yahoo", getattr(sc, "league_id", ""), season, week, fetch_week)
+    week_archive.archive_standings("yahoo", getattr(sc, "league_id", ""), season, week, rankings)
+    return ", ".join(
+        f"{rank}. {row['team']} (all-play {row['all_play_pct']:.3f}, {row['points_for']} PF, luck {row['luck']:+.2f})"
+        for rank, row in enumerate(rankings[:shown], start=1)
+    )
+
+def get_playoff_odds_string(sc, week):
+    """
+    Monte Carlo playoff odds after `week`, from the remaining regular season matchups.
+    
+    Parameters:
+    - sc (object): The YahooFantasySportsQuery object.
+    - week (int): The most recent completed week.
+    
+    Returns:
+    - str: Each team's playoff odds, or an empty string when the regular season is over.
+    """
+    season = helper.get_nfl_season_year(helper.now_est())
+    key = ("yahoo", str(getattr(sc, "league_id", "")), season, week)
+    odds = playoff_odds.cached(key)
+    if odds is None:
+        settings = resilience.call("yahoo", sc.get_league_settings)
+        last_week = int(getattr(settings, "playoff_start_week", 0) or 15) - 1
+        playoff_spots = int(getattr(settings, "num_playoff_teams", 0) or 0)
+        fetch_games = lambda w: [
+            tuple(team.team_id for team in matchup.teams) for matchup in resilience.call("yahoo", sc.get_league_matchups_by_week, w)
+        ]
+        future_weeks = list(range(week + 1, last_week + 1))
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            remaining = list(executor.map(fetch_games, future_weeks)) if future_weeks else []
+        odds = playoff_odds.playoff_odds(key, power_rankings.get_tracker(*key[:3]), remaining, playoff_spots)
+    return ", ".join(f"{row['team']} ({row['playoff_odds'] * 100:.1f}%)" for row in odds)
+
 # Helper function to get top teams string
 def get_top_teams_string(sc):
-    standings_data = sc.get_league_standings()
+    standings_data = resilience.call("yahoo", sc.get_league_standings)
     top_3_teams = sorted(standings_data.teams, key=lambda x: x.team_standings.rank)[:3]
     top_teams_string = ", ".join([f"{team.name.decode('utf-8')} ({ordinal(team.team_standings.rank)} place - {team.team_points.total} points)" for team in top_3_teams])
     return f"{top_teams_string}"